@@ -0,0 +1,383 @@
+import argparse
+import math
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from carregamento import TAMANHO_BLOCO, TAMANHO_LOTE, iterar_lotes_brutos
+from frequentes import (
+    CAPACIDADES,
+    MODO_RANKING,
+    ResumoFrequentes,
+    capacidade_ranking,
+    resumir,
+)
+from indices import indexar_polos
+from modelo import (
+    advogados_do_polo,
+    carregar_tabelas,
+    contar,
+    descartar_repetidos,
+    normalizar_lote,
+    partes_do_polo,
+    primeiros_nomes,
+    tabela_advogados,
+    tabela_contagem,
+    titulos_principais,
+)
+from motor import (
+    CNPJ_PADRAO,
+    VERSAO_DOCUMENTO,
+    agrupar_estados,
+    calcular_indicadores,
+    calcular_painel,
+    cinco_primeiros,
+    completar_estados,
+    erros_top_5,
+    serializar_painel,
+)
+from periodos import calcular_periodos, montar_cubo_assuntos, montar_cubo_movimentacao
+
+# Map-reduce do painel: cada lote de processos vira um estado parcial (contagens,
+# somas e cubos pequenos) que pode ser calculado num processo separado e somado
+# aos demais. Os parciais são combinados na ordem dos lotes, então os empates
+# das contagens saem na mesma ordem de primeira aparição do cálculo em série.
+_CONTAGENS = {
+    "distribuicao_tipo_julgamento": "Categoria",
+    "distribuicao_ramo_direito": "Categoria",
+    "distribuicao_status_processos": "Categoria",
+    "distribuicao_tribunal": "Tribunal",
+    "assuntos_principais": "Assunto",
+    "classes": "Classe Processual",
+}
+# Top 5 em resumos de frequentes (frequentes.py), de memória limitada nos modos
+# "auto" e "aproximado"; advogados são contados por OAB e o resumo guarda o
+# primeiro nome visto de cada inscrição
+_TOP_5_PARTES = {
+    "top_5_envolvidos_ativo": "ATIVO",
+    "top_5_envolvidos_passivo": "PASSIVO",
+}
+_TOP_5_ADVOGADOS = {
+    "top_5_advogados_ativo": "ATIVO",
+    "top_5_advogados_passivo": "PASSIVO",
+}
+
+
+# ========================== Map ==========================
+def agregar_tabelas(tabelas, cnpj=CNPJ_PADRAO, modo_ranking=MODO_RANKING):
+    processos = tabelas["processos"]
+    partes = tabelas["partes"]
+    advogados = tabelas["advogados"]
+    titulos = titulos_principais(tabelas["assuntos"])
+    periodos, avisos = calcular_periodos(processos)
+
+    contagens = {
+        "distribuicao_tipo_julgamento": contar(
+            tabelas["julgamentos"]["tipoJulgamento"]
+        ),
+        "distribuicao_ramo_direito": contar(processos["statusPredictus.ramoDireito"]),
+        "distribuicao_status_processos": contar(
+            processos["statusPredictus.statusProcesso"]
+        ),
+        "distribuicao_tribunal": contar(processos["tribunal"]),
+        "assuntos_principais": contar(titulos),
+        "classes": contar(processos["classeProcessual.nome"]),
+    }
+    capacidade = capacidade_ranking(modo_ranking)
+    top_5 = {
+        nome: resumir(partes_do_polo(partes, polo).to_frame(), "nome", capacidade)
+        for nome, polo in _TOP_5_PARTES.items()
+    }
+    for nome, polo in _TOP_5_ADVOGADOS.items():
+        top_5[nome] = resumir(
+            advogados_do_polo(advogados, polo), "oab", capacidade, primeiros_nomes
+        )
+    return {
+        "indicadores": calcular_indicadores(
+            processos, indexar_polos(partes, processos), cnpj
+        ),
+        "contagens": contagens,
+        "top_5": top_5,
+        "estados": agrupar_estados(processos),
+        "cubo_assuntos": montar_cubo_assuntos(periodos, tabelas["assuntos"]),
+        "movimentacao": montar_cubo_movimentacao(periodos),
+        # "ordem" do cubo é local ao lote; o deslocamento vem dos lotes anteriores
+        "assuntos_com_titulo": int(titulos.notna().sum()),
+        "datas_distribuicao": int(periodos["anoDistribuicao"].notna().sum()),
+        "datas_arquivamento": int(periodos["anoArquivamento"].notna().sum()),
+        "falhas_distribuicao": avisos["falhas_distribuicao"],
+        "falhas_arquivamento": avisos["falhas_arquivamento"],
+    }
+
+
+def agregar_lote(lote, cnpj=CNPJ_PADRAO, modo_ranking=MODO_RANKING):
+    return agregar_tabelas(normalizar_lote(lote), cnpj, modo_ranking)
+
+
+# ========================== Reduce ==========================
+def _somar_contagens(series):
+    # groupby sem ordenar mantém a ordem de primeira aparição entre os lotes
+    return pd.concat(series).groupby(level=0, sort=False).sum()
+
+
+def _somar_movimentacao(series):
+    series = [serie for serie in series if len(serie)] or series[:1]
+    return pd.concat(series).groupby(level=[0, 1]).sum()
+
+
+def combinar_parciais(parciais):
+    parciais = list(parciais)
+    deslocamento = 0
+    cubos = []
+    for parcial in parciais:
+        cubos.append(
+            parcial["cubo_assuntos"].assign(
+                ordem=parcial["cubo_assuntos"]["ordem"] + deslocamento
+            )
+        )
+        deslocamento += parcial["assuntos_com_titulo"]
+    cubo = pd.concat(cubos, ignore_index=True)
+    colunas = [coluna for coluna in cubo.columns if coluna not in ("Total", "ordem")]
+    return {
+        "indicadores": {
+            nome: sum(parcial["indicadores"][nome] for parcial in parciais)
+            for nome in parciais[0]["indicadores"]
+        },
+        "contagens": {
+            nome: _somar_contagens([parcial["contagens"][nome] for parcial in parciais])
+            for nome in parciais[0]["contagens"]
+        },
+        "top_5": {
+            nome: ResumoFrequentes.combinar(
+                [parcial["top_5"][nome] for parcial in parciais]
+            )
+            for nome in parciais[0]["top_5"]
+        },
+        "estados": pd.concat([parcial["estados"] for parcial in parciais])
+        .groupby(level=0)
+        .sum(),
+        "cubo_assuntos": cubo.groupby(colunas, dropna=False)
+        .agg(Total=("Total", "sum"), ordem=("ordem", "min"))
+        .reset_index(),
+        "movimentacao": {
+            nome: _somar_movimentacao(
+                [parcial["movimentacao"][nome] for parcial in parciais]
+            )
+            for nome in parciais[0]["movimentacao"]
+        },
+        "assuntos_com_titulo": deslocamento,
+        "datas_distribuicao": sum(p["datas_distribuicao"] for p in parciais),
+        "datas_arquivamento": sum(p["datas_arquivamento"] for p in parciais),
+        "falhas_distribuicao": sum(p["falhas_distribuicao"] for p in parciais),
+        "falhas_arquivamento": sum(p["falhas_arquivamento"] for p in parciais),
+    }
+
+
+def negar_parcial(parcial):
+    # Parcial com o sinal trocado: somado a um estado, retira a contribuição
+    # dos processos (usado para substituir versões em incremental.py)
+    return {
+        "indicadores": {nome: -valor for nome, valor in parcial["indicadores"].items()},
+        "contagens": {nome: -serie for nome, serie in parcial["contagens"].items()},
+        "top_5": {
+            nome: ResumoFrequentes(
+                -resumo.contagens,
+                resumo.capacidade,
+                resumo.rotulos,
+                erro=resumo.erro,
+                total=-resumo.total,
+            )
+            for nome, resumo in parcial["top_5"].items()
+        },
+        "estados": -parcial["estados"],
+        "cubo_assuntos": parcial["cubo_assuntos"].assign(
+            Total=-parcial["cubo_assuntos"]["Total"]
+        ),
+        "movimentacao": {
+            nome: -serie for nome, serie in parcial["movimentacao"].items()
+        },
+        "assuntos_com_titulo": -parcial["assuntos_com_titulo"],
+        "datas_distribuicao": -parcial["datas_distribuicao"],
+        "datas_arquivamento": -parcial["datas_arquivamento"],
+        "falhas_distribuicao": -parcial["falhas_distribuicao"],
+        "falhas_arquivamento": -parcial["falhas_arquivamento"],
+    }
+
+
+def sem_zeros(parcial):
+    # Depois de uma subtração, categorias que ficaram sem processos somem do
+    # estado, como se nunca tivessem aparecido
+    for resumo in parcial["top_5"].values():
+        resumo.contagens = resumo.contagens[resumo.contagens != 0]
+        if resumo.rotulos is not None:
+            resumo.rotulos = resumo.rotulos[
+                resumo.rotulos.index.isin(resumo.contagens.index)
+            ]
+    estados = parcial["estados"]
+    cubo = parcial["cubo_assuntos"]
+    return {
+        **parcial,
+        "contagens": {
+            nome: serie[serie != 0] for nome, serie in parcial["contagens"].items()
+        },
+        "estados": estados[estados["quantidade"] != 0],
+        "cubo_assuntos": cubo[cubo["Total"] != 0].reset_index(drop=True),
+        "movimentacao": {
+            nome: serie[serie != 0] for nome, serie in parcial["movimentacao"].items()
+        },
+    }
+
+
+def painel_do_parcial(parcial, cnpj=CNPJ_PADRAO):
+    # Mesmo formato de motor.calcular_painel
+    painel = {
+        "versao": VERSAO_DOCUMENTO,
+        "cnpj": cnpj,
+        "indicadores": parcial["indicadores"],
+    }
+    for nome, rotulo in _CONTAGENS.items():
+        painel[nome] = tabela_contagem(parcial["contagens"][nome], rotulo)
+    top_5 = parcial["top_5"]
+    for nome in _TOP_5_PARTES:
+        painel[nome] = cinco_primeiros(tabela_contagem(top_5[nome].contagens, "Parte"))
+    for nome in _TOP_5_ADVOGADOS:
+        painel[nome] = cinco_primeiros(
+            tabela_advogados(top_5[nome].contagens, top_5[nome].rotulos)
+        )
+    erros = erros_top_5(top_5)
+    if erros:
+        painel["erros_top_5"] = erros
+    painel["estados"] = completar_estados(parcial["estados"])
+    painel["avisos"] = {
+        "distribuicao_invalida": parcial["datas_distribuicao"] == 0,
+        "falhas_distribuicao": parcial["falhas_distribuicao"],
+        "arquivamento_ausente": parcial["datas_arquivamento"] == 0,
+        "falhas_arquivamento": parcial["falhas_arquivamento"],
+    }
+    painel["cubos_periodo"] = {
+        "assuntos": parcial["cubo_assuntos"],
+        "movimentacao": parcial["movimentacao"],
+    }
+    return painel
+
+
+# ========================== Execução ==========================
+def calcular_painel_paralelo(
+    caminho,
+    cnpj=CNPJ_PADRAO,
+    trabalhadores=None,
+    tamanho_lote=TAMANHO_LOTE,
+    tamanho_bloco=TAMANHO_BLOCO,
+    modo_ranking=MODO_RANKING,
+):
+    # A leitura continua em série; normalização e agregação de cada lote vão
+    # para o pool. No máximo dois lotes por trabalhador ficam em memória. As
+    # chaves repetidas saem aqui, antes do pool, como na carga completa.
+    trabalhadores = trabalhadores or os.cpu_count() or 1
+    lotes = descartar_repetidos(
+        iterar_lotes_brutos(caminho, tamanho_lote, tamanho_bloco)
+    )
+    if trabalhadores == 1:
+        parciais = [agregar_lote(lote, cnpj, modo_ranking) for lote in lotes]
+    else:
+        parciais = []
+        pendentes = deque()
+        with ProcessPoolExecutor(max_workers=trabalhadores) as executor:
+            for lote in lotes:
+                pendentes.append(
+                    executor.submit(agregar_lote, lote, cnpj, modo_ranking)
+                )
+                if len(pendentes) >= 2 * trabalhadores:
+                    parciais.append(pendentes.popleft().result())
+            parciais.extend(futuro.result() for futuro in pendentes)
+    if not parciais:
+        parciais = [agregar_lote([], cnpj, modo_ranking)]
+    return painel_do_parcial(combinar_parciais(parciais), cnpj)
+
+
+def diferencas(documento, referencia, caminho="painel"):
+    # Contagens devem ser idênticas; somas de ponto flutuante dependem da ordem
+    # das parcelas e são comparadas com tolerância relativa de 1e-9
+    if isinstance(referencia, dict) and isinstance(documento, dict):
+        if set(documento) != set(referencia):
+            return [f"{caminho}: chaves {sorted(set(documento) ^ set(referencia))}"]
+        return [
+            diferenca
+            for chave in referencia
+            for diferenca in diferencas(
+                documento[chave], referencia[chave], f"{caminho}.{chave}"
+            )
+        ]
+    if isinstance(referencia, list) and isinstance(documento, list):
+        if len(documento) != len(referencia):
+            return [f"{caminho}: {len(documento)} != {len(referencia)} itens"]
+        return [
+            diferenca
+            for posicao, (valor, esperado) in enumerate(zip(documento, referencia))
+            for diferenca in diferencas(valor, esperado, f"{caminho}[{posicao}]")
+        ]
+    if isinstance(referencia, float) and isinstance(documento, (int, float)):
+        if math.isclose(documento, referencia, rel_tol=1e-9, abs_tol=1e-6):
+            return []
+    elif documento == referencia:
+        return []
+    return [f"{caminho}: {documento!r} != {referencia!r}"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Calcula o painel em lotes paralelos e mede o tempo"
+    )
+    parser.add_argument("caminho", help="arquivo dados_empresa.json")
+    parser.add_argument("--cnpj", default=CNPJ_PADRAO)
+    parser.add_argument(
+        "--trabalhadores", type=int, nargs="+", default=[os.cpu_count() or 1]
+    )
+    parser.add_argument("--tamanho-lote", type=int, default=TAMANHO_LOTE)
+    parser.add_argument(
+        "--ranking",
+        choices=list(CAPACIDADES),
+        default=MODO_RANKING,
+        help="Top 5 exato ou aproximado; --verificar compara sempre com o exato",
+    )
+    parser.add_argument(
+        "--verificar",
+        action="store_true",
+        help="compara com o cálculo em série de motor.calcular_painel",
+    )
+    args = parser.parse_args(argv)
+
+    referencia = None
+    if args.verificar:
+        inicio = time.perf_counter()
+        referencia = calcular_painel(
+            carregar_tabelas(args.caminho), args.cnpj, modo_ranking="exato"
+        )
+        print(f"em série: {time.perf_counter() - inicio:.3f}s")
+        referencia = serializar_painel(referencia)
+
+    falhou = False
+    for trabalhadores in args.trabalhadores:
+        inicio = time.perf_counter()
+        painel = calcular_painel_paralelo(
+            args.caminho,
+            args.cnpj,
+            trabalhadores,
+            args.tamanho_lote,
+            modo_ranking=args.ranking,
+        )
+        print(f"{trabalhadores} trabalhador(es): {time.perf_counter() - inicio:.3f}s")
+        if referencia is not None:
+            for diferenca in diferencas(serializar_painel(painel), referencia)[:20]:
+                falhou = True
+                print(f"  DIFERENTE {diferenca}")
+    if falhou:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
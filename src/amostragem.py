@@ -0,0 +1,160 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from indices import normalizar_documento
+from modelo import CHAVE
+
+# Indicadores aproximados para a primeira pintura em bases muito grandes: os
+# cards de processos, valor das causas e valor das execuções por polo saem de
+# uma amostra aleatória uniforme de processos, pós-estratificada por tribunal,
+# com intervalo de 95% de confiança. Totais estimados por expansão dentro de
+# cada estrato:
+#   total = soma(N_h * média_h),  var = soma(N_h² (1 - n_h/N_h) s²_h / n_h)
+# O cálculo exato roda em segundo plano e substitui as estimativas na página
+# quando termina. As distribuições não são estimadas: com as colunas
+# categóricas (esquema.py) a contagem exata custa menos que a amostragem.
+#
+# PROTOTIPO_INDICADORES=aproximado liga o modo; PROTOTIPO_AMOSTRA define o
+# tamanho da amostra. Com a base menor que a amostra, o resultado é exato.
+MODO_INDICADORES = os.environ.get("PROTOTIPO_INDICADORES", "exato")
+TAMANHO_AMOSTRA = int(os.environ.get("PROTOTIPO_AMOSTRA", "5000"))
+COLUNA_ESTRATO = "tribunal"
+NIVEL_CONFIANCA = "95%"
+Z_CONFIANCA = 1.96
+
+# Variáveis por processo de cada indicador: (valor, polo exigido)
+_INDICADORES = {
+    "qtd_polo_ativo": (None, "ATIVO"),
+    "qtd_polo_passivo": (None, "PASSIVO"),
+    "valor_total": ("valorCausa.valor", None),
+    "valor_ativo": ("valorCausa.valor", "ATIVO"),
+    "valor_passivo": ("valorCausa.valor", "PASSIVO"),
+    "valor_execucao": ("statusPredictus.valorExecucao.valor", None),
+    "valor_execucao_ativo": ("statusPredictus.valorExecucao.valor", "ATIVO"),
+    "valor_execucao_passivo": ("statusPredictus.valorExecucao.valor", "PASSIVO"),
+}
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="exatos")
+
+
+class Amostra:
+    def __init__(self, processos, tamanho=TAMANHO_AMOSTRA, semente=0):
+        # Sorteio uniforme sem reposição; depois, pós-estratificação por
+        # tribunal quando todos os tribunais têm ao menos 2 sorteados (para
+        # estimar a variância de cada estrato). Só os códigos do estrato passam
+        # pela base inteira.
+        total = len(processos)
+        self.total = total
+        self.posicoes = np.sort(
+            np.random.default_rng(semente).choice(
+                total, size=min(tamanho, total), replace=False
+            )
+        )
+        self.estratos = np.zeros(len(self.posicoes), dtype=np.int64)
+        self.populacao = np.array([total])
+        if COLUNA_ESTRATO not in processos.columns:
+            return
+        coluna = processos[COLUNA_ESTRATO]
+        if isinstance(coluna.dtype, pd.CategoricalDtype):
+            codigos = coluna.cat.codes.to_numpy().astype(np.int64)
+        else:
+            codigos, _ = pd.factorize(coluna)
+        # Processos sem tribunal formam um estrato próprio
+        codigos = np.where(codigos < 0, codigos.max(initial=-1) + 1, codigos)
+        populacao = np.bincount(codigos)
+        estratos = codigos[self.posicoes]
+        sorteados = np.bincount(estratos, minlength=len(populacao))
+        if (sorteados[populacao > 0] >= 2).all():
+            self.estratos = estratos
+            self.populacao = populacao
+
+    def __len__(self):
+        return len(self.posicoes)
+
+    def estimar(self, variaveis):
+        # variaveis: DataFrame com uma linha por processo sorteado; devolve o
+        # total estimado e a meia largura do intervalo de cada coluna
+        if variaveis.empty:
+            zeros = pd.Series(0.0, index=variaveis.columns)
+            return zeros, zeros
+        grupos = variaveis.groupby(self.estratos)
+        medias = grupos.mean()
+        variancias = grupos.var(ddof=1).fillna(0.0)
+        populacao = self.populacao[medias.index]
+        sorteados = grupos.size().to_numpy()
+        totais = medias.mul(populacao, axis=0).sum()
+        fator = populacao**2 * (1 - sorteados / populacao) / sorteados
+        erros = Z_CONFIANCA * np.sqrt(variancias.mul(fator, axis=0).sum())
+        return totais, erros
+
+
+def _sorteados(processos, amostra, colunas):
+    # Só as colunas usadas, nas linhas sorteadas
+    colunas = [coluna for coluna in colunas if coluna in processos.columns]
+    return processos.iloc[amostra.posicoes, processos.columns.get_indexer(colunas)]
+
+
+def _no_polo(partes, chaves, cnpj):
+    # Para cada processo sorteado, se o CNPJ aparece no polo ativo/passivo;
+    # só as partes dos sorteados passam pela normalização do documento
+    no_polo = {polo: np.zeros(len(chaves), dtype=bool) for polo in ("ATIVO", "PASSIVO")}
+    if "cnpj" not in partes.columns:
+        return no_polo
+    vinculadas = partes[CHAVE].notna() & partes[CHAVE].isin(chaves)
+    partes = partes.loc[vinculadas, [CHAVE, "cnpj", "polo"]]
+    documentos = partes["cnpj"].astype("string").str.replace(r"\D", "", regex=True)
+    # Mesma normalização de indices.posicoes_polo: "90.400.888/0001-42" também vale
+    cnpj = normalizar_documento(cnpj)
+    # Marca pelas chaves, não por posição: uma chave repetida entre os sorteados
+    # marca todas as suas linhas
+    for polo in no_polo:
+        da_empresa = (documentos == cnpj) & (partes["polo"] == polo)
+        chaves_polo = partes.loc[da_empresa.to_numpy(dtype=bool, na_value=False), CHAVE]
+        no_polo[polo] = pd.Index(chaves).isin(chaves_polo)
+    return no_polo
+
+
+def estimar_indicadores(tabelas, amostra, cnpj):
+    processos = _sorteados(
+        tabelas["processos"],
+        amostra,
+        [CHAVE, *{coluna for coluna, _ in _INDICADORES.values() if coluna}],
+    )
+    no_polo = _no_polo(tabelas["partes"], processos[CHAVE].to_numpy(), cnpj)
+    variaveis = {}
+    for nome, (coluna, polo) in _INDICADORES.items():
+        valor = (
+            np.ones(len(processos))
+            if coluna is None
+            else pd.to_numeric(processos[coluna], errors="coerce")
+            .fillna(0.0)
+            .to_numpy(dtype=float)
+        )
+        variaveis[nome] = valor * no_polo[polo] if polo is not None else valor
+    totais, erros = amostra.estimar(pd.DataFrame(variaveis))
+    indicadores = {"total_processos": amostra.total}
+    intervalos = {}
+    for nome in _INDICADORES:
+        estimativa = float(totais[nome])
+        if nome.startswith("qtd_"):
+            estimativa = round(estimativa)
+        indicadores[nome] = estimativa
+        intervalos[nome] = (
+            max(0.0, float(totais[nome] - erros[nome])),
+            float(totais[nome] + erros[nome]),
+        )
+    return {"indicadores": indicadores, "intervalos": intervalos}
+
+
+def estimar_secao_indicadores(tabelas, cnpj, tamanho=TAMANHO_AMOSTRA, semente=0):
+    amostra = Amostra(tabelas["processos"], tamanho, semente)
+    return {**estimar_indicadores(tabelas, amostra, cnpj), "amostra": len(amostra)}
+
+
+def em_segundo_plano(funcao, *args):
+    # Future do cálculo exato; um trabalhador só, para não disputar a CPU com
+    # as execuções da página além do necessário
+    return _executor.submit(funcao, *args)
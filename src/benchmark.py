@@ -0,0 +1,198 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from carregamento import iterar_processos
+from gerador_dados import GeradorProcessos
+from indices import indexar_polos
+from modelo import carregar_tabelas
+from motor import (
+    CNPJ_PADRAO,
+    calcular_distribuicoes,
+    calcular_estados,
+    calcular_indicadores,
+    calcular_rankings,
+)
+from periodos import (
+    anos_com_dados,
+    calcular_periodos,
+    fatiar_assuntos,
+    fatiar_movimentacao,
+    meses_com_dados,
+    montar_cubos,
+)
+
+# Mede tempo e pico de memória de cada etapa do painel sobre dados sintéticos
+# em várias escalas. O resultado é um JSON que pode ser comparado com uma
+# execução anterior (--comparar) para detectar regressões.
+ESCALAS = (1_000, 100_000, 1_000_000)
+DIRETORIO_DADOS = os.path.join(".cache", "benchmark")
+
+
+def _medir(funcao, repeticoes, memoria):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    medida = {
+        "segundos": min(tempos),
+        "segundos_mediana": statistics.median(tempos),
+        "repeticoes": repeticoes,
+    }
+    if memoria:
+        # Execução separada: o tracemalloc distorce o tempo
+        tracemalloc.start()
+        funcao()
+        medida["pico_memoria_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return resultado, medida
+
+
+def _analisar_periodos(processos, assuntos):
+    periodos, _ = calcular_periodos(processos)
+    cubos = montar_cubos(periodos, assuntos)
+    # Todas as combinações que os seletores da página permitem
+    for ano in [None, *anos_com_dados(cubos)]:
+        for mes in [None, *meses_com_dados(cubos, ano)]:
+            fatiar_assuntos(cubos, ano, mes)
+            fatiar_movimentacao(cubos, ano, mes)
+    return cubos
+
+
+def medir_arquivo(caminho, cnpj=CNPJ_PADRAO, repeticoes=3, memoria=True):
+    etapas = {}
+
+    def etapa(nome, funcao, repeticoes=repeticoes):
+        resultado, etapas[nome] = _medir(funcao, repeticoes, memoria)
+        return resultado
+
+    # Leitura e normalização são as etapas mais caras: uma repetição basta
+    etapa("leitura", lambda: sum(1 for _ in iterar_processos(caminho)), 1)
+    tabelas = etapa("normalizacao", lambda: carregar_tabelas(caminho), 1)
+    processos = tabelas["processos"]
+
+    def indicadores():
+        indice = indexar_polos(tabelas["partes"], processos)
+        return calcular_indicadores(processos, indice, cnpj)
+
+    etapa("indicadores", indicadores)
+    etapa("distribuicoes", lambda: calcular_distribuicoes(tabelas))
+    etapa("rankings", lambda: calcular_rankings(tabelas))
+    etapa("mapa", lambda: calcular_estados(processos))
+    etapa("periodos", lambda: _analisar_periodos(processos, tabelas["assuntos"]))
+
+    return {
+        "processos": len(processos),
+        "tamanho_arquivo_bytes": os.path.getsize(caminho),
+        "linhas": {nome: len(tabela) for nome, tabela in tabelas.items()},
+        "memoria_tabelas_bytes": {
+            nome: int(tabela.memory_usage(deep=True).sum())
+            for nome, tabela in tabelas.items()
+        },
+        "etapas": etapas,
+    }
+
+
+def arquivo_sintetico(processos, diretorio=DIRETORIO_DADOS, semente=42):
+    # Reaproveita o arquivo gerado em execuções anteriores
+    caminho = os.path.join(diretorio, f"processos_{processos}_{semente}.json")
+    if not os.path.exists(caminho):
+        os.makedirs(diretorio, exist_ok=True)
+        temporario = f"{caminho}.tmp"
+        GeradorProcessos(semente=semente).gravar(temporario, processos)
+        os.replace(temporario, caminho)
+    return caminho
+
+
+def comparar(atual, anterior, tolerancia):
+    # Lista as etapas que ficaram mais lentas que a tolerância permite
+    regressoes = []
+    anteriores = {
+        resultado["processos"]: resultado["etapas"]
+        for resultado in anterior["resultados"]
+    }
+    for resultado in atual["resultados"]:
+        base = anteriores.get(resultado["processos"], {})
+        for nome, medida in resultado["etapas"].items():
+            if nome not in base:
+                continue
+            antes = base[nome]["segundos"]
+            depois = medida["segundos"]
+            if antes > 0 and depois > antes * (1 + tolerancia):
+                regressoes.append((resultado["processos"], nome, antes, depois))
+    return regressoes
+
+
+def _imprimir(resultado):
+    print(f"\n{resultado['processos']:,} processos".replace(",", "."))
+    for nome, medida in resultado["etapas"].items():
+        memoria = medida.get("pico_memoria_bytes")
+        memoria = f"{memoria / 2**20:10.1f} MiB" if memoria is not None else ""
+        print(f"  {nome:<15}{medida['segundos']:10.4f}s{memoria}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark das etapas do painel")
+    parser.add_argument(
+        "--escalas", type=int, nargs="+", default=list(ESCALAS), metavar="N"
+    )
+    parser.add_argument("--arquivo", help="usa um arquivo existente em vez do gerador")
+    parser.add_argument("--cnpj", default=CNPJ_PADRAO)
+    parser.add_argument("--diretorio", default=DIRETORIO_DADOS)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--sem-memoria", action="store_true")
+    parser.add_argument("--saida", help="grava o resultado em JSON")
+    parser.add_argument("--comparar", help="resultado anterior para comparação")
+    parser.add_argument("--tolerancia", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    arquivos = (
+        [args.arquivo]
+        if args.arquivo
+        else [arquivo_sintetico(n, args.diretorio) for n in args.escalas]
+    )
+    relatorio = {
+        "ambiente": {
+            "data": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "resultados": [],
+    }
+    for caminho in arquivos:
+        resultado = medir_arquivo(
+            caminho, args.cnpj, args.repeticoes, memoria=not args.sem_memoria
+        )
+        relatorio["resultados"].append(resultado)
+        _imprimir(resultado)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(relatorio, arquivo, indent=2)
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as arquivo:
+            anterior = json.load(arquivo)
+        regressoes = comparar(relatorio, anterior, args.tolerancia)
+        for processos, nome, antes, depois in regressoes:
+            print(
+                f"REGRESSÃO {nome} ({processos} processos): "
+                f"{antes:.4f}s -> {depois:.4f}s"
+            )
+        if regressoes:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
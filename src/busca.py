@@ -0,0 +1,167 @@
+import bisect
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from indices import normalizar_documento, posicoes_por_chave
+from modelo import CHAVE, identidade_oab
+
+# Índice invertido de partes e advogados, montado uma vez por versão dos dados.
+# Cada entidade (parte pelo nome normalizado, documento CNPJ/CPF, advogado pela
+# OAB) aponta para as posições dos seus processos na tabela de processos; os
+# termos de busca ficam numa lista ordenada, então uma busca por prefixo é uma
+# bisseção, sem varrer as tabelas de partes e advogados.
+TIPOS = {"parte": "Parte", "documento": "Documento", "advogado": "Advogado"}
+
+_NAO_ALFANUMERICO = re.compile(r"[^0-9A-Z]+")
+_SO_DOCUMENTO = re.compile(r"[\d.\-/\s]+")
+
+
+def normalizar_texto(texto):
+    # "José  da Silva-ME" -> "JOSE DA SILVA ME"
+    if not isinstance(texto, str):
+        return ""
+    sem_acentos = (
+        unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    )
+    return " ".join(_NAO_ALFANUMERICO.sub(" ", sem_acentos.upper()).split())
+
+
+def _normalizar_serie(serie, funcao):
+    # Aplica a função só aos valores distintos (nomes se repetem muito)
+    codigos, distintos = pd.factorize(serie)
+    normalizados = np.array([funcao(valor) for valor in distintos] + [None])
+    return normalizados[codigos]
+
+
+def _entidades(tipo, chaves, rotulos, identificadores, posicoes):
+    quadro = pd.DataFrame(
+        {
+            "chave": chaves,
+            "rotulo": np.asarray(rotulos, dtype=object),
+            "identificador": np.asarray(identificadores, dtype=object),
+            "posicao": posicoes,
+        }
+    )
+    quadro = quadro[quadro["chave"].notna() & (quadro["posicao"] >= 0)]
+    quadro = quadro[quadro["chave"] != ""]
+    quadro["chave"] = tipo + ":" + quadro["chave"].astype(str)
+    return quadro
+
+
+class IndiceBusca:
+    def __init__(self, partes, advogados, processos):
+        quadros = []
+
+        posicoes = posicoes_por_chave(processos[CHAVE], partes[CHAVE])
+        nomes = _normalizar_serie(partes["nome"], normalizar_texto)
+        quadros.append(_entidades("parte", nomes, partes["nome"], None, posicoes))
+        for coluna in ("cnpj", "cpf"):
+            if coluna in partes.columns:
+                documentos = _normalizar_serie(partes[coluna], normalizar_documento)
+                quadros.append(
+                    _entidades(
+                        "documento", documentos, partes["nome"], documentos, posicoes
+                    )
+                )
+
+        posicoes = posicoes_por_chave(processos[CHAVE], advogados[CHAVE])
+        oab = identidade_oab(advogados).to_numpy(dtype=object, na_value=None)
+        sem_oab = pd.isna(oab)
+        # Advogados sem inscrição informada ficam identificados pelo nome
+        nomes = _normalizar_serie(advogados["nome"], normalizar_texto)
+        chaves = oab.copy()
+        chaves[sem_oab] = [f"nome {nome}" if nome else None for nome in nomes[sem_oab]]
+        quadros.append(_entidades("advogado", chaves, advogados["nome"], oab, posicoes))
+
+        quadro = pd.concat(quadros, ignore_index=True)
+        # Rótulo e identificador da primeira aparição; posições sem repetição
+        primeiros = quadro.drop_duplicates("chave").set_index("chave")
+        quadro = quadro.drop_duplicates(["chave", "posicao"]).sort_values(
+            ["chave", "posicao"], kind="stable"
+        )
+        self.chaves, inicios = np.unique(quadro["chave"].to_numpy(), return_index=True)
+        self.inicios = np.append(inicios, len(quadro))
+        self.posicoes = quadro["posicao"].to_numpy(dtype=np.int64)
+        self.rotulos = primeiros.loc[self.chaves, "rotulo"].to_numpy()
+        self.identificadores = primeiros.loc[self.chaves, "identificador"].to_numpy()
+        self.tipos = np.array([chave.split(":", 1)[0] for chave in self.chaves])
+        self.quantidades = np.diff(self.inicios)
+
+        # Termos: palavras do rótulo normalizado e o identificador (documento/OAB)
+        termos = pd.Series(
+            [
+                f"{normalizar_texto(rotulo)} {normalizar_texto(identificador)}"
+                for rotulo, identificador in zip(self.rotulos, self.identificadores)
+            ]
+        ).str.split()
+        termos = termos.explode().dropna()
+        termos = pd.DataFrame(
+            {"termo": termos.to_numpy(), "entidade": termos.index.to_numpy()}
+        ).drop_duplicates()
+        termos = termos.sort_values(["termo", "entidade"], kind="stable")
+        self.termos = termos["termo"].tolist()
+        self.termo_entidade = termos["entidade"].to_numpy(dtype=np.int64)
+
+    def __len__(self):
+        return len(self.chaves)
+
+    def _com_prefixo(self, prefixo):
+        inicio = bisect.bisect_left(self.termos, prefixo)
+        fim = bisect.bisect_left(self.termos, prefixo + "\uffff")
+        return set(self.termo_entidade[inicio:fim].tolist())
+
+    def buscar(self, texto, limite=20):
+        # Todas as palavras da consulta precisam casar com o início de algum
+        # termo da entidade; documentos podem vir formatados ("90.400.888/0001-42")
+        texto = (texto or "").strip()
+        if not texto:
+            return self._resultado([])
+        if _SO_DOCUMENTO.fullmatch(texto):
+            palavras = [normalizar_documento(texto) or ""]
+        else:
+            palavras = normalizar_texto(texto).split()
+        entidades = None
+        for palavra in palavras:
+            encontradas = self._com_prefixo(palavra)
+            entidades = encontradas if entidades is None else entidades & encontradas
+            if not entidades:
+                break
+        entidades = sorted(
+            entidades or [], key=lambda entidade: -self.quantidades[entidade]
+        )
+        return self._resultado(entidades[:limite])
+
+    def _resultado(self, entidades):
+        entidades = np.asarray(entidades, dtype=np.int64)
+        return pd.DataFrame(
+            {
+                "Tipo": [TIPOS[tipo] for tipo in self.tipos[entidades]],
+                "Nome": self.rotulos[entidades],
+                "Identificador": self.identificadores[entidades],
+                "Processos": self.quantidades[entidades],
+            },
+            index=pd.Index(entidades, name="entidade"),
+        )
+
+    def localizar(self, tipo, valor):
+        # Entidade de um nome de parte (tipo "parte") ou de uma OAB ("advogado")
+        if tipo == "parte":
+            valor = normalizar_texto(valor)
+        chave = f"{tipo}:{valor}"
+        posicao = np.searchsorted(self.chaves, chave)
+        if posicao < len(self.chaves) and self.chaves[posicao] == chave:
+            return int(posicao)
+        return None
+
+    def posicoes_da_entidade(self, entidade):
+        return self.posicoes[self.inicios[entidade] : self.inicios[entidade + 1]]
+
+    def processos_da_entidade(self, entidade, processos):
+        return processos.iloc[self.posicoes_da_entidade(entidade)]
+
+
+def indexar_busca(tabelas):
+    return IndiceBusca(tabelas["partes"], tabelas["advogados"], tabelas["processos"])
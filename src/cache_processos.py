@@ -0,0 +1,177 @@
+import argparse
+import hashlib
+import os
+import shutil
+import time
+
+import pandas as pd
+
+from modelo import carregar_tabelas
+
+# Cache em disco (Parquet) das tabelas derivadas do JSON. Cada entrada é uma
+# pasta "<fonte>-<versao>" com um arquivo .parquet por tabela; a versão muda
+# sempre que o tamanho ou a data de modificação do arquivo de origem mudam, ou
+# quando VERSAO_FORMATO é incrementada por mudanças no formato das tabelas.
+VERSAO_FORMATO = 6
+DIRETORIO_CACHE = os.environ.get("PROTOTIPO_CACHE_DIR", ".cache/processos")
+LIMITE_CACHE_BYTES = (
+    int(os.environ.get("PROTOTIPO_CACHE_LIMITE_MB", "2048")) * 1024 * 1024
+)
+
+
+def _hash(texto):
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()[:16]
+
+
+def chave_fonte(caminho):
+    return _hash(os.path.abspath(caminho))
+
+
+def chave_cache(caminho):
+    info = os.stat(caminho)
+    versao = _hash(f"{VERSAO_FORMATO}|{info.st_size}|{info.st_mtime_ns}")
+    return f"{chave_fonte(caminho)}-{versao}"
+
+
+def _tamanho_entrada(pasta):
+    return sum(
+        entrada.stat().st_size for entrada in os.scandir(pasta) if entrada.is_file()
+    )
+
+
+def _entradas(diretorio):
+    if not os.path.isdir(diretorio):
+        return []
+    return [
+        entrada
+        for entrada in os.scandir(diretorio)
+        if entrada.is_dir() and not entrada.name.startswith(".")
+    ]
+
+
+def _ler_entrada(pasta):
+    tabelas = {}
+    for arquivo in sorted(os.listdir(pasta)):
+        if arquivo.endswith(".parquet"):
+            tabelas[arquivo[: -len(".parquet")]] = pd.read_parquet(
+                os.path.join(pasta, arquivo)
+            )
+    return tabelas
+
+
+def _gravar_entrada(pasta, tabelas):
+    # Grava numa pasta temporária e renomeia, para que leitores concorrentes
+    # nunca vejam uma entrada incompleta
+    temporaria = f"{pasta}.tmp-{os.getpid()}"
+    os.makedirs(temporaria, exist_ok=True)
+    try:
+        for nome, tabela in tabelas.items():
+            tabela.to_parquet(os.path.join(temporaria, f"{nome}.parquet"), index=False)
+        os.replace(temporaria, pasta)
+    except OSError:
+        # Outro processo gravou a mesma entrada primeiro
+        shutil.rmtree(temporaria, ignore_errors=True)
+        if not os.path.isdir(pasta):
+            raise
+    except (ValueError, TypeError):
+        # Estruturas aninhadas que o Parquet não consegue representar: segue sem cache
+        shutil.rmtree(temporaria, ignore_errors=True)
+        return False
+    return True
+
+
+def aplicar_limite(diretorio=DIRETORIO_CACHE, limite_bytes=LIMITE_CACHE_BYTES):
+    # Remove as entradas usadas há mais tempo até caber no limite
+    entradas = sorted(_entradas(diretorio), key=lambda entrada: entrada.stat().st_mtime)
+    tamanhos = {entrada.path: _tamanho_entrada(entrada.path) for entrada in entradas}
+    total = sum(tamanhos.values())
+    removidas = []
+    for entrada in entradas:
+        if total <= limite_bytes:
+            break
+        shutil.rmtree(entrada.path, ignore_errors=True)
+        total -= tamanhos[entrada.path]
+        removidas.append(entrada.name)
+    return removidas
+
+
+def invalidar_cache(caminho=None, diretorio=DIRETORIO_CACHE):
+    # Sem caminho, limpa o cache inteiro; com caminho, só as versões daquele arquivo
+    prefixo = f"{chave_fonte(caminho)}-" if caminho else ""
+    removidas = []
+    for entrada in _entradas(diretorio):
+        if entrada.name.startswith(prefixo):
+            shutil.rmtree(entrada.path, ignore_errors=True)
+            removidas.append(entrada.name)
+    return removidas
+
+
+def carregar_com_cache(
+    caminho,
+    construir=carregar_tabelas,
+    diretorio=DIRETORIO_CACHE,
+    limite_bytes=LIMITE_CACHE_BYTES,
+):
+    # Retorna as tabelas e um resumo com a origem ("cache" ou "json"), o tempo
+    # gasto e a chave da versão dos dados
+    inicio = time.perf_counter()
+    chave = chave_cache(caminho)
+    pasta = os.path.join(diretorio, chave)
+
+    if os.path.isdir(pasta):
+        tabelas = _ler_entrada(pasta)
+        os.utime(pasta)
+        origem = "cache"
+    else:
+        tabelas = construir(caminho)
+        os.makedirs(diretorio, exist_ok=True)
+        # Versões antigas do mesmo arquivo nunca mais serão lidas
+        for entrada in _entradas(diretorio):
+            if entrada.name.startswith(f"{chave_fonte(caminho)}-"):
+                shutil.rmtree(entrada.path, ignore_errors=True)
+        if _gravar_entrada(pasta, tabelas):
+            aplicar_limite(diretorio, limite_bytes)
+        origem = "json"
+
+    info = {
+        "origem": origem,
+        "segundos": time.perf_counter() - inicio,
+        "chave": chave,
+    }
+    return tabelas, info
+
+
+def _medir(args):
+    invalidar_cache(args.caminho, args.diretorio)
+    _, frio = carregar_com_cache(args.caminho, diretorio=args.diretorio)
+    _, quente = carregar_com_cache(args.caminho, diretorio=args.diretorio)
+    print(f"Carga a frio (JSON):    {frio['segundos']:.3f}s")
+    print(f"Carga a quente (cache): {quente['segundos']:.3f}s")
+    if quente["segundos"] > 0:
+        print(f"Ganho: {frio['segundos'] / quente['segundos']:.1f}x")
+
+
+def _invalidar(args):
+    removidas = invalidar_cache(args.caminho, args.diretorio)
+    print(f"{len(removidas)} entrada(s) removida(s) do cache")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cache Parquet dos processos")
+    parser.add_argument("--diretorio", default=DIRETORIO_CACHE)
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    medir = subparsers.add_parser("medir", help="compara carga a frio e a quente")
+    medir.add_argument("caminho")
+    medir.set_defaults(funcao=_medir)
+
+    invalidar = subparsers.add_parser("invalidar", help="remove entradas do cache")
+    invalidar.add_argument("caminho", nargs="?")
+    invalidar.set_defaults(funcao=_invalidar)
+
+    args = parser.parse_args(argv)
+    args.funcao(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,408 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import numpy as np
+import pandas as pd
+
+from geo_brasil import CAMINHO_GEOJSON
+from instrumentacao import memoria_residente
+
+# Teste de carga com sessões simultâneas: um servidor Streamlit real (headless,
+# local) e N sessões simuladas falando com ele pelo mesmo websocket que o
+# navegador usa. O AppTest não serve para isso: cada instância monta um runtime
+# global próprio e duas execuções não podem rodar ao mesmo tempo. Cada sessão
+# abre a página, troca de aba e muda os seletores de período (nesse caso só o
+# fragmento é reexecutado, como no navegador); a latência de uma reexecução vai
+# do envio do pedido até o "script_finished" do servidor.
+#
+# Roda sem rede: o GeoJSON empacotado (src/dados/brasil_estados.geojson, ou o
+# de --geojson) é passado ao servidor por PROTOTIPO_GEOJSON.
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "prototipo_empresa.py")
+RAIZ = os.path.dirname(os.path.dirname(APP))
+ABAS = ("Distribuições", "Mapa por UF", "Rankings", "Análise por Período")
+ABA_PERIODO = "Análise por Período"
+CHAVE_ABAS = "aba_painel"
+SELETORES_PERIODO = ("ano_assuntos", "mes_assuntos", "ano_dist_arq", "mes_dist_arq")
+# Peso de cada ação no sorteio; "carga" abre a página numa sessão nova
+ACOES = {"periodo": 5, "aba": 3, "carga": 2}
+PERCENTIS = (50, 95, 99)
+
+
+def _protocolo():
+    try:
+        import websockets
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+    except ImportError as erro:
+        raise RuntimeError(
+            "O teste de carga precisa do pacote websockets: pip install websockets"
+        ) from erro
+    return websockets, BackMsg, ForwardMsg, WidgetState
+
+
+def _erros_transporte():
+    # Conexão recusada ou caída e tempo esgotado contam como erro da ação;
+    # qualquer outra exceção é defeito do próprio teste e o interrompe
+    websockets = _protocolo()[0]
+    return (
+        asyncio.TimeoutError,
+        OSError,
+        websockets.ConnectionClosed,
+        websockets.InvalidHandshake,
+    )
+
+
+def _chave_widget(identificador):
+    # "$$ID-<hash>-<key>" para widgets criados com key=...
+    partes = identificador.split("-", 2)
+    return partes[2] if len(partes) == 3 and partes[0] == "$$ID" else None
+
+
+class SessaoSimulada:
+    def __init__(self, url, tempo_limite):
+        self.websockets, self.BackMsg, self.ForwardMsg, self.WidgetState = _protocolo()
+        self.url = url
+        self.tempo_limite = tempo_limite
+        self.conexao = None
+
+    async def fechar(self):
+        if self.conexao is not None:
+            await self.conexao.close()
+            self.conexao = None
+
+    async def _enviar(self, mensagem):
+        await self.conexao.send(mensagem.SerializeToString())
+
+    async def executar(self, fragmento=""):
+        # Uma reexecução com o estado atual dos widgets, como o navegador envia
+        mensagem = self.BackMsg()
+        mensagem.rerun_script.query_string = ""
+        mensagem.rerun_script.widget_states.widgets.extend(self.estados.values())
+        if fragmento:
+            mensagem.rerun_script.fragment_id = fragmento
+        erro = None
+        inicio = time.perf_counter()
+        await self._enviar(mensagem)
+        async with asyncio.timeout(self.tempo_limite):
+            while True:
+                recebida = self.ForwardMsg()
+                recebida.ParseFromString(await self.conexao.recv())
+                tipo = recebida.WhichOneof("type")
+                if tipo == "delta":
+                    erro = self._registrar(recebida.delta) or erro
+                elif tipo == "script_finished":
+                    break
+        return time.perf_counter() - inicio, erro
+
+    def _registrar(self, delta):
+        # Guarda os ids dos widgets usados pelas ações; exceções da página
+        # contam como erro da reexecução
+        tipo = delta.WhichOneof("type")
+        if tipo == "add_block" and delta.add_block.WhichOneof("type") == (
+            "tab_container"
+        ):
+            identificador = delta.add_block.tab_container.id
+            self.widgets[_chave_widget(identificador)] = (identificador, "", ABAS)
+        elif tipo == "new_element":
+            elemento = delta.new_element
+            if elemento.WhichOneof("type") == "exception":
+                return elemento.exception.message
+            if elemento.WhichOneof("type") == "selectbox":
+                caixa = elemento.selectbox
+                chave = _chave_widget(caixa.id)
+                if chave in SELETORES_PERIODO:
+                    self.widgets[chave] = (
+                        caixa.id,
+                        delta.fragment_id,
+                        list(caixa.options),
+                    )
+        return None
+
+    async def carregar(self, limpar_caches=False):
+        await self.fechar()
+        self.conexao = await self.websockets.connect(
+            self.url, subprotocols=["streamlit"], max_size=None
+        )
+        # chave -> (id, fragmento, opções); id -> WidgetState enviado
+        self.widgets = {}
+        self.estados = {}
+        self.aba = ABAS[0]
+        if limpar_caches:
+            await self.limpar_caches()
+        return await self.executar()
+
+    async def limpar_caches(self):
+        # Esvazia st.cache_data/st.cache_resource do servidor (de todas as sessões)
+        mensagem = self.BackMsg()
+        mensagem.clear_cache = True
+        await self._enviar(mensagem)
+
+    def _escolher(self, chave, valor):
+        identificador = self.widgets[chave][0]
+        self.estados[identificador] = self.WidgetState(
+            id=identificador, string_value=valor
+        )
+        return self.widgets[chave][1]
+
+    async def trocar_aba(self, aba):
+        self._escolher(CHAVE_ABAS, aba)
+        self.aba = aba
+        return await self.executar()
+
+    async def mudar_periodo(self, sorteio):
+        chave = sorteio.choice([c for c in SELETORES_PERIODO if c in self.widgets])
+        fragmento = self._escolher(chave, sorteio.choice(self.widgets[chave][2]))
+        return await self.executar(fragmento)
+
+
+async def _medir(registros, sessao_id, acao, corrotina):
+    inicio = time.perf_counter()
+    try:
+        segundos, erro = await corrotina
+    except _erros_transporte() as excecao:
+        segundos, erro = time.perf_counter() - inicio, repr(excecao)
+    registros.append(
+        {"sessao": sessao_id, "acao": acao, "segundos": segundos, "erro": erro}
+    )
+    return erro is None
+
+
+async def _simular(sessao_id, url, args, registros, atraso):
+    sorteio = random.Random(args.semente + sessao_id)
+    sessao = SessaoSimulada(url, args.tempo_limite)
+    await asyncio.sleep(atraso)
+    try:
+        conectada = await _medir(
+            registros, sessao_id, "carga", sessao.carregar(args.sem_cache)
+        )
+        for _ in range(args.acoes):
+            if args.pausa:
+                await asyncio.sleep(sorteio.expovariate(1 / args.pausa))
+            acao = sorteio.choices(list(ACOES), weights=list(ACOES.values()))[0]
+            if not conectada or acao == "carga":
+                conectada = await _medir(
+                    registros, sessao_id, "carga", sessao.carregar(args.sem_cache)
+                )
+                continue
+            if args.sem_cache:
+                await sessao.limpar_caches()
+            if acao == "aba":
+                aba = sorteio.choice([aba for aba in ABAS if aba != sessao.aba])
+                conectada = await _medir(
+                    registros, sessao_id, "aba", sessao.trocar_aba(aba)
+                )
+                continue
+            if sessao.aba != ABA_PERIODO:
+                conectada = await _medir(
+                    registros, sessao_id, "aba", sessao.trocar_aba(ABA_PERIODO)
+                )
+                if not conectada:
+                    continue
+            conectada = await _medir(
+                registros, sessao_id, "periodo", sessao.mudar_periodo(sorteio)
+            )
+    finally:
+        await sessao.fechar()
+
+
+async def _amostrar_memoria(pid, amostras, intervalo=0.25):
+    while True:
+        amostras.append(memoria_residente(pid))
+        await asyncio.sleep(intervalo)
+
+
+async def _executar_carga(url, pid, args):
+    registros = []
+    memoria = []
+    monitor = asyncio.create_task(_amostrar_memoria(pid, memoria)) if pid else None
+    if args.aquecer:
+        # Uma visita a todas as abas antes de medir, para os caches já estarem
+        # prontos; sem aquecimento a primeira carga paga o cálculo a frio
+        sessao = SessaoSimulada(url, args.tempo_limite)
+        await sessao.carregar()
+        for aba in ABAS[1:]:
+            await sessao.trocar_aba(aba)
+        await sessao.fechar()
+    memoria_inicial = memoria_residente(pid) if pid else 0
+    inicio = time.perf_counter()
+    await asyncio.gather(
+        *(
+            _simular(
+                sessao_id, url, args, registros, args.rampa * sessao_id / args.sessoes
+            )
+            for sessao_id in range(args.sessoes)
+        )
+    )
+    segundos = time.perf_counter() - inicio
+    if monitor is not None:
+        monitor.cancel()
+    return (
+        registros,
+        segundos,
+        {
+            "inicial": memoria_inicial,
+            "pico": max(memoria, default=0),
+            "final": memoria_residente(pid) if pid else 0,
+        },
+    )
+
+
+def resumir_carga(registros, segundos, memoria):
+    quadro = pd.DataFrame(registros, columns=["sessao", "acao", "segundos", "erro"])
+    linhas = []
+    for acao in ["todas", *ACOES]:
+        selecao = quadro if acao == "todas" else quadro[quadro["acao"] == acao]
+        sucesso = selecao[selecao["erro"].isna()]["segundos"].to_numpy() * 1000
+        linha = {"ação": acao, "reexecuções": len(selecao)}
+        linha["erros"] = int(selecao["erro"].notna().sum())
+        for percentil in PERCENTIS:
+            linha[f"p{percentil} (ms)"] = (
+                float(np.percentile(sucesso, percentil)) if len(sucesso) else None
+            )
+        linha["máx (ms)"] = float(sucesso.max()) if len(sucesso) else None
+        linhas.append(linha)
+    return {
+        "segundos": segundos,
+        "vazao": len(quadro) / segundos if segundos else 0.0,
+        "latencias": linhas,
+        "memoria": memoria,
+        "erros": quadro["erro"].dropna().value_counts().head(5).to_dict(),
+    }
+
+
+def _porta_livre():
+    with socket.socket() as conexao:
+        conexao.bind(("127.0.0.1", 0))
+        return conexao.getsockname()[1]
+
+
+def iniciar_servidor(porta, geojson, tempo_limite=120):
+    # Servidor headless a partir da raiz do repositório (a página lê
+    # src/dados_empresa.json por caminho relativo); o resto do ambiente
+    # (PROTOTIPO_*) é repassado como está
+    ambiente = {**os.environ, "PROTOTIPO_GEOJSON": geojson}
+    processo = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "streamlit",
+            "run",
+            APP,
+            "--server.headless=true",
+            "--server.address=127.0.0.1",
+            f"--server.port={porta}",
+            "--server.fileWatcherType=none",
+            "--browser.gatherUsageStats=false",
+        ],
+        cwd=RAIZ,
+        env=ambiente,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    limite = time.monotonic() + tempo_limite
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError(f"O servidor terminou com código {processo.returncode}")
+        try:
+            with urllib.request.urlopen(
+                f"http://127.0.0.1:{porta}/_stcore/health", timeout=1
+            ):
+                return processo
+        except OSError:
+            time.sleep(0.2)
+    processo.terminate()
+    raise RuntimeError("O servidor não respondeu a tempo")
+
+
+def _imprimir(resumo, args):
+    print(
+        f"{args.sessoes} sessões x {args.acoes} ações "
+        f"({'sem cache' if args.sem_cache else 'com cache'}): "
+        f"{resumo['segundos']:.1f}s, {resumo['vazao']:.1f} reexecuções/s"
+    )
+    print(
+        pd.DataFrame(resumo["latencias"]).to_string(
+            index=False, float_format=lambda valor: f"{valor:.0f}"
+        )
+    )
+    memoria = resumo["memoria"]
+    if memoria["pico"]:
+        print(
+            f"RSS do servidor: {memoria['inicial'] / 2**20:.0f} MiB no início, "
+            f"pico de {memoria['pico'] / 2**20:.0f} MiB, "
+            f"{memoria['final'] / 2**20:.0f} MiB no fim"
+        )
+    for erro, quantidade in resumo["erros"].items():
+        print(f"{quantidade}x {erro}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Teste de carga do painel com sessões simultâneas"
+    )
+    parser.add_argument("--sessoes", type=int, default=20)
+    parser.add_argument("--acoes", type=int, default=10, help="ações por sessão")
+    parser.add_argument(
+        "--pausa", type=float, default=0.0, help="pausa média entre ações (s)"
+    )
+    parser.add_argument(
+        "--rampa", type=float, default=0.0, help="segundos até todas as sessões"
+    )
+    parser.add_argument("--tempo-limite", type=float, default=120.0)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument(
+        "--aquecer",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="visita todas as abas antes de medir",
+    )
+    parser.add_argument(
+        "--sem-cache",
+        action="store_true",
+        help="limpa os caches do servidor antes de cada ação",
+    )
+    parser.add_argument("--geojson", default=CAMINHO_GEOJSON)
+    parser.add_argument(
+        "--url", help="servidor já em execução (ws://host:porta/_stcore/stream)"
+    )
+    parser.add_argument("--pid", type=int, help="pid do servidor de --url, para o RSS")
+    parser.add_argument("--saida", help="grava o resumo em JSON")
+    args = parser.parse_args(argv)
+
+    processo = None
+    if args.url:
+        url, pid = args.url, args.pid
+    else:
+        if not os.path.exists(args.geojson):
+            raise SystemExit(
+                f"GeoJSON não encontrado em {args.geojson}; o teste roda sem rede "
+                "e usa o arquivo empacotado em src/dados"
+            )
+        porta = _porta_livre()
+        processo = iniciar_servidor(porta, os.path.abspath(args.geojson))
+        url, pid = f"ws://127.0.0.1:{porta}/_stcore/stream", processo.pid
+    try:
+        registros, segundos, memoria = asyncio.run(_executar_carga(url, pid, args))
+    finally:
+        if processo is not None:
+            processo.terminate()
+            processo.wait()
+
+    resumo = resumir_carga(registros, segundos, memoria)
+    _imprimir(resumo, args)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resumo, arquivo, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import json
+
+import pandas as pd
+
+# Tamanho de cada leitura do arquivo (em caracteres) e quantidade de processos
+# normalizados por vez. Juntos limitam a memória usada durante a ingestão.
+TAMANHO_BLOCO = 1 << 20
+TAMANHO_LOTE = 5_000
+
+_ESPACOS = " \t\n\r"
+
+
+class _LeitorIncremental:
+    # Mantém apenas o trecho ainda não consumido do arquivo em memória
+
+    def __init__(self, arquivo, tamanho_bloco):
+        self.arquivo = arquivo
+        self.tamanho_bloco = tamanho_bloco
+        self.buffer = ""
+        self.pos = 0
+        self.fim = False
+
+    def _ler_mais(self):
+        if self.fim:
+            return False
+        bloco = self.arquivo.read(self.tamanho_bloco)
+        if not bloco:
+            self.fim = True
+            return False
+        self.buffer = self.buffer[self.pos :] + bloco
+        self.pos = 0
+        return True
+
+    def proximo_caractere(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _ESPACOS:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._ler_mais():
+                raise ValueError("Fim inesperado do arquivo JSON")
+
+    def consumir(self, esperado):
+        caractere = self.proximo_caractere()
+        if caractere not in esperado:
+            raise ValueError(
+                f"JSON inválido: esperado {esperado!r}, encontrado {caractere!r}"
+            )
+        self.pos += 1
+        return caractere
+
+    def decodificar(self, decoder):
+        self.proximo_caractere()
+        while True:
+            try:
+                valor, self.pos = decoder.raw_decode(self.buffer, self.pos)
+                return valor
+            except json.JSONDecodeError:
+                # O valor pode estar cortado no fim do bloco atual
+                if not self._ler_mais():
+                    raise
+
+
+def ler_primeira_chave(caminho, tamanho_bloco=1 << 16):
+    # CNPJ do arquivo (a chave que contém o array de processos), sem ler o resto
+    with open(caminho, "r", encoding="utf-8") as arquivo:
+        leitor = _LeitorIncremental(arquivo, tamanho_bloco)
+        leitor.consumir("{")
+        if leitor.proximo_caractere() == "}":
+            return None
+        return leitor.decodificar(json.JSONDecoder())
+
+
+def iterar_processos(caminho, tamanho_bloco=TAMANHO_BLOCO):
+    # Percorre o array sob a primeira chave do JSON sem carregar o arquivo inteiro
+    decoder = json.JSONDecoder()
+    with open(caminho, "r", encoding="utf-8") as arquivo:
+        leitor = _LeitorIncremental(arquivo, tamanho_bloco)
+        leitor.consumir("{")
+        if leitor.proximo_caractere() == "}":
+            return
+        leitor.decodificar(decoder)
+        leitor.consumir(":")
+        leitor.consumir("[")
+        if leitor.proximo_caractere() == "]":
+            return
+        while True:
+            yield leitor.decodificar(decoder)
+            if leitor.consumir(",]") == "]":
+                return
+
+
+def iterar_lotes_brutos(
+    caminho, tamanho_lote=TAMANHO_LOTE, tamanho_bloco=TAMANHO_BLOCO
+):
+    lote = []
+    for processo in iterar_processos(caminho, tamanho_bloco):
+        lote.append(processo)
+        if len(lote) == tamanho_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def iterar_lotes(caminho, tamanho_lote=TAMANHO_LOTE, tamanho_bloco=TAMANHO_BLOCO):
+    for lote in iterar_lotes_brutos(caminho, tamanho_lote, tamanho_bloco):
+        yield pd.json_normalize(lote)
+
+
+def carregar_processos(caminho, tamanho_lote=TAMANHO_LOTE, tamanho_bloco=TAMANHO_BLOCO):
+    # Normaliza lote a lote; a árvore de dicionários do arquivo inteiro nunca
+    # fica em memória ao mesmo tempo
+    lotes = list(iterar_lotes(caminho, tamanho_lote, tamanho_bloco))
+    if not lotes:
+        return pd.DataFrame()
+    return pd.concat(lotes, ignore_index=True)
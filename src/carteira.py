@@ -0,0 +1,204 @@
+import argparse
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from agregacao_paralela import agregar_tabelas, combinar_parciais, painel_do_parcial
+from cache_processos import chave_cache
+from carregamento import ler_primeira_chave
+from indices import normalizar_documento
+from motor import VERSAO_DOCUMENTO, desserializar_painel, serializar_painel
+from snapshot import abrir_snapshot
+
+# Modo carteira: uma pasta com um arquivo no formato de dados_empresa.json por
+# empresa monitorada. Cada arquivo vira um estado parcial (agregacao_paralela.py)
+# calculado em paralelo; os painéis por empresa e o total da carteira saem da
+# combinação desses parciais, então trocar de empresa na página é só uma busca
+# no dicionário já calculado.
+#
+# O pool de processos só roda no aquecimento, fora do servidor:
+#   python src/carteira.py <pasta>
+# grava a carteira pronta (painéis em JSON, motor.serializar_painel) com a
+# impressão digital das versões dos arquivos no nome. A página só lê esse
+# arquivo; sem ele, calcula a carteira em série no próprio processo, porque
+# fork dentro do servidor (com threads) pode travar e, com spawn, os filhos
+# reexecutariam a página como script principal.
+DIRETORIO_CARTEIRA = os.environ.get("PROTOTIPO_CARTEIRA", "")
+DIRETORIO_CARTEIRA_PRONTA = os.environ.get(
+    "PROTOTIPO_CARTEIRA_PRONTA", ".cache/carteira"
+)
+VERSAO_CARTEIRA = 1
+
+
+def listar_arquivos(diretorio=DIRETORIO_CARTEIRA):
+    return sorted(glob.glob(os.path.join(diretorio, "*.json")))
+
+
+def _parcial_da_empresa(caminho):
+    # Roda num processo do pool; as tabelas vêm do snapshot compartilhado
+    cnpj = normalizar_documento(ler_primeira_chave(caminho))
+    tabelas, _ = abrir_snapshot(caminho)
+    return cnpj, agregar_tabelas(tabelas, cnpj)
+
+
+def resumo_carteira(paineis):
+    linhas = [
+        {
+            "CNPJ": cnpj,
+            "Processos": painel["indicadores"]["total_processos"],
+            "Como autor": painel["indicadores"]["qtd_polo_ativo"],
+            "Como réu": painel["indicadores"]["qtd_polo_passivo"],
+            "Valor das causas": painel["indicadores"]["valor_total"],
+            "Valor das execuções": painel["indicadores"]["valor_execucao"],
+        }
+        for cnpj, painel in paineis.items()
+    ]
+    return pd.DataFrame(
+        linhas,
+        columns=[
+            "CNPJ",
+            "Processos",
+            "Como autor",
+            "Como réu",
+            "Valor das causas",
+            "Valor das execuções",
+        ],
+    )
+
+
+def calcular_carteira(caminhos, trabalhadores=None):
+    # Pool com spawn: seguro quando o script principal é este módulo (CLI); a
+    # página chama com trabalhadores=1
+    caminhos = list(caminhos)
+    if trabalhadores == 1 or len(caminhos) <= 1:
+        resultados = [_parcial_da_empresa(caminho) for caminho in caminhos]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=trabalhadores,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as executor:
+            resultados = list(executor.map(_parcial_da_empresa, caminhos))
+
+    # Arquivos do mesmo CNPJ (por exemplo, exportações parciais) são somados
+    por_empresa = {}
+    for cnpj, parcial in resultados:
+        por_empresa.setdefault(cnpj, []).append(parcial)
+    parciais = {
+        cnpj: combinar_parciais(lista) if len(lista) > 1 else lista[0]
+        for cnpj, lista in por_empresa.items()
+    }
+    paineis = {
+        cnpj: painel_do_parcial(parcial, cnpj) for cnpj, parcial in parciais.items()
+    }
+    # Um processo com duas empresas da carteira entre as partes conta uma vez
+    # para cada empresa também no total
+    total = (
+        painel_do_parcial(combinar_parciais(parciais.values()), None)
+        if parciais
+        else None
+    )
+    return {"empresas": paineis, "total": total, "resumo": resumo_carteira(paineis)}
+
+
+def impressao_carteira(caminhos):
+    partes = [VERSAO_CARTEIRA, VERSAO_DOCUMENTO]
+    partes += [chave_cache(caminho) for caminho in sorted(caminhos)]
+    texto = "|".join(str(parte) for parte in partes)
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()[:16]
+
+
+def _arquivo_pronto(caminhos, diretorio):
+    return os.path.join(diretorio, f"carteira-{impressao_carteira(caminhos)}.json")
+
+
+def gravar_carteira(carteira, caminhos, diretorio=DIRETORIO_CARTEIRA_PRONTA):
+    arquivo = _arquivo_pronto(caminhos, diretorio)
+    documento = {
+        "versao": VERSAO_CARTEIRA,
+        "empresas": {
+            cnpj: serializar_painel(painel)
+            for cnpj, painel in carteira["empresas"].items()
+        },
+        "total": (
+            None if carteira["total"] is None else serializar_painel(carteira["total"])
+        ),
+    }
+    os.makedirs(diretorio, exist_ok=True)
+    temporario = f"{arquivo}.tmp-{os.getpid()}"
+    with open(temporario, "w", encoding="utf-8") as saida:
+        json.dump(documento, saida, ensure_ascii=False, separators=(",", ":"))
+    os.replace(temporario, arquivo)
+    # Versões anteriores da carteira não servem mais
+    for entrada in os.scandir(diretorio):
+        if (
+            entrada.name.startswith("carteira-")
+            and entrada.path != arquivo
+            and ".tmp-" not in entrada.name
+        ):
+            os.remove(entrada.path)
+    return arquivo
+
+
+def abrir_carteira_pronta(caminhos, diretorio=DIRETORIO_CARTEIRA_PRONTA):
+    # Mesmo retorno de calcular_carteira, ou None sem arquivo da versão atual
+    try:
+        with open(
+            _arquivo_pronto(caminhos, diretorio), "r", encoding="utf-8"
+        ) as entrada:
+            documento = json.load(entrada)
+    except FileNotFoundError:
+        return None
+    paineis = {
+        cnpj: desserializar_painel(painel)
+        for cnpj, painel in documento["empresas"].items()
+    }
+    total = documento["total"]
+    return {
+        "empresas": paineis,
+        "total": None if total is None else desserializar_painel(total),
+        "resumo": resumo_carteira(paineis),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Aquecimento: calcula e grava os painéis de todas as empresas de uma pasta"
+    )
+    parser.add_argument("diretorio", help="pasta com um arquivo JSON por empresa")
+    parser.add_argument("--trabalhadores", type=int)
+    parser.add_argument(
+        "--pronta",
+        default=DIRETORIO_CARTEIRA_PRONTA,
+        help="pasta da carteira pronta lida pela página",
+    )
+    parser.add_argument("--saida", help="grava o resumo por empresa em CSV")
+    args = parser.parse_args(argv)
+
+    caminhos = listar_arquivos(args.diretorio)
+    inicio = time.perf_counter()
+    carteira = calcular_carteira(caminhos, args.trabalhadores)
+    segundos = time.perf_counter() - inicio
+
+    resumo = carteira["resumo"]
+    print(resumo.to_string(index=False))
+    if carteira["total"] is not None:
+        indicadores = carteira["total"]["indicadores"]
+        print(
+            f"\nTotal: {len(resumo)} empresas, "
+            f"{indicadores['total_processos']} processos, "
+            f"valor das causas {indicadores['valor_total']:.2f}"
+        )
+    print(f"Calculado em {segundos:.2f}s")
+    print(f"Carteira pronta: {gravar_carteira(carteira, caminhos, args.pronta)}")
+    if args.saida:
+        resumo.to_csv(args.saida, index=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from cache_processos import DIRETORIO_CACHE, carregar_com_cache, chave_cache
+from esquema import PERIODO_INVALIDO, PERIODOS
+from indices import normalizar_documento
+from modelo import CHAVE
+from motor import (
+    CNPJ_PADRAO,
+    SECOES,
+    VERSAO_DOCUMENTO,
+    calcular_painel,
+    cinco_primeiros,
+    completar_estados,
+    serializar_painel,
+)
+
+# Backend opcional do painel em SQL (DuckDB embutido) sobre os arquivos Parquet
+# do cache. Cada consulta lê só as colunas que usa e os filtros descem até a
+# leitura do Parquet, sem montar os DataFrames completos na memória. O caminho
+# em pandas (motor.calcular_painel) continua o padrão e é a referência: os
+# empates das contagens seguem a primeira aparição (file_row_number), como em
+# modelo.contagem.
+BACKEND_PADRAO = os.environ.get("PROTOTIPO_BACKEND", "pandas")
+
+
+def _conectar():
+    try:
+        import duckdb
+    except ImportError as erro:
+        raise RuntimeError(
+            "O backend SQL precisa do pacote duckdb: pip install duckdb"
+        ) from erro
+    return duckdb.connect()
+
+
+def pasta_parquet(caminho, diretorio=DIRETORIO_CACHE):
+    # Garante a entrada do cache Parquet da versão atual do arquivo
+    pasta = os.path.join(diretorio, chave_cache(caminho))
+    if not os.path.isdir(pasta):
+        carregar_com_cache(caminho, diretorio=diretorio)
+    if not os.path.isdir(pasta):
+        raise RuntimeError(f"Sem cache Parquet para {caminho}")
+    return pasta
+
+
+class ConsultasPainel:
+    def __init__(self, pasta, conexao=None):
+        self.conexao = conexao or _conectar()
+        self.colunas = {}
+        for arquivo in os.listdir(pasta):
+            if arquivo.endswith(".parquet"):
+                nome = arquivo[: -len(".parquet")]
+                caminho = os.path.join(pasta, arquivo).replace("'", "''")
+                self.conexao.execute(
+                    f"CREATE OR REPLACE VIEW {nome} AS SELECT * FROM "
+                    f"read_parquet('{caminho}', file_row_number = true)"
+                )
+                self.colunas[nome] = {
+                    linha[0]
+                    for linha in self.conexao.sql(f"DESCRIBE {nome}").fetchall()
+                }
+
+    def _df(self, sql, parametros=None):
+        return self.conexao.execute(sql, parametros or []).df()
+
+    # ========================== Indicadores Gerais ==========================
+    def indicadores(self, cnpj):
+        total, valor_total, valor_execucao = self.conexao.execute("""
+            SELECT count(*),
+                   coalesce(sum("valorCausa.valor"), 0),
+                   coalesce(sum("statusPredictus.valorExecucao.valor"), 0)
+            FROM processos
+            """).fetchone()
+        por_polo = {}
+        if "cnpj" in self.colunas["partes"]:
+            por_polo = {
+                polo: (quantidade, valor, execucao)
+                for polo, quantidade, valor, execucao in self.conexao.execute(
+                    f"""
+                    WITH alvo AS (
+                        SELECT DISTINCT {CHAVE}, polo
+                        FROM partes
+                        WHERE polo IN ('ATIVO', 'PASSIVO')
+                          AND regexp_replace(cnpj, '\\D', '', 'g') = ?
+                    )
+                    SELECT alvo.polo,
+                           count(*),
+                           coalesce(sum(p."valorCausa.valor"), 0),
+                           coalesce(sum(p."statusPredictus.valorExecucao.valor"), 0)
+                    FROM alvo JOIN processos p USING ({CHAVE})
+                    GROUP BY alvo.polo
+                    """,
+                    [normalizar_documento(cnpj)],
+                ).fetchall()
+            }
+        ativo = por_polo.get("ATIVO", (0, 0.0, 0.0))
+        passivo = por_polo.get("PASSIVO", (0, 0.0, 0.0))
+        return {
+            "total_processos": int(total),
+            "qtd_polo_ativo": int(ativo[0]),
+            "qtd_polo_passivo": int(passivo[0]),
+            "valor_total": float(valor_total),
+            "valor_ativo": float(ativo[1]),
+            "valor_passivo": float(passivo[1]),
+            "valor_execucao": float(valor_execucao),
+            "valor_execucao_ativo": float(ativo[2]),
+            "valor_execucao_passivo": float(passivo[2]),
+        }
+
+    # ========================== Contagens ==========================
+    def contagem(self, tabela, coluna, rotulo, filtro="TRUE", parametros=None):
+        tabela_contagem = self._df(
+            f"""
+            SELECT "{coluna}" AS rotulo, count(*) AS total
+            FROM {tabela}
+            WHERE "{coluna}" IS NOT NULL AND ({filtro})
+            GROUP BY "{coluna}"
+            ORDER BY total DESC, min(file_row_number)
+            """,
+            parametros,
+        )
+        tabela_contagem.columns = [rotulo, "Total"]
+        return tabela_contagem
+
+    def distribuicoes(self):
+        return {
+            "distribuicao_tipo_julgamento": self.contagem(
+                "julgamentos", "tipoJulgamento", "Categoria"
+            ),
+            "distribuicao_ramo_direito": self.contagem(
+                "processos", "statusPredictus.ramoDireito", "Categoria"
+            ),
+            "distribuicao_status_processos": self.contagem(
+                "processos", "statusPredictus.statusProcesso", "Categoria"
+            ),
+            "distribuicao_tribunal": self.contagem("processos", "tribunal", "Tribunal"),
+        }
+
+    def rankings(self):
+        principal = "coalesce(ePrincipal, false)"
+        do_polo = "polo = ?"
+        return {
+            "assuntos_principais": self.contagem(
+                "assuntos", "titulo", "Assunto", principal
+            ),
+            "classes": self.contagem(
+                "processos", "classeProcessual.nome", "Classe Processual"
+            ),
+            "top_5_envolvidos_ativo": cinco_primeiros(
+                self.contagem("partes", "nome", "Parte", do_polo, ["ATIVO"])
+            ),
+            "top_5_envolvidos_passivo": cinco_primeiros(
+                self.contagem("partes", "nome", "Parte", do_polo, ["PASSIVO"])
+            ),
+            "top_5_advogados_ativo": cinco_primeiros(self.advogados("ATIVO")),
+            "top_5_advogados_passivo": cinco_primeiros(self.advogados("PASSIVO")),
+        }
+
+    def advogados(self, polo):
+        # Mesma identidade de modelo.identidade_oab ("12345/SP")
+        uf = (
+            """coalesce('/' || upper(trim(CAST("oab.uf" AS VARCHAR))), '')"""
+            if "oab.uf" in self.colunas["advogados"]
+            else "''"
+        )
+        return self._df(
+            f"""
+            WITH atuacoes AS (
+                SELECT upper(regexp_replace(
+                           CAST("oab.numero" AS VARCHAR), '[^0-9A-Za-z]', '', 'g'
+                       )) || {uf} AS oab,
+                       nome,
+                       file_row_number
+                FROM advogados
+                WHERE polo = ? AND "oab.numero" IS NOT NULL
+            )
+            SELECT arg_min(nome, file_row_number) AS Parte,
+                   oab AS OAB,
+                   count(*) AS Total
+            FROM atuacoes
+            GROUP BY oab
+            ORDER BY Total DESC, min(file_row_number)
+            """,
+            [polo],
+        )
+
+    # ========================== Dados para Mapa ==========================
+    def estados(self):
+        df_estados = self._df(f"""
+            SELECT uf,
+                   count({CHAVE}) AS quantidade,
+                   coalesce(sum("valorCausa.valor"), 0) AS valor_total
+            FROM processos
+            WHERE uf IS NOT NULL
+            GROUP BY uf
+            ORDER BY uf
+            """)
+        return completar_estados(df_estados.set_index("uf"))
+
+    # ========================== Períodos ==========================
+    def _periodo(self, coluna):
+        # Código aaaamm gravado no cache (esquema.py); a conversão da data só
+        # fica para tabelas sem o código
+        codigo = PERIODOS["processos"][coluna]
+        if codigo in self.colunas["processos"]:
+            return f'nullif("{codigo}", {PERIODO_INVALIDO})', f'"{codigo}"'
+        if coluna not in self.colunas["processos"]:
+            return "CAST(NULL AS INTEGER)", "CAST(NULL AS INTEGER)"
+        data = f'try_cast("{coluna}" AS TIMESTAMP)'
+        return f"year({data}) * 100 + month({data})", "NULL"
+
+    def _periodos(self):
+        distribuicao, codigo_distribuicao = self._periodo("dataDistribuicao")
+        arquivamento, codigo_arquivamento = self._periodo(
+            "statusPredictus.dataArquivamento"
+        )
+        return f"""
+            SELECT {CHAVE},
+                   {distribuicao} // 100 AS anoDistribuicao,
+                   {distribuicao} % 100 AS mesDistribuicao,
+                   {arquivamento} // 100 AS anoArquivamento,
+                   {arquivamento} % 100 AS mesArquivamento,
+                   {codigo_distribuicao} = {PERIODO_INVALIDO} AS falhaDistribuicao,
+                   {codigo_arquivamento} = {PERIODO_INVALIDO} AS falhaArquivamento
+            FROM processos
+        """
+
+    def _contar_periodos(self, ano, mes):
+        contagens = self._df(f"""
+            SELECT {ano}, {mes}, count(*) AS total
+            FROM ({self._periodos()})
+            WHERE {ano} IS NOT NULL AND {mes} IS NOT NULL
+            GROUP BY ALL
+            ORDER BY ALL
+            """)
+        indice = pd.MultiIndex.from_arrays(
+            [contagens[ano].astype("Int16"), contagens[mes].astype("Int8")],
+            names=[ano, mes],
+        )
+        return pd.Series(contagens["total"].to_numpy("int64"), index=indice)
+
+    def cubos_periodo(self):
+        assuntos = self._df(f"""
+            WITH principais AS (
+                SELECT {CHAVE}, titulo,
+                       row_number() OVER (ORDER BY file_row_number) - 1 AS ordem
+                FROM assuntos
+                WHERE coalesce(ePrincipal, false) AND titulo IS NOT NULL
+            )
+            SELECT periodos.anoDistribuicao,
+                   periodos.mesDistribuicao,
+                   principais.titulo,
+                   count(*) AS Total,
+                   min(principais.ordem) AS ordem
+            FROM principais LEFT JOIN ({self._periodos()}) periodos USING ({CHAVE})
+            GROUP BY ALL
+            ORDER BY 1 NULLS LAST, 2 NULLS LAST, 3
+            """)
+        assuntos = assuntos.astype(
+            {
+                "anoDistribuicao": "Int16",
+                "mesDistribuicao": "Int8",
+                "Total": "int64",
+                "ordem": "int64",
+            }
+        )
+        return {
+            "assuntos": assuntos,
+            "movimentacao": {
+                "distribuidos": self._contar_periodos(
+                    "anoDistribuicao", "mesDistribuicao"
+                ),
+                "arquivados": self._contar_periodos(
+                    "anoArquivamento", "mesArquivamento"
+                ),
+            },
+        }
+
+    def avisos(self):
+        distribuicoes, falhas_distribuicao, arquivamentos, falhas_arquivamento = (
+            self.conexao.execute(f"""
+            SELECT count(anoDistribuicao), count_if(falhaDistribuicao),
+                   count(anoArquivamento), count_if(falhaArquivamento)
+            FROM ({self._periodos()})
+            """).fetchone()
+        )
+        return {
+            "distribuicao_invalida": distribuicoes == 0,
+            "falhas_distribuicao": falhas_distribuicao,
+            "arquivamento_ausente": arquivamentos == 0,
+            "falhas_arquivamento": falhas_arquivamento,
+        }
+
+    # ========================== Seções ==========================
+    def secao(self, nome, cnpj=CNPJ_PADRAO):
+        # Mesmas chaves de motor.calcular_secao
+        if nome == "indicadores":
+            return {"indicadores": self.indicadores(cnpj)}
+        if nome == "distribuicoes":
+            return self.distribuicoes()
+        if nome == "mapa":
+            return {"estados": self.estados()}
+        if nome == "rankings":
+            return self.rankings()
+        if nome == "periodos":
+            return {"avisos": self.avisos(), "cubos_periodo": self.cubos_periodo()}
+        raise ValueError(f"Seção desconhecida: {nome!r}")
+
+
+def calcular_secao_sql(caminho, nome, cnpj=CNPJ_PADRAO, diretorio=DIRETORIO_CACHE):
+    consultas = ConsultasPainel(pasta_parquet(caminho, diretorio))
+    try:
+        return consultas.secao(nome, cnpj)
+    finally:
+        consultas.conexao.close()
+
+
+def calcular_painel_sql(caminho, cnpj=CNPJ_PADRAO, diretorio=DIRETORIO_CACHE):
+    # Mesmo formato de motor.calcular_painel
+    consultas = ConsultasPainel(pasta_parquet(caminho, diretorio))
+    try:
+        painel = {"versao": VERSAO_DOCUMENTO, "cnpj": cnpj}
+        for nome in SECOES:
+            painel.update(consultas.secao(nome, cnpj))
+    finally:
+        consultas.conexao.close()
+    return painel
+
+
+def main(argv=None):
+    from agregacao_paralela import diferencas
+
+    parser = argparse.ArgumentParser(
+        description="Calcula o painel em SQL (DuckDB) sobre o cache Parquet"
+    )
+    parser.add_argument("caminho", help="arquivo dados_empresa.json")
+    parser.add_argument("--cnpj", default=CNPJ_PADRAO)
+    parser.add_argument(
+        "--verificar",
+        action="store_true",
+        help="compara com o cálculo em pandas de motor.calcular_painel",
+    )
+    args = parser.parse_args(argv)
+
+    pasta_parquet(args.caminho)
+    inicio = time.perf_counter()
+    painel = calcular_painel_sql(args.caminho, args.cnpj)
+    print(f"SQL:    {time.perf_counter() - inicio:.3f}s")
+
+    if args.verificar:
+        inicio = time.perf_counter()
+        tabelas, _ = carregar_com_cache(args.caminho)
+        referencia = calcular_painel(tabelas, args.cnpj)
+        print(f"pandas: {time.perf_counter() - inicio:.3f}s (com leitura do cache)")
+        encontradas = diferencas(
+            serializar_painel(painel), serializar_painel(referencia)
+        )
+        for diferenca in encontradas[:20]:
+            print(f"  DIFERENTE {diferenca}")
+        if encontradas:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Tipos compactos das tabelas normalizadas, aplicados uma vez na carga:
+# "categoria" para campos de baixa cardinalidade e nomes que se repetem muito
+# (cada valor distinto é guardado uma vez, e value_counts/groupby trabalham sobre
+# códigos inteiros) e "decimal" para valores que podem virar float32 quando a
+# conversão não perde precisão. Colunas ausentes na tabela são ignoradas.
+ESQUEMA = {
+    "processos": {
+        "tribunal": "categoria",
+        "uf": "categoria",
+        "classeProcessual.nome": "categoria",
+        "statusPredictus.ramoDireito": "categoria",
+        "statusPredictus.statusProcesso": "categoria",
+        "valorCausa.valor": "decimal",
+        "statusPredictus.valorExecucao.valor": "decimal",
+    },
+    "partes": {
+        "polo": "categoria",
+        "nome": "categoria",
+        "tipo": "categoria",
+    },
+    "advogados": {
+        "polo": "categoria",
+        "parte": "categoria",
+        "nome": "categoria",
+        "oab.uf": "categoria",
+    },
+    "julgamentos": {
+        "tipoJulgamento": "categoria",
+    },
+    "assuntos": {
+        "titulo": "categoria",
+    },
+}
+
+# Datas convertidas na carga em códigos inteiros de período (aaaamm, Int32):
+# a Análise por Período conta processos por esses códigos sem reinterpretar as
+# datas a cada agregação. Cada formato conhecido é tentado em ordem sobre o que
+# ainda não foi convertido; PERIODO_INVALIDO marca a data preenchida que não
+# bate com nenhum deles (NA continua sendo a data ausente).
+PERIODOS = {
+    "processos": {
+        "dataDistribuicao": "periodoDistribuicao",
+        "statusPredictus.dataArquivamento": "periodoArquivamento",
+    },
+}
+FORMATOS_DATA = ("%Y-%m-%dT%H:%M:%S", "ISO8601", "%d/%m/%Y")
+PERIODO_INVALIDO = 0
+
+
+def _decimal(serie):
+    # Valores monetários com centavos costumam exceder os 7 dígitos do float32;
+    # nesses casos a coluna continua float64 e as somas não mudam
+    serie = pd.to_numeric(serie, errors="coerce")
+    compacta = serie.astype("float32")
+    if compacta.astype("float64").equals(serie.astype("float64")):
+        return compacta
+    return serie.astype("float64")
+
+
+def tipar_tabela(tabela, esquema):
+    colunas = {}
+    for coluna, tipo in esquema.items():
+        if coluna not in tabela.columns:
+            continue
+        if tipo == "categoria":
+            colunas[coluna] = tabela[coluna].astype("category")
+        elif tipo == "decimal":
+            colunas[coluna] = _decimal(tabela[coluna])
+    return tabela.assign(**colunas) if colunas else tabela
+
+
+# Deslocamento de fuso depois do horário: "Z", "-03:00", "+0300", "-03"
+_FUSO = r"(\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)\s*(?:Z|[+-]\d{2}(?::?\d{2})?)$"
+
+
+def _meses(datas):
+    # datetime64[M]; datas com fuso ficam no horário local de cada uma
+    if datas.dt.tz is not None:
+        datas = datas.dt.tz_localize(None)
+    return datas.to_numpy(dtype="datetime64[ns]").astype("datetime64[M]")
+
+
+def _converter(texto, formato):
+    try:
+        return pd.to_datetime(texto, format=formato, errors="coerce")
+    except ValueError:
+        # Fusos diferentes na mesma coluna (ou com e sem fuso) não convertem
+        # juntos; sem o deslocamento, cada data fica no próprio horário local,
+        # o mesmo mês que teria numa coluna de fuso único
+        sem_fuso = texto.str.replace(_FUSO, r"\1", regex=True)
+        return pd.to_datetime(sem_fuso, format=formato, errors="coerce")
+
+
+def codificar_periodo(serie):
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        meses = _meses(serie)
+        preenchida = ~np.isnat(meses)
+    else:
+        texto = serie.astype("string")
+        preenchida = (texto.str.strip() != "").to_numpy(dtype=bool, na_value=False)
+        meses = _meses(_converter(texto, FORMATOS_DATA[0]))
+        for formato in FORMATOS_DATA[1:]:
+            pendentes = preenchida & np.isnat(meses)
+            if not pendentes.any():
+                break
+            meses[pendentes] = _meses(_converter(texto[pendentes], formato))
+    validas = ~np.isnat(meses)
+    meses = meses.astype(np.int64)
+    codigos = np.where(
+        validas, (meses // 12 + 1970) * 100 + meses % 12 + 1, PERIODO_INVALIDO
+    ).astype(np.int32)
+    return pd.Series(
+        pd.arrays.IntegerArray(codigos, ~validas & ~preenchida), index=serie.index
+    )
+
+
+def codificar_periodos(tabela, periodos):
+    # Colunas de código já presentes (tabelas do cache) não são recalculadas
+    colunas = {
+        destino: codificar_periodo(tabela[origem])
+        for origem, destino in periodos.items()
+        if origem in tabela.columns and destino not in tabela.columns
+    }
+    return tabela.assign(**colunas) if colunas else tabela
+
+
+def tipar_tabelas(tabelas):
+    return {
+        nome: codificar_periodos(
+            tipar_tabela(tabela, ESQUEMA.get(nome, {})), PERIODOS.get(nome, {})
+        )
+        for nome, tabela in tabelas.items()
+    }
+
+
+def relatorio_memoria(tabelas, referencia=None):
+    # Bytes por coluna (memory_usage com deep=True); com referencia, inclui o
+    # tamanho da mesma coluna nas tabelas sem tipagem para comparação
+    linhas = []
+    for nome, tabela in tabelas.items():
+        uso = tabela.memory_usage(index=False, deep=True)
+        anterior = (
+            referencia[nome].memory_usage(index=False, deep=True)
+            if referencia is not None
+            else None
+        )
+        for coluna in tabela.columns:
+            linha = {
+                "tabela": nome,
+                "coluna": coluna,
+                "tipo": str(tabela[coluna].dtype),
+                "distintos": int(tabela[coluna].nunique()),
+                "bytes": int(uso[coluna]),
+            }
+            if anterior is not None:
+                linha["bytes_sem_tipagem"] = int(anterior[coluna])
+            linhas.append(linha)
+    return pd.DataFrame(linhas)
+
+
+def main(argv=None):
+    # modelo.py importa este módulo; aqui a importação fica dentro da função
+    from carregamento import iterar_lotes_brutos
+    from modelo import concatenar_tabelas, descartar_repetidos, normalizar_lote
+
+    parser = argparse.ArgumentParser(
+        description="Mostra o uso de memória por coluna das tabelas normalizadas"
+    )
+    parser.add_argument("caminho", help="arquivo dados_empresa.json")
+    args = parser.parse_args(argv)
+
+    brutas = concatenar_tabelas(
+        normalizar_lote(lote)
+        for lote in descartar_repetidos(iterar_lotes_brutos(args.caminho))
+    )
+    relatorio = relatorio_memoria(tipar_tabelas(brutas), brutas)
+    with pd.option_context("display.max_rows", None, "display.width", 120):
+        print(relatorio.to_string(index=False))
+    antes = relatorio["bytes_sem_tipagem"].sum()
+    depois = relatorio["bytes"].sum()
+    print(
+        f"\nTotal: {antes / 2**20:.1f} MiB -> {depois / 2**20:.1f} MiB "
+        f"({1 - depois / antes:.0%} menor)"
+    )
+
+
+if __name__ == "__main__":
+    main()
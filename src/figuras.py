@@ -0,0 +1,91 @@
+import plotly.express as px
+
+from paginacao import agrupar_outros
+from periodos import GRANULARIDADES
+
+# Figuras Plotly do painel, montadas a partir das tabelas já agregadas. Ficam
+# fora da página para que os painéis prontos (paineis_prontos.py) gravem as
+# mesmas especificações que a página desenharia.
+VERDE = "#45A874"
+VERDE_ESCURO = "#2A4C3F"
+ESCALA_MAPA = [
+    "rgba(69, 168, 116, 0.1)",  # Verde claro para valores baixos
+    "#45A874",  # Verde médio
+    "#2A4C3F",  # Verde escuro
+    "#21332C",  # Verde ainda mais escuro
+]
+# Opções de "Agrupar por" (periodos.GRANULARIDADES) e o rótulo de cada uma
+ROTULOS_GRANULARIDADE = {"mes": "Mês", "trimestre": "Trimestre", "ano": "Ano"}
+
+
+def barras_horizontais(tabela):
+    # Distribuições com rótulos longos (status do processo, julgamentos)
+    return px.bar(
+        agrupar_outros(tabela),
+        x="Total",
+        y="Categoria",
+        text="Total",
+        orientation="h",
+        color_discrete_sequence=[VERDE],
+        labels={"Categoria": "", "Total": ""},
+    )
+
+
+def barras_verticais(tabela, categoria="Categoria"):
+    return px.bar(
+        agrupar_outros(tabela),
+        x=categoria,
+        y="Total",
+        text="Total",
+        color_discrete_sequence=[VERDE],
+        labels={categoria: "", "Total": ""},
+    )
+
+
+def mapa_estados(estados, geojson):
+    mapa = px.choropleth(
+        estados,
+        geojson=geojson,
+        locations="uf",
+        featureidkey="properties.sigla",
+        color="quantidade",
+        hover_name="Label",
+        color_continuous_scale=ESCALA_MAPA,
+    )
+    mapa.update_geos(
+        fitbounds="locations",
+        visible=True,
+        showcoastlines=False,
+        showcountries=False,
+    )
+    mapa.update_traces(marker_line_width=0.5, text=estados["Label"])
+    return mapa
+
+
+def assuntos_periodo(tabela):
+    # tabela de periodos.fatiar_assuntos
+    return px.bar(
+        agrupar_outros(tabela),
+        x="Assunto",
+        y="Total",
+        labels={"Assunto": "Assunto", "Total": "Total"},
+        text="Total",
+        color_discrete_sequence=[VERDE],
+    )
+
+
+def distribuidos_arquivados(tabela, granularidade="mes"):
+    # tabela de periodos.fatiar_movimentacao com a mesma granularidade
+    eixo = GRANULARIDADES[granularidade]
+    return px.bar(
+        tabela,
+        x=eixo,
+        y=["Distribuídos", "Arquivados"],
+        barmode="group",
+        labels={
+            eixo: ROTULOS_GRANULARIDADE[granularidade],
+            "value": "Total de Processos",
+            "variable": "Status",
+        },
+        color_discrete_sequence=[VERDE, VERDE_ESCURO],
+    )
@@ -0,0 +1,112 @@
+import os
+
+import pandas as pd
+
+from modelo import contar
+
+# Rankings Top 5 de partes e advogados com memória limitada: um resumo
+# Misra-Gries guarda no máximo `capacidade` contadores. Enquanto as chaves
+# distintas cabem nos contadores o resumo é exato; quando não cabem, cada
+# total fica subestimado em no máximo `erro` (<= total / (capacidade + 1)),
+# e o valor é informado ao lado da tabela. Resumos de lotes diferentes são
+# combinados sem perder a garantia, então funcionam na ingestão em lotes e no
+# map-reduce de agregacao_paralela.py.
+#
+# Modos (PROTOTIPO_RANKING): "exato" conta tudo; "auto" só passa a aproximar
+# quando há mais partes/OABs distintas do que contadores, ou seja, em bases
+# grandes; "aproximado" usa poucos contadores desde o início.
+CAPACIDADES = {"exato": None, "auto": 50_000, "aproximado": 1_000}
+MODO_RANKING = os.environ.get("PROTOTIPO_RANKING", "auto")
+# Linhas contadas de uma vez quando as tabelas já estão em memória
+TAMANHO_BLOCO_RESUMO = 200_000
+
+
+def capacidade_ranking(modo=MODO_RANKING):
+    if modo not in CAPACIDADES:
+        raise ValueError(
+            f"Modo de ranking desconhecido: {modo!r} "
+            f"(opções: {', '.join(CAPACIDADES)})"
+        )
+    return CAPACIDADES[modo]
+
+
+class ResumoFrequentes:
+    def __init__(self, contagens, capacidade=None, rotulos=None, erro=0, total=None):
+        # contagens na ordem da primeira aparição (modelo.contar); rotulos é
+        # opcional, com o nome exibido de cada chave (advogados por OAB)
+        self.capacidade = capacidade
+        self.total = int(contagens.sum()) if total is None else total
+        self.erro = erro
+        self.contagens = contagens
+        self.rotulos = rotulos
+        self._podar()
+
+    def _podar(self):
+        # Subtrai de todos o (capacidade + 1)-ésimo maior total e descarta o
+        # que zerar; sobram no máximo `capacidade` contadores
+        if self.capacidade is None or len(self.contagens) <= self.capacidade:
+            return
+        corte = int(self.contagens.nlargest(self.capacidade + 1).iloc[-1])
+        contagens = self.contagens - corte
+        self.contagens = contagens[contagens > 0]
+        self.erro += corte
+        if self.rotulos is not None:
+            self.rotulos = self.rotulos[self.rotulos.index.isin(self.contagens.index)]
+
+    @property
+    def exato(self):
+        return self.erro == 0
+
+    @classmethod
+    def combinar(cls, resumos):
+        # Soma dos contadores (primeira aparição preservada) e nova poda; os
+        # erros dos resumos combinados se somam ao corte
+        resumos = list(resumos)
+        contagens = (
+            pd.concat([resumo.contagens for resumo in resumos])
+            .groupby(level=0, sort=False)
+            .sum()
+        )
+        rotulos = None
+        if resumos[0].rotulos is not None:
+            rotulos = pd.concat([resumo.rotulos for resumo in resumos])
+            rotulos = rotulos[~rotulos.index.duplicated()]
+        return cls(
+            contagens,
+            resumos[0].capacidade,
+            rotulos,
+            erro=sum(resumo.erro for resumo in resumos),
+            total=sum(resumo.total for resumo in resumos),
+        )
+
+    def limites(self):
+        # Para o painel: só existe quando o resumo deixou de ser exato
+        return {
+            "erro": self.erro,
+            "total": self.total,
+            "contadores": self.capacidade,
+        }
+
+
+def resumir(
+    linhas, coluna, capacidade=None, rotular=None, tamanho_bloco=TAMANHO_BLOCO_RESUMO
+):
+    # linhas: DataFrame com a chave em `coluna`; rotular(bloco) devolve o nome
+    # de cada chave (por exemplo, modelo.primeiros_nomes). Em blocos, a memória
+    # extra fica limitada aos contadores mais as chaves de um bloco.
+    if capacidade is None or len(linhas) <= tamanho_bloco:
+        blocos = [linhas]
+    else:
+        blocos = (
+            linhas.iloc[inicio : inicio + tamanho_bloco]
+            for inicio in range(0, len(linhas), tamanho_bloco)
+        )
+    resumo = None
+    for bloco in blocos:
+        atual = ResumoFrequentes(
+            contar(bloco[coluna]),
+            capacidade,
+            rotular(bloco) if rotular is not None else None,
+        )
+        resumo = atual if resumo is None else ResumoFrequentes.combinar([resumo, atual])
+    return resumo
@@ -0,0 +1,166 @@
+import argparse
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+import requests
+
+# Geometria dos estados distribuída junto com o app, já simplificada: o painel
+# não depende de rede e o plotly envia bem menos coordenadas ao navegador.
+# O arquivo versionado em dados/ veio da malha municipal 1:2.500.000 do IBGE,
+# com os municípios dissolvidos por UF antes de simplificar_geojson. A página só
+# lê o arquivo; gerar_geojson é um passo manual para regerá-lo a partir de outro
+# GeoJSON com a propriedade "sigla".
+URL_GEOJSON = "https://raw.githubusercontent.com/codeforamerica/click_that_hood/master/public/data/brazil-states.geojson"
+CAMINHO_GEOJSON = os.environ.get(
+    "PROTOTIPO_GEOJSON",
+    os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "dados", "brasil_estados.geojson"
+    ),
+)
+
+# Tolerância da simplificação (em graus, ~1 km) e casas decimais mantidas (~100 m)
+TOLERANCIA = 0.01
+CASAS_DECIMAIS = 3
+
+ESTADOS_BRASIL = [
+    "AC",
+    "AL",
+    "AM",
+    "AP",
+    "BA",
+    "CE",
+    "DF",
+    "ES",
+    "GO",
+    "MA",
+    "MT",
+    "MS",
+    "MG",
+    "PA",
+    "PB",
+    "PR",
+    "PE",
+    "PI",
+    "RJ",
+    "RN",
+    "RS",
+    "RO",
+    "RR",
+    "SC",
+    "SP",
+    "SE",
+    "TO",
+]
+
+
+def _douglas_peucker(pontos, tolerancia):
+    # Versão iterativa; devolve a máscara dos pontos mantidos
+    manter = np.zeros(len(pontos), dtype=bool)
+    manter[0] = manter[-1] = True
+    pilha = [(0, len(pontos) - 1)]
+    while pilha:
+        inicio, fim = pilha.pop()
+        if fim - inicio < 2:
+            continue
+        a, b = pontos[inicio], pontos[fim]
+        trecho = pontos[inicio + 1 : fim]
+        direcao = b - a
+        comprimento = np.hypot(*direcao)
+        if comprimento == 0:
+            distancias = np.hypot(*(trecho - a).T)
+        else:
+            distancias = (
+                np.abs(
+                    direcao[0] * (trecho[:, 1] - a[1])
+                    - direcao[1] * (trecho[:, 0] - a[0])
+                )
+                / comprimento
+            )
+        maior = int(np.argmax(distancias))
+        if distancias[maior] > tolerancia:
+            meio = inicio + 1 + maior
+            manter[meio] = True
+            pilha.append((inicio, meio))
+            pilha.append((meio, fim))
+    return manter
+
+
+def _simplificar_anel(anel, tolerancia, casas):
+    pontos = np.asarray(anel, dtype=float)[:, :2]
+    if len(pontos) > 4:
+        simplificado = pontos[_douglas_peucker(pontos, tolerancia)]
+        # Um anel fechado precisa de pelo menos 4 pontos
+        if len(simplificado) >= 4:
+            pontos = simplificado
+    return np.round(pontos, casas).tolist()
+
+
+def simplificar_geojson(geojson, tolerancia=TOLERANCIA, casas=CASAS_DECIMAIS):
+    # Mantém só a sigla nas propriedades, que é o que o mapa usa como chave
+    features = []
+    for feature in geojson["features"]:
+        geometria = feature["geometry"]
+        if geometria["type"] == "Polygon":
+            poligonos = [geometria["coordinates"]]
+        else:
+            poligonos = geometria["coordinates"]
+        coordenadas = [
+            [_simplificar_anel(anel, tolerancia, casas) for anel in poligono]
+            for poligono in poligonos
+        ]
+        features.append(
+            {
+                "type": "Feature",
+                "properties": {"sigla": feature["properties"]["sigla"]},
+                "geometry": {"type": "MultiPolygon", "coordinates": coordenadas},
+            }
+        )
+    return {"type": "FeatureCollection", "features": features}
+
+
+def gerar_geojson(url=URL_GEOJSON, destino=CAMINHO_GEOJSON):
+    # Passo de build: baixa a geometria original uma vez e grava a versão simplificada
+    original = requests.get(url, timeout=30).json()
+    simplificado = simplificar_geojson(original)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    with open(destino, "w", encoding="utf-8") as arquivo:
+        json.dump(simplificado, arquivo, separators=(",", ":"))
+    return original, simplificado
+
+
+@lru_cache(maxsize=1)
+def _ler_geojson(caminho):
+    with open(caminho, "r", encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def carregar_geojson_estados(caminho=CAMINHO_GEOJSON):
+    # Lido uma única vez por processo do servidor, sem rede e sem gravar nada.
+    # Sem o arquivo empacotado devolve None (a página mostra o aviso no lugar do
+    # mapa); a falta não fica em cache, então o arquivo vale assim que aparecer.
+    try:
+        return _ler_geojson(caminho)
+    except FileNotFoundError:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Gera o GeoJSON simplificado dos estados empacotado com o app"
+    )
+    parser.add_argument("--url", default=URL_GEOJSON)
+    parser.add_argument("--destino", default=CAMINHO_GEOJSON)
+    args = parser.parse_args(argv)
+
+    original, simplificado = gerar_geojson(args.url, args.destino)
+    tamanho_original = len(json.dumps(original, separators=(",", ":")))
+    tamanho_final = os.path.getsize(args.destino)
+    print(f"Original:     {tamanho_original / 1024:.0f} KiB")
+    print(f"Simplificado: {tamanho_final / 1024:.0f} KiB")
+    print(f"Redução:      {100 * (1 - tamanho_final / tamanho_original):.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import argparse
+import json
+import random
+
+# Gera arquivos no formato de dados_empresa.json com volume e cardinalidades
+# configuráveis. Os processos são gravados um a um, então arquivos com milhões
+# de processos não precisam caber em memória.
+CNPJ_PADRAO = "90400888000142"
+
+# Em ordem aproximada de volume processual, para que "--ufs 5" pegue as maiores
+UFS = (
+    "SP RJ MG RS PR BA SC PE GO DF CE ES PA MA MT MS PB RN AL PI SE RO TO AM AC AP RR"
+).split()
+RAMOS = ["Cível", "Trabalhista", "Tributário", "Consumidor", "Previdenciário"]
+STATUS = ["ATIVO", "ARQUIVADO", "SUSPENSO", "BAIXADO"]
+TIPOS_JULGAMENTO = ["PROCEDENTE", "IMPROCEDENTE", "PARCIALMENTE PROCEDENTE", "ACORDO"]
+CLASSES = [
+    "Procedimento Comum Cível",
+    "Execução Fiscal",
+    "Monitória",
+    "Reclamação Trabalhista",
+    "Execução de Título Extrajudicial",
+    "Mandado de Segurança",
+]
+PREFIXOS_ASSUNTO = ["Indenização por", "Rescisão de", "Cobrança de", "Revisão de"]
+OBJETOS_ASSUNTO = ["Dano Moral", "Contrato", "ICMS", "Horas Extras", "Tarifas"]
+SOBRENOMES = ["Silva", "Souza", "Oliveira", "Santos", "Lima", "Pereira", "Costa"]
+PRENOMES = ["Ana", "Bruno", "Carla", "Diego", "Elisa", "Felipe", "Gabriela", "Hugo"]
+
+
+def _pesos(quantidade):
+    # Distribuição de cauda longa (Zipf), como nomes e assuntos reais
+    return [1 / (posicao + 1) for posicao in range(quantidade)]
+
+
+class GeradorProcessos:
+    def __init__(
+        self,
+        cnpj=CNPJ_PADRAO,
+        partes=3,
+        advogados=2,
+        julgamentos=1,
+        assuntos=2,
+        tribunais=40,
+        ufs=27,
+        nomes=5_000,
+        advogados_distintos=2_000,
+        assuntos_distintos=300,
+        semente=42,
+    ):
+        self.aleatorio = random.Random(semente)
+        self.cnpj = cnpj
+        self.partes = partes
+        self.advogados = advogados
+        self.julgamentos = julgamentos
+        self.assuntos = assuntos
+        self.ufs = UFS[:ufs]
+        self.tribunais = [
+            f"{ramo}{numero}"
+            for numero in range(1, tribunais + 1)
+            for ramo in ("TJ", "TRT", "TRF")
+        ][:tribunais]
+        self.nomes = [
+            f"{self.aleatorio.choice(PRENOMES)} {self.aleatorio.choice(SOBRENOMES)}"
+            f" {indice}"
+            for indice in range(nomes)
+        ]
+        self.pesos_nomes = _pesos(nomes)
+        self.advogados_pool = [
+            {
+                "nome": f"Dr(a). {self.aleatorio.choice(PRENOMES)} "
+                f"{self.aleatorio.choice(SOBRENOMES)} {indice}",
+                "oab": {
+                    "numero": str(10_000 + indice),
+                    "uf": self.aleatorio.choice(self.ufs),
+                },
+            }
+            for indice in range(advogados_distintos)
+        ]
+        self.pesos_advogados = _pesos(advogados_distintos)
+        self.titulos = [
+            f"{self.aleatorio.choice(PREFIXOS_ASSUNTO)} "
+            f"{self.aleatorio.choice(OBJETOS_ASSUNTO)} {indice}"
+            for indice in range(assuntos_distintos)
+        ]
+        self.pesos_titulos = _pesos(assuntos_distintos)
+
+    def _quantidade(self, media):
+        # Pelo menos zero, em torno da média configurada
+        return max(0, round(self.aleatorio.gauss(media, media / 2))) if media else 0
+
+    def _advogados(self):
+        return [
+            dict(advogado)
+            for advogado in self.aleatorio.choices(
+                self.advogados_pool,
+                self.pesos_advogados,
+                k=self._quantidade(self.advogados),
+            )
+        ]
+
+    def _parte(self, nome, polo, documento):
+        parte = {"nome": nome, "polo": polo, "advogados": self._advogados()}
+        parte.update(documento)
+        return parte
+
+    def processo(self, sequencial):
+        aleatorio = self.aleatorio
+        ano = aleatorio.randint(2010, 2024)
+        mes = aleatorio.randint(1, 12)
+        tribunal = aleatorio.choice(self.tribunais)
+
+        polo_empresa = aleatorio.choice(["ATIVO", "PASSIVO"])
+        polo_oposto = "PASSIVO" if polo_empresa == "ATIVO" else "ATIVO"
+        polos = [polo_oposto, polo_empresa, "OUTROS"]
+        partes = [self._parte("EMPRESA ALVO S.A.", polo_empresa, {"cnpj": self.cnpj})]
+        for _ in range(max(1, self._quantidade(self.partes - 1))):
+            nome = aleatorio.choices(self.nomes, self.pesos_nomes)[0]
+            polo = aleatorio.choices(polos, [8, 1, 1])[0]
+            partes.append(self._parte(nome, polo, {"cpf": f"{sequencial:011d}"}))
+
+        status = {
+            "ramoDireito": aleatorio.choice(RAMOS),
+            "statusProcesso": aleatorio.choice(STATUS),
+            "valorExecucao": {"valor": round(aleatorio.uniform(0, 500_000), 2)},
+            "julgamentos": [
+                {
+                    "tipoJulgamento": aleatorio.choice(TIPOS_JULGAMENTO),
+                    "data": f"{ano}-{mes:02d}-15T00:00:00",
+                }
+                for _ in range(self._quantidade(self.julgamentos))
+            ],
+        }
+        if status["statusProcesso"] == "ARQUIVADO":
+            ano_arquivamento = aleatorio.randint(ano, 2024)
+            mes_arquivamento = aleatorio.randint(1, 12)
+            status["dataArquivamento"] = (
+                f"{ano_arquivamento}-{mes_arquivamento:02d}-01T00:00:00"
+            )
+
+        titulos = aleatorio.choices(
+            self.titulos, self.pesos_titulos, k=max(1, self._quantidade(self.assuntos))
+        )
+        # Numeração CNJ: NNNNNNN-DD.AAAA.J.TR.OOOO
+        digito = sequencial % 97
+        origem = sequencial % 10_000
+        numero = f"{sequencial:07d}-{digito:02d}.{ano}.8.26.{origem:04d}"
+        dia = aleatorio.randint(1, 28)
+        return {
+            "numeroProcessoUnico": numero,
+            "tribunal": tribunal,
+            "uf": aleatorio.choice(self.ufs),
+            "dataDistribuicao": f"{ano}-{mes:02d}-{dia:02d}T00:00:00",
+            "valorCausa": {"valor": round(aleatorio.lognormvariate(10, 1.5), 2)},
+            "classeProcessual": {"nome": aleatorio.choice(CLASSES)},
+            "assuntosCNJ": [
+                {"titulo": titulo, "ePrincipal": posicao == 0}
+                for posicao, titulo in enumerate(titulos)
+            ],
+            "partes": partes,
+            "statusPredictus": status,
+        }
+
+    def gravar(self, caminho, quantidade):
+        # Mesmo formato do arquivo real: {"<cnpj>": [processo, ...]}
+        with open(caminho, "w", encoding="utf-8") as arquivo:
+            arquivo.write("{" + json.dumps(self.cnpj) + ": [")
+            for sequencial in range(quantidade):
+                if sequencial:
+                    arquivo.write(",\n")
+                json.dump(self.processo(sequencial), arquivo, ensure_ascii=False)
+            arquivo.write("]}\n")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Gera dados sintéticos no formato de dados_empresa.json"
+    )
+    parser.add_argument("saida")
+    parser.add_argument("-n", "--processos", type=int, default=1_000)
+    parser.add_argument("--cnpj", default=CNPJ_PADRAO)
+    parser.add_argument("--partes", type=float, default=3, help="média por processo")
+    parser.add_argument("--advogados", type=float, default=2, help="média por parte")
+    parser.add_argument("--julgamentos", type=float, default=1)
+    parser.add_argument("--assuntos", type=float, default=2)
+    parser.add_argument("--tribunais", type=int, default=40)
+    parser.add_argument("--ufs", type=int, default=27)
+    parser.add_argument("--nomes", type=int, default=5_000)
+    parser.add_argument("--advogados-distintos", type=int, default=2_000)
+    parser.add_argument("--assuntos-distintos", type=int, default=300)
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    gerador = GeradorProcessos(
+        cnpj=args.cnpj,
+        partes=args.partes,
+        advogados=args.advogados,
+        julgamentos=args.julgamentos,
+        assuntos=args.assuntos,
+        tribunais=args.tribunais,
+        ufs=args.ufs,
+        nomes=args.nomes,
+        advogados_distintos=args.advogados_distintos,
+        assuntos_distintos=args.assuntos_distintos,
+        semente=args.semente,
+    )
+    gerador.gravar(args.saida, args.processos)
+
+
+if __name__ == "__main__":
+    main()
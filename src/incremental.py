@@ -0,0 +1,476 @@
+import argparse
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pandas as pd
+
+from agregacao_paralela import (
+    agregar_tabelas,
+    combinar_parciais,
+    diferencas,
+    negar_parcial,
+    painel_do_parcial,
+    sem_zeros,
+)
+from carregamento import iterar_processos, ler_primeira_chave
+from esquema import tipar_tabelas
+from frequentes import ResumoFrequentes
+from indices import normalizar_documento
+from modelo import CHAVE, TABELAS, carregar_tabelas, normalizar_lote
+
+# Base incremental: em vez de reprocessar a exportação inteira a cada lote de
+# processos novos ou atualizados, a base guarda as tabelas em segmentos (a carga
+# inicial e um segmento por delta) e o estado parcial de agregacao_paralela.py
+# já combinado. Um delta é aplicado como upsert por numeroProcessoUnico:
+#   estado += parcial(versões novas) - parcial(versões que elas substituem)
+# então a atualização das agregações é O(delta), e um processo que muda de
+# tribunal, status ou polo sai da categoria antiga e entra na nova. As versões
+# substituídas continuam nos segmentos antigos, marcadas como mortas, até a
+# próxima compactação.
+#
+# Os Top 5 são mantidos sempre exatos: um resumo de frequentes já podado não
+# permite retirar ocorrências (frequentes.py).
+#
+# No disco, estado.json é o ponto de publicação: versão, CNPJ, número de
+# segmentos e os escalares do parcial, com as tabelas e séries do parcial e o
+# mapa chave -> segmento da versão atual em Parquet numa pasta "estado-NNNNNN"
+# (uma por gravação). Abrir a base não lê os segmentos; as linhas dos segmentos
+# são lidas sob demanda, com filtro por chave no Parquet, quando um delta
+# substitui versões. O resto de cada "aplicar" não é O(delta): abrir carrega o
+# mapa de localização inteiro (uma entrada por processo) e gravar reescreve esse
+# mapa e o parcial inteiro, cujos Top 5 exatos têm um contador por parte e por
+# OAB distintas, então o tempo total ainda cresce com o tamanho da base.
+DIRETORIO_INCREMENTAL = os.environ.get("PROTOTIPO_INCREMENTAL", "")
+VERSAO_ESTADO = 3
+_ARQUIVO_ESTADO = "estado.json"
+_ARQUIVO_LOCALIZACAO = "localizacao.parquet"
+
+
+def _pasta_segmento(pasta, numero):
+    return os.path.join(pasta, f"{numero:06d}")
+
+
+def _gravar_tabelas(pasta, tabelas, indice=False):
+    # Pasta temporária renomeada no fim, como em cache_processos.py; indice=None
+    # guarda os índices (com seus nomes) quando não são o padrão 0..n-1
+    temporaria = f"{pasta}.tmp-{os.getpid()}"
+    shutil.rmtree(pasta, ignore_errors=True)
+    os.makedirs(temporaria, exist_ok=True)
+    for nome, tabela in tabelas.items():
+        tabela.to_parquet(os.path.join(temporaria, f"{nome}.parquet"), index=indice)
+    os.replace(temporaria, pasta)
+
+
+def _ler_segmento(pasta, chaves=None):
+    # Com chaves, só as linhas desses processos (filtro aplicado na leitura)
+    filtros = None if chaves is None else [(CHAVE, "in", list(chaves))]
+    return {
+        nome: pd.read_parquet(
+            os.path.join(pasta, f"{nome}.parquet"), filters=filtros
+        ).reset_index(drop=True)
+        for nome in TABELAS
+    }
+
+
+def _separar(objeto, caminho, tabelas):
+    # Parcial -> documento JSON; DataFrames e séries vão para `tabelas` (Parquet
+    # preserva tipos e nomes dos índices), no lugar fica o nome do arquivo
+    if isinstance(objeto, pd.DataFrame):
+        tabelas[caminho] = objeto
+        return {"__tabela__": caminho}
+    if isinstance(objeto, pd.Series):
+        tabelas[caminho] = objeto.to_frame()
+        return {"__serie__": caminho}
+    if isinstance(objeto, ResumoFrequentes):
+        return {
+            "__resumo__": {
+                "contagens": _separar(
+                    objeto.contagens, f"{caminho}.contagens", tabelas
+                ),
+                "rotulos": _separar(objeto.rotulos, f"{caminho}.rotulos", tabelas),
+                "capacidade": objeto.capacidade,
+                "erro": int(objeto.erro),
+                "total": int(objeto.total),
+            }
+        }
+    if isinstance(objeto, dict):
+        return {
+            chave: _separar(valor, f"{caminho}.{chave}" if caminho else chave, tabelas)
+            for chave, valor in objeto.items()
+        }
+    return objeto.item() if isinstance(objeto, np.generic) else objeto
+
+
+def _juntar(objeto, pasta):
+    if not isinstance(objeto, dict):
+        return objeto
+    if set(objeto) == {"__tabela__"}:
+        return pd.read_parquet(os.path.join(pasta, f"{objeto['__tabela__']}.parquet"))
+    if set(objeto) == {"__serie__"}:
+        tabela = pd.read_parquet(os.path.join(pasta, f"{objeto['__serie__']}.parquet"))
+        return tabela.iloc[:, 0]
+    if set(objeto) == {"__resumo__"}:
+        resumo = objeto["__resumo__"]
+        return ResumoFrequentes(
+            _juntar(resumo["contagens"], pasta),
+            resumo["capacidade"],
+            _juntar(resumo["rotulos"], pasta),
+            erro=resumo["erro"],
+            total=resumo["total"],
+        )
+    return {chave: _juntar(valor, pasta) for chave, valor in objeto.items()}
+
+
+def _ler_documento(pasta):
+    with open(os.path.join(pasta, _ARQUIVO_ESTADO), "r", encoding="utf-8") as arquivo:
+        documento = json.load(arquivo)
+    if documento.get("versao") != VERSAO_ESTADO:
+        raise ValueError(
+            f"Base incremental em {pasta} tem versão {documento.get('versao')!r}; "
+            f"recrie com a versão {VERSAO_ESTADO}"
+        )
+    return documento
+
+
+def ler_estado(pasta):
+    # Só o estado agregado, sem as tabelas nem a localização: basta para o painel
+    documento = _ler_documento(pasta)
+    return {
+        "cnpj": documento["cnpj"],
+        "segmentos": documento["segmentos"],
+        "parcial": _juntar(
+            documento["parcial"], os.path.join(pasta, documento["pasta_estado"])
+        ),
+    }
+
+
+def versao_base(pasta):
+    # Muda a cada delta gravado; serve de chave para os caches da página
+    info = os.stat(os.path.join(pasta, _ARQUIVO_ESTADO))
+    return f"{info.st_size}-{info.st_mtime_ns}"
+
+
+def painel_incremental(pasta):
+    estado = ler_estado(pasta)
+    return painel_do_parcial(estado["parcial"], estado["cnpj"])
+
+
+class BaseIncremental:
+    def __init__(self, cnpj, parcial, segmentos=(), localizacao=None, pasta=None):
+        # segmentos: tabelas em memória, ou None para os que só estão em `pasta`
+        # (abertos com abrir, lidos sob demanda)
+        self.cnpj = cnpj
+        self.parcial = parcial
+        self.segmentos = []
+        # chave -> segmento com a versão atual
+        self.localizacao = {} if localizacao is None else localizacao
+        self.pasta = pasta
+        self.gravados = 0
+        self.gravacao = 0
+        for tabelas in segmentos:
+            self._anexar(tabelas)
+
+    @classmethod
+    def criar(cls, caminho, cnpj=None):
+        if cnpj is None:
+            cnpj = normalizar_documento(ler_primeira_chave(caminho))
+        tabelas = carregar_tabelas(caminho)
+        return cls(cnpj, agregar_tabelas(tabelas, cnpj, "exato"), [tabelas])
+
+    @classmethod
+    def abrir(cls, pasta):
+        # Lê o estado e o mapa de localização; nenhum segmento é lido aqui
+        documento = _ler_documento(pasta)
+        pasta_estado = os.path.join(pasta, documento["pasta_estado"])
+        localizacao = pd.read_parquet(os.path.join(pasta_estado, _ARQUIVO_LOCALIZACAO))
+        base = cls(
+            documento["cnpj"],
+            _juntar(documento["parcial"], pasta_estado),
+            localizacao=dict(
+                zip(
+                    localizacao[CHAVE].tolist(),
+                    localizacao["segmento"].tolist(),
+                )
+            ),
+            pasta=pasta,
+        )
+        base.segmentos = [None] * documento["segmentos"]
+        base.gravados = documento["segmentos"]
+        base.gravacao = documento["gravacao"]
+        return base
+
+    def _segmento(self, numero, chaves=None):
+        tabelas = self.segmentos[numero]
+        if tabelas is None:
+            return _ler_segmento(_pasta_segmento(self.pasta, numero), chaves)
+        if chaves is None:
+            return tabelas
+        return {
+            nome: tabela[tabela[CHAVE].isin(chaves)].reset_index(drop=True)
+            for nome, tabela in tabelas.items()
+        }
+
+    def salvar(self, pasta):
+        # Só os segmentos novos vão para o disco (todos, se a pasta é outra);
+        # estado.json é gravado por último, então um segmento ou pasta de estado
+        # órfãos (gravação interrompida) são ignorados e sobrescritos
+        os.makedirs(pasta, exist_ok=True)
+        gravados = self.gravados if pasta == self.pasta else 0
+        for numero in range(gravados, len(self.segmentos)):
+            _gravar_tabelas(_pasta_segmento(pasta, numero), self._segmento(numero))
+        gravacao = self.gravacao + 1
+        pasta_estado = f"estado-{gravacao:06d}"
+        tabelas = {}
+        documento = {
+            "versao": VERSAO_ESTADO,
+            "cnpj": self.cnpj,
+            "segmentos": len(self.segmentos),
+            "gravacao": gravacao,
+            "pasta_estado": pasta_estado,
+            "parcial": _separar(self.parcial, "", tabelas),
+        }
+        tabelas[_ARQUIVO_LOCALIZACAO[: -len(".parquet")]] = pd.DataFrame(
+            {
+                CHAVE: pd.Series(list(self.localizacao), dtype="string"),
+                "segmento": np.fromiter(
+                    self.localizacao.values(), np.int32, len(self.localizacao)
+                ),
+            }
+        )
+        _gravar_tabelas(os.path.join(pasta, pasta_estado), tabelas, indice=None)
+        temporario = os.path.join(pasta, f"{_ARQUIVO_ESTADO}.tmp-{os.getpid()}")
+        with open(temporario, "w", encoding="utf-8") as arquivo:
+            json.dump(documento, arquivo, ensure_ascii=False)
+        os.replace(temporario, os.path.join(pasta, _ARQUIVO_ESTADO))
+        for entrada in os.scandir(pasta):
+            if entrada.name.startswith("estado-") and entrada.name != pasta_estado:
+                shutil.rmtree(entrada.path, ignore_errors=True)
+        self.pasta, self.gravados, self.gravacao = pasta, len(self.segmentos), gravacao
+
+    def _anexar(self, tabelas):
+        # Processos sem chave não entram na localização e ficam sempre vivos
+        numero = len(self.segmentos)
+        self.segmentos.append(tabelas)
+        for chave in tabelas["processos"][CHAVE].dropna():
+            self.localizacao[chave] = numero
+
+    def _versoes_atuais(self, chaves):
+        # Linhas da versão atual de cada chave, em todas as tabelas, lidas só
+        # dos segmentos onde essas chaves estão
+        por_segmento = {}
+        for chave in chaves:
+            numero = self.localizacao.get(chave)
+            if numero is not None:
+                por_segmento.setdefault(numero, []).append(chave)
+        lidos = [
+            self._segmento(numero, chaves_segmento)
+            for numero, chaves_segmento in por_segmento.items()
+        ]
+        return {
+            nome: pd.concat([tabelas[nome] for tabelas in lidos], ignore_index=True)
+            for nome in TABELAS
+        }
+
+    def aplicar_delta(self, processos):
+        # Upsert: a última ocorrência de cada chave no delta é a que vale.
+        # Processos sem chave não substituem nada e entram como novos, como na
+        # carga (modelo.descartar_repetidos)
+        inicio = time.perf_counter()
+        unicos = {}
+        sem_chave = []
+        for processo in processos:
+            chave = processo.get(CHAVE)
+            if chave is None:
+                sem_chave.append(processo)
+            else:
+                unicos[chave] = processo
+        if not unicos and not sem_chave:
+            return {"novos": 0, "atualizados": 0, "segundos": 0.0}
+
+        # Mesma tipagem da carga (esquema.py), inclusive os códigos de período,
+        # para que todos os segmentos tenham as mesmas colunas
+        delta = tipar_tabelas(normalizar_lote([*unicos.values(), *sem_chave]))
+        parciais = [self.parcial, agregar_tabelas(delta, self.cnpj, "exato")]
+        atualizados = sum(1 for chave in unicos if chave in self.localizacao)
+        if atualizados:
+            antigas = self._versoes_atuais(unicos)
+            parciais.append(negar_parcial(agregar_tabelas(antigas, self.cnpj, "exato")))
+        self.parcial = sem_zeros(combinar_parciais(parciais))
+        self._anexar(delta)
+        return {
+            "novos": len(unicos) - atualizados + len(sem_chave),
+            "atualizados": atualizados,
+            "segundos": time.perf_counter() - inicio,
+        }
+
+    def tabelas(self):
+        # Versões atuais, na ordem dos segmentos (processos atualizados vão para
+        # o fim, como no estado mantido)
+        localizacao = pd.Index(list(self.localizacao))
+        segmentos = np.fromiter(self.localizacao.values(), np.int64, len(localizacao))
+        vivas = {nome: [] for nome in TABELAS}
+        for numero in range(len(self.segmentos)):
+            for nome, tabela in self._segmento(numero).items():
+                posicoes = localizacao.get_indexer(tabela[CHAVE])
+                atual = np.where(posicoes >= 0, segmentos[posicoes], -1)
+                vivas[nome].append(tabela[(posicoes < 0) | (atual == numero)])
+        return tipar_tabelas(
+            {
+                nome: pd.concat(partes, ignore_index=True)
+                for nome, partes in vivas.items()
+            }
+        )
+
+    @property
+    def processos(self):
+        # Versões atuais, inclusive as sem chave (que não estão na localização)
+        return int(self.parcial["indicadores"]["total_processos"])
+
+    def painel(self):
+        return painel_do_parcial(self.parcial, self.cnpj)
+
+
+def compactar(pasta):
+    # Reescreve a base num segmento só, sem as versões substituídas
+    base = BaseIncremental.abrir(pasta)
+    compacta = BaseIncremental(base.cnpj, base.parcial, [base.tabelas()])
+    temporaria = f"{pasta.rstrip(os.sep)}.tmp-{os.getpid()}"
+    antiga = f"{pasta.rstrip(os.sep)}.antiga-{os.getpid()}"
+    shutil.rmtree(temporaria, ignore_errors=True)
+    compacta.salvar(temporaria)
+    os.replace(pasta, antiga)
+    os.replace(temporaria, pasta)
+    shutil.rmtree(antiga, ignore_errors=True)
+    return compacta
+
+
+def _comparavel(parcial):
+    # O estado mantido e o recalculado têm os mesmos totais, mas categorias
+    # que surgem num delta entram depois das existentes: compara sem a ordem
+    def contagens(serie):
+        return {str(chave): int(valor) for chave, valor in serie.items()}
+
+    def linhas(tabela):
+        return sorted(
+            (
+                [None if pd.isna(valor) else valor for valor in linha]
+                for linha in tabela.itertuples()
+            ),
+            key=str,
+        )
+
+    return {
+        "indicadores": {
+            nome: float(valor) for nome, valor in parcial["indicadores"].items()
+        },
+        "contagens": {
+            nome: contagens(serie) for nome, serie in parcial["contagens"].items()
+        },
+        "top_5": {
+            nome: contagens(resumo.contagens)
+            for nome, resumo in parcial["top_5"].items()
+        },
+        "estados": linhas(parcial["estados"]),
+        "cubo_assuntos": linhas(parcial["cubo_assuntos"].drop(columns="ordem")),
+        "movimentacao": {
+            nome: contagens(serie) for nome, serie in parcial["movimentacao"].items()
+        },
+        "assuntos_com_titulo": int(parcial["assuntos_com_titulo"]),
+        "datas_distribuicao": int(parcial["datas_distribuicao"]),
+        "datas_arquivamento": int(parcial["datas_arquivamento"]),
+        "falhas_distribuicao": int(parcial["falhas_distribuicao"]),
+        "falhas_arquivamento": int(parcial["falhas_arquivamento"]),
+    }
+
+
+def verificar(base):
+    # Estado mantido contra o recálculo completo das tabelas atuais
+    referencia = agregar_tabelas(base.tabelas(), base.cnpj, "exato")
+    return diferencas(_comparavel(base.parcial), _comparavel(referencia), "estado")
+
+
+def _criar(args):
+    inicio = time.perf_counter()
+    base = BaseIncremental.criar(args.caminho, args.cnpj)
+    base.salvar(args.pasta)
+    print(
+        f"Base criada em {args.pasta}: "
+        f"{base.processos} processos em {time.perf_counter() - inicio:.2f}s"
+    )
+
+
+def _aplicar(args):
+    # Tempo total inclui abrir a base e gravar o estado, não só as agregações
+    inicio = time.perf_counter()
+    base = BaseIncremental.abrir(args.pasta)
+    print(f"Base aberta em {time.perf_counter() - inicio:.3f}s")
+    for caminho in args.deltas:
+        resumo = base.aplicar_delta(iterar_processos(caminho))
+        print(
+            f"{caminho}: {resumo['novos']} novos, {resumo['atualizados']} "
+            f"atualizados, agregações em {resumo['segundos']:.3f}s"
+        )
+    inicio_gravacao = time.perf_counter()
+    base.salvar(args.pasta)
+    fim = time.perf_counter()
+    print(
+        f"Base com {base.processos} processos; gravada em "
+        f"{fim - inicio_gravacao:.3f}s, {fim - inicio:.3f}s no total"
+    )
+
+
+def _verificar(args):
+    base = BaseIncremental.abrir(args.pasta)
+    problemas = verificar(base)
+    if problemas:
+        print(f"{len(problemas)} diferença(s) em relação ao recálculo:")
+        for problema in problemas[:20]:
+            print(f"  {problema}")
+        raise SystemExit(1)
+    print(f"Estado mantido confere com o recálculo ({base.processos} processos)")
+
+
+def _compactar(args):
+    base = compactar(args.pasta)
+    print(f"Base compactada: {base.processos} processos num segmento")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Base incremental de processos com agregações mantidas"
+    )
+    parser.add_argument(
+        "--pasta", default=DIRETORIO_INCREMENTAL or ".cache/incremental"
+    )
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    criar = subparsers.add_parser("criar", help="carga inicial a partir do JSON")
+    criar.add_argument("caminho", help="arquivo dados_empresa.json")
+    criar.add_argument("--cnpj", help="padrão: chave do arquivo")
+    criar.set_defaults(funcao=_criar)
+
+    aplicar = subparsers.add_parser(
+        "aplicar", help="insere ou atualiza processos a partir de deltas"
+    )
+    aplicar.add_argument("deltas", nargs="+", help="JSON no formato da exportação")
+    aplicar.set_defaults(funcao=_aplicar)
+
+    verificar_ = subparsers.add_parser(
+        "verificar", help="compara o estado mantido com o recálculo completo"
+    )
+    verificar_.set_defaults(funcao=_verificar)
+
+    compactar_ = subparsers.add_parser(
+        "compactar", help="descarta as versões substituídas"
+    )
+    compactar_.set_defaults(funcao=_compactar)
+
+    args = parser.parse_args(argv)
+    args.funcao(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from modelo import CHAVE
+
+POLOS = ("ATIVO", "PASSIVO")
+
+_NAO_DIGITOS = re.compile(r"\D")
+
+
+def normalizar_documento(documento):
+    # "90.400.888/0001-42" e "90400888000142" devem cair na mesma chave
+    if not isinstance(documento, str):
+        return None
+    return _NAO_DIGITOS.sub("", documento) or None
+
+
+def posicoes_por_chave(chaves_processos, chaves):
+    # Posição na tabela de processos de cada chave (-1 quando não está nela). A
+    # carga já descarta chaves repetidas (modelo.descartar_repetidos); se ainda
+    # assim houver repetição, vale a primeira aparição, como na carga, em vez do
+    # InvalidIndexError do get_indexer num índice não único. Chave nula não
+    # liga a nenhum processo, como num JOIN em SQL
+    indice = pd.Index(chaves_processos)
+    if indice.is_unique:
+        posicoes = indice.get_indexer(chaves)
+    else:
+        primeiras = np.flatnonzero(~indice.duplicated())
+        encontradas = indice[primeiras].get_indexer(chaves)
+        posicoes = np.where(encontradas >= 0, primeiras[encontradas], -1)
+    posicoes[pd.isna(np.asarray(chaves, dtype=object))] = -1
+    return posicoes
+
+
+def indexar_polos(partes, processos):
+    # Uma única passada pela tabela de partes: (cnpj, polo) -> posições dos processos
+    if "cnpj" not in partes.columns:
+        return {}
+    posicoes = posicoes_por_chave(processos[CHAVE], partes[CHAVE])
+    chaves = pd.DataFrame(
+        {
+            "cnpj": partes["cnpj"].astype("string").str.replace(r"\D", "", regex=True),
+            "polo": partes["polo"],
+            "posicao": posicoes,
+        }
+    )
+    chaves = chaves[(chaves["cnpj"].fillna("") != "") & (chaves["posicao"] >= 0)]
+    return {
+        chave: np.unique(grupo.to_numpy(dtype=np.int64))
+        for chave, grupo in chaves.groupby(["cnpj", "polo"])["posicao"]
+    }
+
+
+def posicoes_polo(indice, cnpj, polo):
+    return indice.get((normalizar_documento(cnpj), polo), np.empty(0, dtype=np.int64))
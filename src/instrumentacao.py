@@ -0,0 +1,131 @@
+import json
+import logging
+import os
+import sys
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+
+# Perfil opcional das seções da página: tempo de parede, tempo de CPU e variação
+# de memória residente. Cada seção também vira um registro JSON no logger
+# "prototipo.perfil", pronto para o agregador de logs. O perfil também estima o
+# tamanho do que cada execução envia ao navegador (tabelas e gráficos).
+logger = logging.getLogger("prototipo.perfil")
+
+_PAGINA = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def memoria_residente(pid=None):
+    # RSS atual em bytes (do próprio processo ou de `pid`); fora do Linux usa o
+    # pico (ru_maxrss) do próprio processo, que só cresce, e no Windows devolve 0
+    try:
+        with open(f"/proc/{pid or 'self'}/statm", "r") as arquivo:
+            return int(arquivo.read().split()[1]) * _PAGINA
+    except OSError:
+        if pid is not None:
+            return 0
+    try:
+        import resource
+    except ImportError:
+        return 0
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico if sys.platform == "darwin" else pico * 1024
+
+
+def memoria_proporcional(pid=None):
+    # PSS em bytes: as páginas compartilhadas (memory maps, bibliotecas) entram
+    # divididas pelo número de processos que as usam. Só no Linux; fora dele
+    # devolve None
+    try:
+        with open(f"/proc/{pid or 'self'}/smaps_rollup", "r") as arquivo:
+            for linha in arquivo:
+                if linha.startswith("Pss:"):
+                    return int(linha.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def tamanho_payload(objeto):
+    # Bytes aproximados de um elemento da página: gráficos Plotly vão em JSON e
+    # DataFrames em Arrow IPC, como o Streamlit os envia pelo websocket
+    if hasattr(objeto, "to_plotly_json"):
+        return len(objeto.to_json(validate=False).encode("utf-8"))
+    if isinstance(objeto, dict):
+        # Especificação Plotly já serializada (paineis_prontos.py)
+        return len(json.dumps(objeto, separators=(",", ":")).encode("utf-8"))
+    import pyarrow as pa
+
+    tabela = pa.Table.from_pandas(objeto)
+    saida = pa.BufferOutputStream()
+    with pa.ipc.new_stream(saida, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return saida.getvalue().size
+
+
+def configurar_log():
+    # Uma linha JSON por seção na saída de erro, se ninguém configurou o logger
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+def perfil_ativo(parametros=None):
+    # Ligado por PROTOTIPO_PERFIL=1 ou pelo parâmetro de URL ?perfil=1
+    valor = os.environ.get("PROTOTIPO_PERFIL", "")
+    if parametros is not None:
+        valor = parametros.get("perfil", valor)
+    return valor.lower() in ("1", "true", "sim")
+
+
+class Perfilador:
+    def __init__(self, ativo=True, contexto=None):
+        self.ativo = ativo
+        self.execucao = uuid.uuid4().hex[:12]
+        self.contexto = contexto or {}
+        self.registros = []
+        self.payloads = []
+
+    @contextmanager
+    def _medir(self, nome):
+        memoria_inicial = memoria_residente()
+        cpu_inicial = time.process_time()
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            registro = {
+                "evento": "secao",
+                "execucao": self.execucao,
+                "secao": nome,
+                "parede_s": round(time.perf_counter() - inicio, 6),
+                "cpu_s": round(time.process_time() - cpu_inicial, 6),
+                "memoria_delta_bytes": memoria_residente() - memoria_inicial,
+                **self.contexto,
+            }
+            self.registros.append(registro)
+            logger.info(json.dumps(registro, ensure_ascii=False))
+
+    def secao(self, nome):
+        return self._medir(nome) if self.ativo else nullcontext()
+
+    def payload(self, nome, objeto):
+        if not self.ativo:
+            return
+        registro = {
+            "evento": "payload",
+            "execucao": self.execucao,
+            "elemento": nome,
+            "bytes": tamanho_payload(objeto),
+            **self.contexto,
+        }
+        self.payloads.append(registro)
+        logger.info(json.dumps(registro, ensure_ascii=False))
+
+
+def secao(perfil, nome):
+    # Atalho para código que recebe o perfilador como parâmetro opcional
+    return perfil.secao(nome) if perfil is not None else nullcontext()
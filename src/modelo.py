@@ -0,0 +1,184 @@
+import numpy as np
+import pandas as pd
+
+from carregamento import TAMANHO_BLOCO, TAMANHO_LOTE, iterar_lotes_brutos
+from esquema import tipar_tabelas
+
+# Modelo relacional dos processos: uma tabela por lista aninhada do JSON, todas
+# ligadas à tabela "processos" por numeroProcessoUnico.
+CHAVE = "numeroProcessoUnico"
+TABELAS = ("processos", "partes", "advogados", "julgamentos", "assuntos")
+
+# Colunas de lista que viram tabelas próprias e saem da tabela de processos
+_LISTAS = ("partes", "assuntosCNJ", "statusPredictus.julgamentos")
+
+
+def _achatar(registro, prefixo="", destino=None):
+    # Mesmo formato de nomes do pd.json_normalize ("oab.numero"); listas são ignoradas
+    destino = {} if destino is None else destino
+    for chave, valor in registro.items():
+        if isinstance(valor, dict):
+            _achatar(valor, f"{prefixo}{chave}.", destino)
+        elif not isinstance(valor, list):
+            destino[f"{prefixo}{chave}"] = valor
+    return destino
+
+
+def normalizar_lote(lote):
+    partes = []
+    advogados = []
+    julgamentos = []
+    assuntos = []
+
+    for processo in lote:
+        numero = processo.get(CHAVE)
+        for parte in processo.get("partes") or []:
+            linha_parte = _achatar(parte, destino={CHAVE: numero})
+            partes.append(linha_parte)
+            for advogado in parte.get("advogados") or []:
+                linha = _achatar(advogado, destino={CHAVE: numero})
+                linha["polo"] = linha_parte.get("polo")
+                linha["parte"] = linha_parte.get("nome")
+                advogados.append(linha)
+        status = processo.get("statusPredictus") or {}
+        for julgamento in status.get("julgamentos") or []:
+            julgamentos.append(_achatar(julgamento, destino={CHAVE: numero}))
+        for assunto in processo.get("assuntosCNJ") or []:
+            assuntos.append(_achatar(assunto, destino={CHAVE: numero}))
+
+    processos = pd.json_normalize(lote)
+    processos = processos.drop(
+        columns=[coluna for coluna in _LISTAS if coluna in processos.columns]
+    )
+    return {
+        "processos": processos,
+        "partes": pd.DataFrame(partes, columns=_colunas(partes, ["polo", "nome"])),
+        "advogados": pd.DataFrame(
+            advogados,
+            columns=_colunas(advogados, ["polo", "parte", "nome", "oab.numero"]),
+        ),
+        "julgamentos": pd.DataFrame(
+            julgamentos, columns=_colunas(julgamentos, ["tipoJulgamento"])
+        ),
+        "assuntos": pd.DataFrame(
+            assuntos, columns=_colunas(assuntos, ["titulo", "ePrincipal"])
+        ),
+    }
+
+
+def _colunas(registros, obrigatorias):
+    # Garante as colunas usadas pelo painel mesmo quando o lote não as tem
+    colunas = dict.fromkeys([CHAVE, *obrigatorias])
+    for registro in registros:
+        colunas.update(dict.fromkeys(registro))
+    return list(colunas)
+
+
+def concatenar_tabelas(lotes):
+    lotes = list(lotes)
+    if not lotes:
+        return normalizar_lote([])
+    return {
+        nome: pd.concat([lote[nome] for lote in lotes], ignore_index=True)
+        for nome in TABELAS
+    }
+
+
+def descartar_repetidos(lotes):
+    # numeroProcessoUnico identifica o processo: uma chave repetida no arquivo
+    # fica só na primeira aparição. O descarte é feito nos dicionários, antes da
+    # normalização, para que as partes, advogados, julgamentos e assuntos do
+    # registro descartado saiam junto. Processos sem chave são mantidos.
+    vistos = set()
+    for lote in lotes:
+        unicos = []
+        for processo in lote:
+            chave = processo.get(CHAVE)
+            if chave is not None:
+                if chave in vistos:
+                    continue
+                vistos.add(chave)
+            unicos.append(processo)
+        yield unicos
+
+
+def carregar_tabelas(caminho, tamanho_lote=TAMANHO_LOTE, tamanho_bloco=TAMANHO_BLOCO):
+    # Tipos compactos só depois de concatenar: categorias de lotes diferentes
+    # não se combinam no pd.concat
+    lotes = iterar_lotes_brutos(caminho, tamanho_lote, tamanho_bloco)
+    tabelas = concatenar_tabelas(
+        normalizar_lote(lote) for lote in descartar_repetidos(lotes)
+    )
+    return tipar_tabelas(tabelas)
+
+
+# ========================== Consultas ==========================
+def contagem(serie, rotulo, coluna_total="Total"):
+    return tabela_contagem(contar(serie), rotulo, coluna_total)
+
+
+def contar(serie):
+    # Empates na ordem da primeira aparição, para que contagens parciais somadas
+    # (agregacao_paralela.py) produzam exatamente a mesma tabela
+    contagens = serie.value_counts(sort=False)
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        # Em categóricas o value_counts segue a ordem das categorias e inclui as
+        # que não aparecem na série
+        ordem = serie.dropna().unique()
+        contagens = contagens.reindex(ordem)
+        contagens.index = pd.Index(np.asarray(ordem), name=contagens.index.name)
+    return contagens
+
+
+def tabela_contagem(contagens, rotulo, coluna_total="Total"):
+    tabela = contagens.sort_values(ascending=False, kind="stable").reset_index()
+    tabela.columns = [rotulo, coluna_total]
+    return tabela
+
+
+def titulos_principais(assuntos):
+    principal = assuntos["ePrincipal"].fillna(False).astype(bool)
+    return assuntos.loc[principal, "titulo"]
+
+
+def partes_do_polo(partes, polo):
+    return partes.loc[partes["polo"] == polo, "nome"]
+
+
+def identidade_oab(advogados):
+    # "12345/SP": a inscrição identifica o advogado mesmo quando o nome vem
+    # escrito de formas diferentes; sem UF fica só o número
+    identidade = (
+        advogados["oab.numero"]
+        .astype("string")
+        .str.replace(r"[^0-9A-Za-z]", "", regex=True)
+        .str.upper()
+    )
+    if "oab.uf" in advogados.columns:
+        uf = advogados["oab.uf"].astype("string").str.strip().str.upper()
+        identidade = identidade + ("/" + uf).fillna("")
+    return identidade
+
+
+def advogados_do_polo(advogados, polo):
+    # Uma linha por atuação com OAB no polo: identidade da inscrição e nome
+    selecao = (advogados["polo"] == polo) & advogados["oab.numero"].notna()
+    selecionados = advogados.loc[selecao]
+    return pd.DataFrame(
+        {"oab": identidade_oab(selecionados), "nome": selecionados["nome"]}
+    )
+
+
+def primeiros_nomes(advogados_do_polo):
+    # Nome exibido para cada OAB: o da primeira aparição
+    nomes = pd.Series(
+        advogados_do_polo["nome"].to_numpy(dtype=object),
+        index=advogados_do_polo["oab"].to_numpy(dtype=object),
+    )
+    return nomes[~nomes.index.duplicated()]
+
+
+def tabela_advogados(contagens, nomes):
+    tabela = tabela_contagem(contagens, "OAB")
+    tabela.insert(0, "Parte", tabela["OAB"].map(nomes).to_numpy(dtype=object))
+    return tabela
@@ -0,0 +1,337 @@
+import argparse
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+from cache_processos import carregar_com_cache
+from frequentes import CAPACIDADES, MODO_RANKING, capacidade_ranking, resumir
+from geo_brasil import ESTADOS_BRASIL
+from indices import indexar_polos, posicoes_polo
+from instrumentacao import secao
+from modelo import (
+    advogados_do_polo,
+    carregar_tabelas,
+    contagem,
+    partes_do_polo,
+    primeiros_nomes,
+    tabela_advogados,
+    tabela_contagem,
+    titulos_principais,
+)
+from periodos import calcular_periodos, montar_cubos
+
+# Motor de agregação do painel, sem dependência do Streamlit. calcular_painel
+# devolve tudo o que a página desenha; serializar_painel transforma o resultado
+# num documento JSON compacto que pode ser gerado em lote e renderizado depois.
+VERSAO_DOCUMENTO = 2
+CNPJ_PADRAO = "90400888000142"
+
+
+# ========================== Indicadores Gerais ==========================
+def calcular_indicadores(processos, indice_polos, cnpj):
+    posicoes_ativo = posicoes_polo(indice_polos, cnpj, "ATIVO")
+    posicoes_passivo = posicoes_polo(indice_polos, cnpj, "PASSIVO")
+    valor_causa = processos["valorCausa.valor"]
+    valor_execucao = processos["statusPredictus.valorExecucao.valor"]
+    return {
+        "total_processos": len(processos),
+        "qtd_polo_ativo": len(posicoes_ativo),
+        "qtd_polo_passivo": len(posicoes_passivo),
+        "valor_total": float(valor_causa.sum()),
+        "valor_ativo": float(valor_causa.iloc[posicoes_ativo].sum()),
+        "valor_passivo": float(valor_causa.iloc[posicoes_passivo].sum()),
+        "valor_execucao": float(valor_execucao.sum()),
+        "valor_execucao_ativo": float(valor_execucao.iloc[posicoes_ativo].sum()),
+        "valor_execucao_passivo": float(valor_execucao.iloc[posicoes_passivo].sum()),
+    }
+
+
+# ========================== Distribuições ==========================
+def calcular_distribuicoes(tabelas):
+    processos = tabelas["processos"]
+    return {
+        "distribuicao_tipo_julgamento": contagem(
+            tabelas["julgamentos"]["tipoJulgamento"], "Categoria"
+        ),
+        "distribuicao_ramo_direito": contagem(
+            processos["statusPredictus.ramoDireito"], "Categoria"
+        ),
+        "distribuicao_status_processos": contagem(
+            processos["statusPredictus.statusProcesso"], "Categoria"
+        ),
+        "distribuicao_tribunal": contagem(processos["tribunal"], "Tribunal"),
+    }
+
+
+# ========================== Rankings ==========================
+def _top_5(partes, polo, capacidade):
+    # Resumo de frequentes (frequentes.py): exato enquanto as partes distintas
+    # cabem nos contadores
+    resumo = resumir(partes_do_polo(partes, polo).to_frame(), "nome", capacidade)
+    return cinco_primeiros(tabela_contagem(resumo.contagens, "Parte")), resumo
+
+
+def _top_5_advogados(advogados, polo, capacidade):
+    # Contados pela inscrição na OAB, não pelo nome
+    resumo = resumir(
+        advogados_do_polo(advogados, polo), "oab", capacidade, primeiros_nomes
+    )
+    return (
+        cinco_primeiros(tabela_advogados(resumo.contagens, resumo.rotulos)),
+        resumo,
+    )
+
+
+def cinco_primeiros(tabela):
+    tabela = tabela.head(5)
+    tabela.index = tabela.index + 1
+    return tabela
+
+
+def erros_top_5(resumos):
+    # Limites de erro dos Top 5 aproximados; vazio quando todos são exatos
+    return {
+        nome: resumo.limites() for nome, resumo in resumos.items() if not resumo.exato
+    }
+
+
+def calcular_rankings(tabelas, modo_ranking=MODO_RANKING):
+    capacidade = capacidade_ranking(modo_ranking)
+    partes = tabelas["partes"]
+    advogados = tabelas["advogados"]
+    rankings = {
+        "assuntos_principais": contagem(
+            titulos_principais(tabelas["assuntos"]), "Assunto"
+        ),
+        "classes": contagem(
+            tabelas["processos"]["classeProcessual.nome"], "Classe Processual"
+        ),
+    }
+    resumos = {}
+    for nome, polo in (
+        ("top_5_envolvidos_ativo", "ATIVO"),
+        ("top_5_envolvidos_passivo", "PASSIVO"),
+    ):
+        rankings[nome], resumos[nome] = _top_5(partes, polo, capacidade)
+    for nome, polo in (
+        ("top_5_advogados_ativo", "ATIVO"),
+        ("top_5_advogados_passivo", "PASSIVO"),
+    ):
+        rankings[nome], resumos[nome] = _top_5_advogados(advogados, polo, capacidade)
+    erros = erros_top_5(resumos)
+    if erros:
+        rankings["erros_top_5"] = erros
+    return rankings
+
+
+# ========================== Dados para Mapa ==========================
+def calcular_estados(processos):
+    # Quantidade de processos, % e valor total de causa por estado, com as 27 UFs
+    return completar_estados(agrupar_estados(processos))
+
+
+def agrupar_estados(processos):
+    return processos.groupby("uf").agg(
+        quantidade=("numeroProcessoUnico", "count"),
+        valor_total=("valorCausa.valor", "sum"),
+    )
+
+
+def completar_estados(df_estados):
+    df_estados = df_estados.reset_index()
+    df_estados["percentual"] = (
+        df_estados["quantidade"] / df_estados["quantidade"].sum()
+    ) * 100
+    df_estado_completo = pd.DataFrame(ESTADOS_BRASIL, columns=["uf"])
+    df_estado_completo = df_estado_completo.merge(
+        df_estados, on="uf", how="left"
+    ).fillna({"quantidade": 0, "percentual": 0, "valor_total": 0})
+    df_estado_completo["Label"] = (
+        df_estado_completo["uf"]
+        + ": "
+        + df_estado_completo["quantidade"].astype(str)
+        + " processos ("
+        + df_estado_completo["percentual"].map("{:.2f}".format)
+        + "%)"
+    )
+    return df_estado_completo
+
+
+# ========================== Painel ==========================
+# Seções do painel, na ordem da página. Cada uma pode ser calculada sozinha
+# (calcular_secao), para a página só agregar o que for aberto; só os
+# indicadores dependem do CNPJ consultado.
+SECOES = ("indicadores", "distribuicoes", "mapa", "rankings", "periodos")
+
+
+def calcular_secao(
+    tabelas, nome, cnpj=CNPJ_PADRAO, indice_polos=None, modo_ranking=MODO_RANKING
+):
+    # Devolve só as chaves do painel que pertencem à seção
+    processos = tabelas["processos"]
+    if nome == "indicadores":
+        if indice_polos is None:
+            indice_polos = indexar_polos(tabelas["partes"], processos)
+        return {"indicadores": calcular_indicadores(processos, indice_polos, cnpj)}
+    if nome == "distribuicoes":
+        return calcular_distribuicoes(tabelas)
+    if nome == "mapa":
+        return {"estados": calcular_estados(processos)}
+    if nome == "rankings":
+        return calcular_rankings(tabelas, modo_ranking)
+    if nome == "periodos":
+        periodos, avisos = calcular_periodos(processos)
+        return {
+            "avisos": avisos,
+            "cubos_periodo": montar_cubos(periodos, tabelas["assuntos"]),
+        }
+    raise ValueError(f"Seção desconhecida: {nome!r}")
+
+
+def calcular_painel(
+    tabelas, cnpj=CNPJ_PADRAO, indice_polos=None, perfil=None, modo_ranking=MODO_RANKING
+):
+    # perfil: Perfilador opcional (instrumentacao.py) para medir cada etapa
+    if indice_polos is None:
+        with secao(perfil, "painel.indice_polos"):
+            indice_polos = indexar_polos(tabelas["partes"], tabelas["processos"])
+    painel = {"versao": VERSAO_DOCUMENTO, "cnpj": cnpj}
+    for nome in SECOES:
+        with secao(perfil, f"painel.{nome}"):
+            painel.update(
+                calcular_secao(tabelas, nome, cnpj, indice_polos, modo_ranking)
+            )
+    return painel
+
+
+def _valor_json(valor):
+    if valor is None or valor is pd.NA or valor is pd.NaT:
+        return None
+    if isinstance(valor, np.generic):
+        valor = valor.item()
+    if isinstance(valor, float) and np.isnan(valor):
+        return None
+    return valor
+
+
+def _para_documento(objeto):
+    if isinstance(objeto, pd.DataFrame):
+        return {
+            "__tabela__": {
+                "colunas": [str(coluna) for coluna in objeto.columns],
+                "indice": [_valor_json(valor) for valor in objeto.index],
+                "linhas": [
+                    [_valor_json(valor) for valor in linha]
+                    for linha in objeto.itertuples(index=False)
+                ],
+            }
+        }
+    if isinstance(objeto, pd.Series):
+        return {
+            "__serie__": {
+                "nome": objeto.name,
+                "niveis": list(objeto.index.names),
+                "tabela": _para_documento(objeto.reset_index()),
+            }
+        }
+    if isinstance(objeto, dict):
+        return {chave: _para_documento(valor) for chave, valor in objeto.items()}
+    return _valor_json(objeto)
+
+
+def _de_documento(objeto):
+    if not isinstance(objeto, dict):
+        return objeto
+    if set(objeto) == {"__tabela__"}:
+        tabela = objeto["__tabela__"]
+        return pd.DataFrame(
+            tabela["linhas"], columns=tabela["colunas"], index=tabela["indice"]
+        )
+    if set(objeto) == {"__serie__"}:
+        serie = objeto["__serie__"]
+        tabela = _de_documento(serie["tabela"])
+        nome = tabela.columns[-1]
+        return tabela.set_index(serie["niveis"])[nome].rename(serie["nome"])
+    return {chave: _de_documento(valor) for chave, valor in objeto.items()}
+
+
+def serializar_painel(painel):
+    return _para_documento(painel)
+
+
+def desserializar_painel(documento):
+    if documento.get("versao") != VERSAO_DOCUMENTO:
+        raise ValueError(
+            f"Versão de documento não suportada: {documento.get('versao')!r}"
+        )
+    return _de_documento(documento)
+
+
+def salvar_painel(painel, caminho):
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(
+            serializar_painel(painel),
+            arquivo,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+
+
+def carregar_painel(caminho):
+    with open(caminho, "r", encoding="utf-8") as arquivo:
+        return desserializar_painel(json.load(arquivo))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Calcula o painel de uma empresa e grava o documento JSON"
+    )
+    parser.add_argument("caminho", help="arquivo dados_empresa.json")
+    parser.add_argument("--cnpj", default=CNPJ_PADRAO)
+    parser.add_argument("--saida", help="arquivo de saída (padrão: stdout)")
+    parser.add_argument(
+        "--sem-cache", action="store_true", help="não usa o cache Parquet"
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["pandas", "duckdb"],
+        default="pandas",
+        help="duckdb consulta o cache Parquet em SQL (consultas_sql.py)",
+    )
+    parser.add_argument(
+        "--ranking",
+        choices=list(CAPACIDADES),
+        help=(
+            "Top 5 de partes e advogados exato ou aproximado (frequentes.py); "
+            f"padrão: {MODO_RANKING}. Com --backend duckdb o Top 5 é sempre exato"
+        ),
+    )
+    args = parser.parse_args(argv)
+    if args.backend == "duckdb" and args.ranking not in (None, "exato"):
+        parser.error("--backend duckdb calcula o Top 5 exato; --ranking não se aplica")
+
+    if args.backend == "duckdb":
+        # Importação tardia: consultas_sql depende deste módulo
+        from consultas_sql import calcular_painel_sql
+
+        painel = calcular_painel_sql(args.caminho, args.cnpj)
+    else:
+        if args.sem_cache:
+            tabelas = carregar_tabelas(args.caminho)
+        else:
+            tabelas, _ = carregar_com_cache(args.caminho)
+        painel = calcular_painel(
+            tabelas, args.cnpj, modo_ranking=args.ranking or MODO_RANKING
+        )
+
+    if args.saida:
+        salvar_painel(painel, args.saida)
+    else:
+        json.dump(serializar_painel(painel), sys.stdout, ensure_ascii=False)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
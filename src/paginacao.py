@@ -0,0 +1,45 @@
+import math
+
+import pandas as pd
+
+# Recortes das tabelas de categorias antes de irem para o navegador. Com dados
+# reais, assuntos e classes chegam a milhares de linhas: as tabelas vão por
+# página (ordenadas no servidor) e os gráficos de barras mostram as maiores
+# categorias e uma barra "Outros" com a soma das demais.
+LINHAS_POR_PAGINA = 50
+LIMITE_BARRAS = 15
+ROTULO_OUTROS = "Outros"
+
+
+def agrupar_outros(tabela, limite=LIMITE_BARRAS, coluna_total="Total"):
+    # tabela no formato de modelo.contagem (já em ordem decrescente); a barra
+    # "Outros" entra por último, seja qual for o seu total
+    if len(tabela) <= limite:
+        return tabela
+    principais = tabela.head(limite)
+    restantes = tabela.iloc[limite:]
+    outros = {coluna: None for coluna in tabela.columns}
+    outros[tabela.columns[0]] = f"{ROTULO_OUTROS} ({len(restantes):n} categorias)"
+    outros[coluna_total] = restantes[coluna_total].sum()
+    return pd.concat(
+        [principais, pd.DataFrame([outros], columns=tabela.columns)],
+        ignore_index=True,
+    ).astype({coluna_total: tabela[coluna_total].dtype})
+
+
+def total_paginas(linhas, tamanho=LINHAS_POR_PAGINA):
+    return max(1, math.ceil(linhas / tamanho))
+
+
+def pagina_ordenada(
+    tabela, pagina, tamanho=LINHAS_POR_PAGINA, coluna=None, crescente=False
+):
+    # pagina começa em 1; a ordenação é estável, então com a coluna "Total"
+    # decrescente a tabela mantém a ordem (e os desempates) de modelo.contagem
+    if coluna is not None:
+        tabela = tabela.sort_values(
+            coluna, ascending=crescente, kind="stable", na_position="last"
+        )
+    pagina = min(max(pagina, 1), total_paginas(len(tabela), tamanho))
+    inicio = (pagina - 1) * tamanho
+    return tabela.iloc[inicio : inicio + tamanho]
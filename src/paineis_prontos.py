@@ -0,0 +1,204 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import plotly.io as pio
+
+from cache_processos import carregar_com_cache, chave_cache, chave_fonte
+from figuras import (
+    assuntos_periodo,
+    barras_horizontais,
+    barras_verticais,
+    distribuidos_arquivados,
+    mapa_estados,
+)
+from frequentes import MODO_RANKING
+from geo_brasil import CAMINHO_GEOJSON, carregar_geojson_estados
+from indices import normalizar_documento
+from motor import (
+    CNPJ_PADRAO,
+    VERSAO_DOCUMENTO,
+    calcular_painel,
+    desserializar_painel,
+    serializar_painel,
+)
+from periodos import fatiar_assuntos, fatiar_movimentacao
+
+# Painéis prontos para a partida a frio: por arquivo de dados e CNPJ, um JSON
+# com o painel já agregado (motor.serializar_painel) e as especificações Plotly
+# dos gráficos, as mesmas que a página enviaria ao navegador. A página só lê o
+# arquivo, sem carregar tabelas nem montar figuras.
+#
+# O nome do arquivo leva a impressão digital da origem: versão do arquivo de
+# dados (cache_processos.chave_cache), CNPJ, versões dos formatos, modo do
+# ranking e a geometria do mapa. Enquanto ela não muda o painel é só lido;
+# quando muda, é recalculado e substitui o anterior.
+#
+# PROTOTIPO_PAINEIS aponta a pasta e liga o modo na página. O aquecimento grava
+# os painéis antes do primeiro acesso, na subida do servidor:
+#   export PROTOTIPO_PAINEIS=.cache/paineis
+#   python src/paineis_prontos.py src/dados_empresa.json && streamlit run ...
+DIRETORIO_PAINEIS = os.environ.get("PROTOTIPO_PAINEIS", "")
+VERSAO_PAINEL_PRONTO = 1
+
+
+def impressao_digital(
+    caminho, cnpj, modo_ranking=MODO_RANKING, geojson=CAMINHO_GEOJSON
+):
+    partes = [
+        chave_cache(caminho),
+        normalizar_documento(cnpj),
+        VERSAO_DOCUMENTO,
+        VERSAO_PAINEL_PRONTO,
+        modo_ranking,
+    ]
+    if os.path.exists(geojson):
+        info = os.stat(geojson)
+        partes += [info.st_size, info.st_mtime_ns]
+    texto = "|".join(str(parte) for parte in partes)
+    return hashlib.sha1(texto.encode("utf-8")).hexdigest()[:16]
+
+
+def _prefixo(caminho, cnpj):
+    return f"{chave_fonte(caminho)}-{normalizar_documento(cnpj) or ''}-"
+
+
+def figuras_do_painel(painel, geojson=None):
+    # Gráficos que não dependem de seletores, mais os da Análise por Período na
+    # seleção inicial (todos os anos e meses, agrupados por mês)
+    cubos = painel["cubos_periodo"]
+    figuras = {
+        "grafico_status": barras_horizontais(painel["distribuicao_status_processos"]),
+        "grafico_ramo": barras_verticais(painel["distribuicao_ramo_direito"]),
+        "grafico_tribunal": barras_verticais(
+            painel["distribuicao_tribunal"], "Tribunal"
+        ),
+        "grafico_julgamentos": barras_horizontais(
+            painel["distribuicao_tipo_julgamento"]
+        ),
+        "periodo_assuntos": assuntos_periodo(fatiar_assuntos(cubos)),
+        "periodo_distribuidos_arquivados": distribuidos_arquivados(
+            fatiar_movimentacao(cubos)
+        ),
+    }
+    if geojson is not None:
+        figuras["grafico_mapa"] = mapa_estados(painel["estados"], geojson)
+    return {
+        nome: json.loads(pio.to_json(figura, validate=False))
+        for nome, figura in figuras.items()
+    }
+
+
+def montar_painel_pronto(
+    caminho, cnpj=CNPJ_PADRAO, modo_ranking=MODO_RANKING, geojson=CAMINHO_GEOJSON
+):
+    tabelas, _ = carregar_com_cache(caminho)
+    painel = calcular_painel(
+        tabelas, normalizar_documento(cnpj), modo_ranking=modo_ranking
+    )
+    return {
+        "versao": VERSAO_PAINEL_PRONTO,
+        "painel": serializar_painel(painel),
+        "figuras": figuras_do_painel(painel, carregar_geojson_estados(geojson)),
+    }
+
+
+def _gravar(arquivo, documento):
+    temporario = f"{arquivo}.tmp-{os.getpid()}"
+    with open(temporario, "w", encoding="utf-8") as saida:
+        json.dump(documento, saida, ensure_ascii=False, separators=(",", ":"))
+    os.replace(temporario, arquivo)
+
+
+def _remover_versoes_antigas(diretorio, prefixo, atual):
+    for entrada in os.scandir(diretorio):
+        if (
+            entrada.is_file()
+            and entrada.name.startswith(prefixo)
+            and entrada.name != atual
+            and ".tmp-" not in entrada.name
+        ):
+            os.remove(entrada.path)
+
+
+def atualizar_painel_pronto(
+    caminho,
+    cnpj=CNPJ_PADRAO,
+    diretorio=DIRETORIO_PAINEIS,
+    modo_ranking=MODO_RANKING,
+    geojson=CAMINHO_GEOJSON,
+):
+    # Arquivo da impressão atual e o documento quando precisou ser gerado agora
+    # (None quando já existia)
+    prefixo = _prefixo(caminho, cnpj)
+    nome = f"{prefixo}{impressao_digital(caminho, cnpj, modo_ranking, geojson)}.json"
+    arquivo = os.path.join(diretorio, nome)
+    if os.path.exists(arquivo):
+        return arquivo, None
+    documento = montar_painel_pronto(caminho, cnpj, modo_ranking, geojson)
+    os.makedirs(diretorio, exist_ok=True)
+    _gravar(arquivo, documento)
+    _remover_versoes_antigas(diretorio, prefixo, nome)
+    return arquivo, documento
+
+
+def abrir_painel_pronto(
+    caminho,
+    cnpj=CNPJ_PADRAO,
+    diretorio=DIRETORIO_PAINEIS,
+    modo_ranking=MODO_RANKING,
+    geojson=CAMINHO_GEOJSON,
+):
+    # Devolve ({"painel", "figuras"}, info); origem "pronto" quando o arquivo da
+    # impressão atual já existia e "recalculado" quando foi gerado agora
+    inicio = time.perf_counter()
+    arquivo, documento = atualizar_painel_pronto(
+        caminho, cnpj, diretorio, modo_ranking, geojson
+    )
+    origem = "pronto" if documento is None else "recalculado"
+    if documento is None:
+        with open(arquivo, "r", encoding="utf-8") as entrada:
+            documento = json.load(entrada)
+    pronto = {
+        "painel": desserializar_painel(documento["painel"]),
+        "figuras": documento["figuras"],
+    }
+    return pronto, {"origem": origem, "segundos": time.perf_counter() - inicio}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Aquecimento: grava os painéis prontos que estiverem desatualizados"
+    )
+    parser.add_argument("caminhos", nargs="+", help="arquivos dados_empresa.json")
+    parser.add_argument(
+        "--cnpj",
+        action="append",
+        help="CNPJ consultado (repetível; padrão: PROTOTIPO_CNPJ ou o da página)",
+    )
+    parser.add_argument(
+        "--diretorio",
+        default=DIRETORIO_PAINEIS or None,
+        required=not DIRETORIO_PAINEIS,
+        help="pasta dos painéis (padrão: PROTOTIPO_PAINEIS)",
+    )
+    args = parser.parse_args(argv)
+
+    cnpjs = args.cnpj or [os.environ.get("PROTOTIPO_CNPJ", CNPJ_PADRAO)]
+    inicio = time.perf_counter()
+    for caminho in args.caminhos:
+        for cnpj in cnpjs:
+            inicio_painel = time.perf_counter()
+            arquivo, documento = atualizar_painel_pronto(caminho, cnpj, args.diretorio)
+            situacao = "já atualizado" if documento is None else "recalculado"
+            print(
+                f"{caminho} ({cnpj}): {situacao} em "
+                f"{time.perf_counter() - inicio_painel:.2f}s -> {arquivo}"
+            )
+    print(f"Painéis em {args.diretorio} ({time.perf_counter() - inicio:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
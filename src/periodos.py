@@ -0,0 +1,200 @@
+import numpy as np
+import pandas as pd
+
+from esquema import PERIODO_INVALIDO, PERIODOS, codificar_periodo
+from modelo import CHAVE
+
+# Cubos pré-agregados da "Análise por Período". São montados uma vez na carga;
+# cada combinação de ano/mês nos seletores vira um recorte de uma tabela cujo
+# tamanho depende do número de períodos e assuntos, não do número de processos.
+# As datas chegam como códigos aaaamm (esquema.py); as contagens por período
+# saem de np.bincount sobre o índice do mês (ano * 12 + mês - 1), sem groupby.
+_PERIODO_DISTRIBUICAO = ["anoDistribuicao", "mesDistribuicao"]
+_PERIODO_ARQUIVAMENTO = ["anoArquivamento", "mesArquivamento"]
+
+
+def montar_cubo_assuntos(processos, assuntos):
+    # (ano, mês, assunto principal) -> total; "ordem" guarda a primeira aparição
+    # para desempatar como o value_counts sobre os processos filtrados
+    principal = assuntos["ePrincipal"].fillna(False).astype(bool)
+    principais = assuntos.loc[principal & assuntos["titulo"].notna(), [CHAVE, "titulo"]]
+    principais = principais.assign(ordem=range(len(principais)))
+    # Chave nula não liga a nenhum processo (no merge, NaN casaria com NaN)
+    principais = principais.merge(
+        processos.reindex(columns=[CHAVE, *_PERIODO_DISTRIBUICAO]).dropna(
+            subset=[CHAVE]
+        ),
+        on=CHAVE,
+        how="left",
+    )
+    return (
+        principais.groupby([*_PERIODO_DISTRIBUICAO, "titulo"], dropna=False)
+        .agg(Total=("ordem", "size"), ordem=("ordem", "min"))
+        .reset_index()
+    )
+
+
+def _contar_periodos(processos, colunas):
+    vazia = pd.Series(
+        [], index=pd.MultiIndex.from_tuples([], names=colunas), dtype="int64"
+    )
+    if not set(colunas) <= set(processos.columns):
+        return vazia
+    anos, meses = (processos[coluna] for coluna in colunas)
+    validos = (anos.notna() & meses.notna()).to_numpy(dtype=bool)
+    if not validos.any():
+        return vazia
+    indices = anos.to_numpy(dtype=np.int64, na_value=0)[validos] * 12 + (
+        meses.to_numpy(dtype=np.int64, na_value=0)[validos] - 1
+    )
+    primeiro = indices.min()
+    contagens = np.bincount(indices - primeiro)
+    presentes = np.flatnonzero(contagens)
+    indices = presentes + primeiro
+    return pd.Series(
+        contagens[presentes],
+        index=pd.MultiIndex.from_arrays(
+            [
+                pd.array(indices // 12, dtype="Int16"),
+                pd.array(indices % 12 + 1, dtype="Int8"),
+            ],
+            names=colunas,
+        ),
+    )
+
+
+def montar_cubo_movimentacao(processos):
+    # Processos distribuídos e arquivados por (ano, mês)
+    return {
+        "distribuidos": _contar_periodos(processos, _PERIODO_DISTRIBUICAO),
+        "arquivados": _contar_periodos(processos, _PERIODO_ARQUIVAMENTO),
+    }
+
+
+def montar_cubos(processos, assuntos):
+    return {
+        "assuntos": montar_cubo_assuntos(processos, assuntos),
+        "movimentacao": montar_cubo_movimentacao(processos),
+    }
+
+
+def anos_com_dados(cubos):
+    return sorted(
+        cubos["movimentacao"]["distribuidos"].index.get_level_values(0).unique()
+    )
+
+
+def meses_com_dados(cubos, ano=None):
+    distribuidos = cubos["movimentacao"]["distribuidos"]
+    if ano is not None:
+        distribuidos = distribuidos[distribuidos.index.get_level_values(0) == ano]
+    return sorted(distribuidos.index.get_level_values(1).unique())
+
+
+def fatiar_assuntos(cubos, ano=None, mes=None):
+    # ano/mes None equivalem a "Todos os anos"/"Todos os meses"
+    cubo = cubos["assuntos"]
+    if ano is not None:
+        cubo = cubo[cubo["anoDistribuicao"] == ano]
+    if mes is not None:
+        cubo = cubo[cubo["mesDistribuicao"] == mes]
+    tabela = (
+        cubo.groupby("titulo")
+        .agg(Total=("Total", "sum"), ordem=("ordem", "min"))
+        .sort_values(["Total", "ordem"], ascending=[False, True])
+        .reset_index()
+    )
+    tabela = tabela[["titulo", "Total"]]
+    tabela.columns = ["Assunto", "Total"]
+    return tabela
+
+
+# Agrupamentos do gráfico Distribuídos x Arquivados: coluna do eixo x e a
+# posição de cada (ano, mês) no vetor de contagens
+GRANULARIDADES = {
+    "mes": "Mes",
+    "trimestre": "Trimestre",
+    "ano": "Ano",
+}
+
+
+def _somar_por(contagens, ano, mes, granularidade, primeiro_ano):
+    anos = contagens.index.get_level_values(0).to_numpy(dtype=np.int64, na_value=0)
+    meses = contagens.index.get_level_values(1).to_numpy(dtype=np.int64, na_value=0)
+    selecao = np.ones(len(contagens), dtype=bool)
+    if ano is not None:
+        selecao &= anos == ano
+    if mes is not None:
+        selecao &= meses == mes
+    if granularidade == "mes":
+        posicoes, tamanho = meses - 1, 12
+    elif granularidade == "trimestre":
+        posicoes, tamanho = (meses - 1) // 3, 4
+    else:
+        posicoes = anos - primeiro_ano
+        tamanho = int(posicoes.max(initial=-1)) + 1
+    return np.bincount(
+        posicoes[selecao],
+        weights=contagens.to_numpy(dtype=np.float64)[selecao],
+        minlength=tamanho,
+    ).astype(np.int64)
+
+
+def fatiar_movimentacao(cubos, ano=None, mes=None, granularidade="mes"):
+    # Vetores de tamanho fixo (12 meses, 4 trimestres ou os anos com dados);
+    # só os períodos com algum processo distribuído ou arquivado ficam na tabela
+    if granularidade not in GRANULARIDADES:
+        raise ValueError(
+            f"Granularidade desconhecida: {granularidade!r} "
+            f"(opções: {', '.join(GRANULARIDADES)})"
+        )
+    movimentacao = cubos["movimentacao"]
+    anos = [
+        movimentacao[nome].index.get_level_values(0)
+        for nome in ("distribuidos", "arquivados")
+    ]
+    primeiro_ano = int(min((min(nivel) for nivel in anos if len(nivel)), default=0))
+    distribuidos, arquivados = (
+        _somar_por(movimentacao[nome], ano, mes, granularidade, primeiro_ano)
+        for nome in ("distribuidos", "arquivados")
+    )
+    tamanho = max(len(distribuidos), len(arquivados))
+    distribuidos = np.pad(distribuidos, (0, tamanho - len(distribuidos)))
+    arquivados = np.pad(arquivados, (0, tamanho - len(arquivados)))
+    rotulos = np.arange(tamanho) + (primeiro_ano if granularidade == "ano" else 1)
+    presentes = (distribuidos > 0) | (arquivados > 0)
+    return pd.DataFrame(
+        {
+            GRANULARIDADES[granularidade]: rotulos[presentes],
+            "Distribuídos": distribuidos[presentes],
+            "Arquivados": arquivados[presentes],
+        }
+    )
+
+
+def _codigos(processos, coluna):
+    # Códigos da carga quando existem; senão, a mesma conversão aqui
+    codigo = PERIODOS["processos"][coluna]
+    if codigo in processos.columns:
+        return processos[codigo]
+    if coluna in processos.columns:
+        return codificar_periodo(processos[coluna])
+    return pd.Series(pd.NA, index=processos.index, dtype="Int32")
+
+
+def calcular_periodos(processos):
+    # Ano e mês de distribuição e de arquivamento, sem alterar a tabela de
+    # processos; "falhas_*" conta as datas preenchidas em formato desconhecido
+    colunas = {CHAVE: processos[CHAVE]}
+    avisos = {}
+    for coluna, sufixo, aviso in (
+        ("dataDistribuicao", "Distribuicao", "distribuicao_invalida"),
+        ("statusPredictus.dataArquivamento", "Arquivamento", "arquivamento_ausente"),
+    ):
+        codigos = _codigos(processos, coluna)
+        validos = codigos.where(codigos != PERIODO_INVALIDO)
+        colunas[f"ano{sufixo}"] = (validos // 100).astype("Int16")
+        colunas[f"mes{sufixo}"] = (validos % 100).astype("Int8")
+        avisos[aviso] = bool(validos.isna().all())
+        avisos[f"falhas_{sufixo.lower()}"] = int((codigos == PERIODO_INVALIDO).sum())
+    return pd.DataFrame(colunas), avisos
@@ -1,614 +1,842 @@
-import json
+import os
+
 from babel.numbers import format_currency
 
 import pandas as pd
-import plotly.express as px
-import requests
 import streamlit as st
 
-with open("src/dados_empresa.json", "r") as file:
-    json_data = file.read()
+from amostragem import (
+    MODO_INDICADORES,
+    NIVEL_CONFIANCA,
+    em_segundo_plano,
+    estimar_secao_indicadores,
+)
+from busca import indexar_busca
+from cache_processos import chave_cache
+from carteira import (
+    DIRETORIO_CARTEIRA,
+    abrir_carteira_pronta,
+    calcular_carteira,
+    listar_arquivos,
+)
+from consultas_sql import BACKEND_PADRAO, calcular_secao_sql
+from figuras import (
+    ROTULOS_GRANULARIDADE,
+    assuntos_periodo,
+    barras_horizontais,
+    barras_verticais,
+    distribuidos_arquivados,
+    mapa_estados,
+)
+from geo_brasil import carregar_geojson_estados
+from incremental import DIRETORIO_INCREMENTAL, painel_incremental, versao_base
+from indices import indexar_polos, normalizar_documento
+from instrumentacao import Perfilador, configurar_log, perfil_ativo
+from motor import CNPJ_PADRAO, calcular_secao, carregar_painel
+from paginacao import pagina_ordenada, total_paginas
+from paineis_prontos import DIRETORIO_PAINEIS, abrir_painel_pronto, impressao_digital
+from periodos import (
+    anos_com_dados,
+    fatiar_assuntos,
+    fatiar_movimentacao,
+    meses_com_dados,
+)
+from snapshot import abrir_snapshot
 
-json_dict = json.loads(json_data)
-primeira_chave = next(iter(json_dict))
-processos = json_dict[primeira_chave]
-df = pd.json_normalize(processos)
-df = df[:1000]
+st.set_page_config(
+    layout="wide",
+    page_title="Visão Geral da Plataforma - Pessoa/Empresa",
+    page_icon="📊",
+)
 
-# ========================== Indicadores Gerais ==========================
-total_processos = len(df)
 
-# Filtrar processos que tenham o CNPJ '90.400.888/0001-42'
-cnpj_alvo = "90400888000142"
+# Tabelas normalizadas por versão dos dados, abertas por memory map do snapshot
+# Arrow (snapshot.py): todas as sessões deste processo usam o mesmo objeto, e
+# outros processos que abrem a mesma versão compartilham as páginas do arquivo
+@st.cache_resource(show_spinner=False, max_entries=4)
+def tabelas_da_versao(caminho, chave):
+    return abrir_snapshot(caminho)
 
-qtd_polo_ativo = len(
-    df[
-        df["partes"].apply(
-            lambda partes: any(
-                p.get("polo") == "ATIVO" and p.get("cnpj") == cnpj_alvo for p in partes
-            )
-        )
-    ]
-)
-qtd_polo_passivo = len(
-    df[
-        df["partes"].apply(
-            lambda partes: any(
-                p.get("polo") == "PASSIVO" and p.get("cnpj") == cnpj_alvo
-                for p in partes
-            )
-        )
-    ]
-)
 
-# Valor total de causa e valores por polo considerando o CNPJ alvo
-valor_total = df["valorCausa.valor"].sum()
-valor_ativo = df[
-    df["partes"].apply(
-        lambda partes: any(
-            p.get("polo") == "ATIVO" and p.get("cnpj") == cnpj_alvo for p in partes
-        )
-    )
-]["valorCausa.valor"].sum()
-valor_passivo = df[
-    df["partes"].apply(
-        lambda partes: any(
-            p.get("polo") == "PASSIVO" and p.get("cnpj") == cnpj_alvo for p in partes
-        )
+# Índice (cnpj, polo) -> linhas, construído uma única vez por versão dos dados
+@st.cache_resource(show_spinner=False)
+def indexar_polos_da_versao(chave, _tabelas):
+    return indexar_polos(_tabelas["partes"], _tabelas["processos"])
+
+
+# Índice invertido de partes, documentos e OABs para a busca (busca.py)
+@st.cache_resource(show_spinner=False)
+def indice_busca_da_versao(chave, _tabelas):
+    return indexar_busca(_tabelas)
+
+
+# Indicadores da empresa consultada: a única seção calculada antes da primeira
+# pintura, memorizada por versão dos dados e CNPJ
+@st.cache_resource(show_spinner=False, max_entries=32)
+def indicadores_da_empresa(chave, cnpj, _tabelas):
+    return calcular_secao(
+        _tabelas, "indicadores", cnpj, indexar_polos_da_versao(chave, _tabelas)
     )
-]["valorCausa.valor"].sum()
 
-# Valor total de execução e valores por polo considerando o CNPJ alvo
-valor_execucao = df["statusPredictus.valorExecucao.valor"].sum()
-valor_execucao_ativo = df[
-    df["partes"].apply(
-        lambda partes: any(
-            p.get("polo") == "ATIVO" and p.get("cnpj") == cnpj_alvo for p in partes
+
+# Modo aproximado (amostragem.py): estimativas da amostra para a primeira
+# pintura e o cálculo exato em segundo plano. O trabalho de fundo chama a mesma
+# função memorizada acima, então o resultado exato fica no cache e as execuções
+# seguintes o usam pelo caminho normal.
+@st.cache_resource(show_spinner=False, max_entries=32)
+def estimativas_da_empresa(chave, cnpj, _tabelas):
+    return estimar_secao_indicadores(_tabelas, cnpj)
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def exatos_em_segundo_plano(chave, cnpj, _tabelas):
+    return em_segundo_plano(indicadores_da_empresa, chave, cnpj, _tabelas)
+
+
+# As demais seções (motor.SECOES) não dependem do CNPJ: cada uma é calculada na
+# primeira vez que a sua aba é aberta e fica memorizada por versão dos dados
+@st.cache_resource(show_spinner="Calculando a seção...", max_entries=16)
+def secao_da_versao(chave, nome, _tabelas):
+    return calcular_secao(_tabelas, nome)
+
+
+# Seções do backend SQL, memorizadas da mesma forma que as do pandas
+@st.cache_resource(show_spinner="Calculando a seção...", max_entries=32)
+def secao_sql_da_versao(caminho, chave, nome, cnpj):
+    return calcular_secao_sql(caminho, nome, cnpj)
+
+
+# Painéis de todas as empresas da carteira, uma vez por conjunto de versões dos
+# arquivos; trocar de empresa é só uma busca no resultado. O cálculo paralelo fica
+# no aquecimento (python src/carteira.py <pasta>); sem a carteira pronta, o
+# cálculo é em série, sem pool de processos dentro do servidor
+@st.cache_resource(show_spinner="Calculando a carteira...", max_entries=2)
+def carteira_da_versao(versoes):
+    caminhos = [caminho for caminho, _ in versoes]
+    carteira = abrir_carteira_pronta(caminhos)
+    if carteira is None:
+        carteira = calcular_carteira(caminhos, trabalhadores=1)
+    return carteira
+
+
+# Painel da base incremental (incremental.py), refeito só quando um delta é
+# aplicado; lê apenas o estado agregado, sem as tabelas
+@st.cache_resource(show_spinner=False, max_entries=2)
+def painel_incremental_da_versao(pasta, versao):
+    return painel_incremental(pasta)
+
+
+# Painel pronto (paineis_prontos.py) da impressão digital atual dos dados:
+# lido do disco, ou recalculado e gravado quando os dados mudaram
+@st.cache_resource(show_spinner="Preparando o painel...", max_entries=8)
+def painel_pronto_da_versao(caminho, cnpj, impressao):
+    return abrir_painel_pronto(caminho, cnpj, DIRETORIO_PAINEIS)
+
+
+CARTEIRA_TOTAL = "Carteira (todas as empresas)"
+ORIGENS_CARGA = {"snapshot": "snapshot", "cache": "cache", "json": "JSON"}
+ORIGENS_PAINEL = {"pronto": "lido do disco", "recalculado": "recalculado"}
+
+# Perfil opcional das seções (?perfil=1 ou PROTOTIPO_PERFIL=1)
+perfil = Perfilador(ativo=perfil_ativo(st.query_params))
+if perfil.ativo:
+    configurar_log()
+
+resumo_carteira = None
+painel = None
+figuras_prontas = {}
+tabelas = None
+caminho_painel = os.environ.get("PROTOTIPO_PAINEL")
+if caminho_painel:
+    # Documento gerado em lote por "python src/motor.py <json> --saida <painel>"
+    with perfil.secao("carregamento"):
+        painel = carregar_painel(caminho_painel)
+    descricao_carga = f"Painel pré-calculado para o CNPJ {painel['cnpj']}"
+elif DIRETORIO_INCREMENTAL:
+    # Base mantida por "python src/incremental.py aplicar <delta>" (PROTOTIPO_INCREMENTAL)
+    with perfil.secao("carregamento"):
+        painel = painel_incremental_da_versao(
+            DIRETORIO_INCREMENTAL, versao_base(DIRETORIO_INCREMENTAL)
         )
-    )
-]["statusPredictus.valorExecucao.valor"].sum()
-valor_execucao_passivo = df[
-    df["partes"].apply(
-        lambda partes: any(
-            p.get("polo") == "PASSIVO" and p.get("cnpj") == cnpj_alvo for p in partes
+    descricao_carga = f"Base incremental do CNPJ {painel['cnpj']}"
+elif DIRETORIO_CARTEIRA:
+    # Modo carteira: PROTOTIPO_CARTEIRA aponta para uma pasta com um JSON por
+    # empresa (veja carteira.py)
+    with perfil.secao("carteira"):
+        arquivos_carteira = listar_arquivos(DIRETORIO_CARTEIRA)
+        carteira = carteira_da_versao(
+            tuple((arquivo, chave_cache(arquivo)) for arquivo in arquivos_carteira)
         )
+    if carteira["total"] is None:
+        st.error(f"Nenhum arquivo .json encontrado em {DIRETORIO_CARTEIRA}.")
+        st.stop()
+    opcoes_empresa = [CARTEIRA_TOTAL, *carteira["empresas"]]
+    cnpj_inicial = normalizar_documento(st.query_params.get("cnpj"))
+    empresa = st.sidebar.selectbox(
+        "Empresa",
+        opcoes_empresa,
+        index=(
+            opcoes_empresa.index(cnpj_inicial) if cnpj_inicial in opcoes_empresa else 0
+        ),
     )
-]["statusPredictus.valorExecucao.valor"].sum()
+    if empresa == CARTEIRA_TOTAL:
+        painel = carteira["total"]
+        resumo_carteira = carteira["resumo"]
+        descricao_carga = f"Total de {len(carteira['empresas'])} empresas"
+    else:
+        painel = carteira["empresas"][empresa]
+        descricao_carga = f"CNPJ {empresa} ({len(carteira['empresas'])} na carteira)"
+else:
+    # CNPJ consultado: configurável pela URL (?cnpj=...), pela variável de
+    # ambiente PROTOTIPO_CNPJ ou pela barra lateral
+    caminho_dados = "src/dados_empresa.json"
+    cnpj_alvo = st.sidebar.text_input(
+        "CNPJ consultado",
+        value=st.query_params.get(
+            "cnpj", os.environ.get("PROTOTIPO_CNPJ", CNPJ_PADRAO)
+        ),
+    )
+    if DIRETORIO_PAINEIS:
+        # Painéis prontos (PROTOTIPO_PAINEIS): agregados e figuras gravados pelo
+        # aquecimento; sem tabelas em memória, a busca de partes fica desligada
+        with perfil.secao("carregamento"):
+            pronto, info_pronto = painel_pronto_da_versao(
+                caminho_dados, cnpj_alvo, impressao_digital(caminho_dados, cnpj_alvo)
+            )
+        painel = pronto["painel"]
+        figuras_prontas = pronto["figuras"]
+        descricao_carga = (
+            f"Painel pronto {ORIGENS_PAINEL[info_pronto['origem']]}"
+            f" em {info_pronto['segundos']:.2f}s"
+        )
+    elif BACKEND_PADRAO == "duckdb":
+        # Backend SQL opcional (PROTOTIPO_BACKEND=duckdb): consultas direto nos
+        # arquivos Parquet do cache, sem montar as tabelas em memória
+        chave_dados = chave_cache(caminho_dados)
+        descricao_carga = "Painel calculado em SQL (DuckDB) sobre o cache Parquet"
+    else:
+        # Leitura incremental do array da primeira chave, sem truncar o número
+        # de processos. As tabelas normalizadas ficam em cache Parquet até o
+        # arquivo de origem mudar.
+        with perfil.secao("carregamento"):
+            tabelas, info_carga = tabelas_da_versao(
+                caminho_dados, chave_cache(caminho_dados)
+            )
+        chave_dados = info_carga["chave"]
+        descricao_carga = (
+            f"Dados carregados do "
+            f"{ORIGENS_CARGA.get(info_carga['origem'], info_carga['origem'])}"
+            f" em {info_carga['segundos']:.2f}s"
+        )
 
-# ========================== Distribuições ==========================
-# Distribuição por Tipo de Julgamento
-df_julgamentos = df["statusPredictus.julgamentos"].explode().dropna().apply(pd.Series)
-distribuicao_tipo_julgamento = (
-    df_julgamentos["tipoJulgamento"].value_counts().reset_index()
-)
-distribuicao_tipo_julgamento.columns = ["Categoria", "Total"]
 
-# Distribuição por Ramo do Direito
-distribuicao_ramo_direito = (
-    df["statusPredictus.ramoDireito"].value_counts().reset_index()
-)
-distribuicao_ramo_direito.columns = ["Categoria", "Total"]
+def secao_painel(nome):
+    # Painel completo já em memória (documento pré-calculado ou carteira) ou a
+    # seção calculada sob demanda e memorizada na primeira vez que é aberta
+    with perfil.secao(f"secao_{nome}"):
+        if painel is not None:
+            return painel
+        if BACKEND_PADRAO == "duckdb":
+            return secao_sql_da_versao(
+                caminho_dados,
+                chave_dados,
+                nome,
+                cnpj_alvo if nome == "indicadores" else None,
+            )
+        if nome == "indicadores":
+            return indicadores_da_empresa(chave_dados, cnpj_alvo, tabelas)
+        return secao_da_versao(chave_dados, nome, tabelas)
 
-# Distribuição por Status dos Processos
-distribuicao_status_processos = (
-    df["statusPredictus.statusProcesso"].value_counts().reset_index()
-)
-distribuicao_status_processos.columns = ["Categoria", "Total"]
 
-# Distribuiçã por tribunal
-distribuicao_tribunal = df["tribunal"].value_counts().reset_index()
-distribuicao_tribunal.columns = ["Tribunal", "Total"]
+# ========================== Indicadores Gerais ==========================
+estimativas = None
+if tabelas is not None and MODO_INDICADORES == "aproximado":
+    futuro_exatos = exatos_em_segundo_plano(chave_dados, cnpj_alvo, tabelas)
+    if not futuro_exatos.done():
+        with perfil.secao("estimativas"):
+            estimativas = estimativas_da_empresa(chave_dados, cnpj_alvo, tabelas)
+if estimativas is not None:
+    indicadores = estimativas["indicadores"]
+else:
+    indicadores = secao_painel("indicadores")["indicadores"]
+total_processos = indicadores["total_processos"]
+qtd_polo_ativo = indicadores["qtd_polo_ativo"]
+qtd_polo_passivo = indicadores["qtd_polo_passivo"]
+valor_total = indicadores["valor_total"]
+valor_ativo = indicadores["valor_ativo"]
+valor_passivo = indicadores["valor_passivo"]
+valor_execucao = indicadores["valor_execucao"]
+valor_execucao_ativo = indicadores["valor_execucao_ativo"]
+valor_execucao_passivo = indicadores["valor_execucao_passivo"]
 
-# ========================== Rankings ==========================
-# Top 5 principais assuntos principais
-assuntos_principais = (
-    df["assuntosCNJ"]
-    .explode()
-    .apply(
-        lambda x: (
-            x["titulo"] if isinstance(x, dict) and x.get("ePrincipal", False) else None
-        )
-    )
-    .dropna()
-    .value_counts()
-    .reset_index()
-)
-assuntos_principais.columns = ["Assunto", "Total"]
+# ========================== Streamlit ==========================
+st.title("Visão Geral da Plataforma - Pessoa/Empresa")
+st.caption(descricao_carga)
 
-classes = df["classeProcessual.nome"].value_counts().reset_index()
-classes.columns = ["Classe Processual", "Total"]
 
-# Top 5 principais envolvidos por Polo Ativo e Polo Passivo
-df_partes = df["partes"].explode().apply(pd.Series)
+def format_currency_brl(value):
+    return format_currency(value, "BRL", locale="pt_BR")
 
-top_5_envolvidos_ativo = (
-    df_partes[df_partes["polo"] == "ATIVO"]["nome"].value_counts().head(5)
-)
 
-top_5_envolvidos_passivo = (
-    df_partes[df_partes["polo"] == "PASSIVO"]["nome"].value_counts().head(5)
-)
+def formatar_inteiro(valor):
+    return f"{round(valor):n}"
 
-# Top 5 advogados que mais aparecem por Polo Ativo e Polo Passivo
-df_partes_ativo = df_partes.loc[df_partes["polo"] == "ATIVO"]
-df_partes_passivo = df_partes.loc[df_partes["polo"] == "PASSIVO"]
-df_advogados_ativo = pd.json_normalize(
-    df_partes_ativo.explode("advogados")["advogados"]
-).dropna(subset=["oab.numero"])
-df_advogados_passivo = pd.json_normalize(
-    df_partes_passivo.explode("advogados")["advogados"]
-).dropna(subset=["oab.numero"])
 
+# Valores estimados levam "≈" e o intervalo de confiança
+aproximado = "≈ " if estimativas is not None else ""
 
-# Contagem dos 5 advogados mais comuns com o novo formato
-top_5_advogados_ativo = df_advogados_ativo["nome"].value_counts().head(5)
-top_5_advogados_passivo = df_advogados_passivo["nome"].value_counts().head(5)
 
-# ========================== Dados para Mapa ==========================
-# Quantidade de processos por estado, % de cada estado e valor total de causa por estado
-df_estados = (
-    df.groupby("uf")
-    .agg(
-        quantidade=("numeroProcessoUnico", "count"),
-        valor_total=("valorCausa.valor", "sum"),
-    )
-    .reset_index()
-)
+def faixa(nome, formatar):
+    if estimativas is None:
+        return ""
+    inferior, superior = estimativas["intervalos"][nome]
+    return f" (IC {NIVEL_CONFIANCA}: {formatar(inferior)} – {formatar(superior)})"
 
-df_estados["percentual"] = (
-    df_estados["quantidade"] / df_estados["quantidade"].sum()
-) * 100
 
-# ========================== Streamlit ==========================
-st.set_page_config(
-    layout="wide",
-    page_title="Visão Geral da Plataforma - Pessoa/Empresa",
-    page_icon="📊",
-)
-st.title("Visão Geral da Plataforma - Pessoa/Empresa")
+if resumo_carteira is not None:
+    with st.expander("Empresas da carteira", expanded=True):
+        st.dataframe(
+            resumo_carteira.style.format(
+                {
+                    "Valor das causas": format_currency_brl,
+                    "Valor das execuções": format_currency_brl,
+                }
+            ),
+            hide_index=True,
+        )
+
 st.markdown("---")
 col1, col2, col3 = st.columns(3)
 
-
-def format_currency_brl(value):
-    return format_currency(value, 'BRL', locale='pt_BR')
-
 # Card for Process Counts
-with col1:
+with col1, perfil.secao("card_processos"):
     with st.container(border=1):
         st.markdown(
             f"<h1 style='color: #21332C;'>{total_processos:n}</h1>",
             unsafe_allow_html=True,
         )
         st.markdown("Processos encontrados")
-        st.markdown(f"{qtd_polo_ativo:n} como autor")
+        st.markdown(
+            f"{aproximado}{qtd_polo_ativo:n} como autor"
+            f"{faixa('qtd_polo_ativo', formatar_inteiro)}"
+        )
         st.progress(qtd_polo_ativo / total_processos)
-        st.markdown(f"{qtd_polo_passivo:n} como réu")
+        st.markdown(
+            f"{aproximado}{qtd_polo_passivo:n} como réu"
+            f"{faixa('qtd_polo_passivo', formatar_inteiro)}"
+        )
         st.progress(qtd_polo_passivo / total_processos)
 
 # Card for Valor das Causas
-with col2:
+with col2, perfil.secao("card_valor_causas"):
     with st.container(border=1):
         st.markdown(
-            f"<h1 style='color: #21332C;'>{format_currency_brl(valor_total)}</h1>",
+            f"<h1 style='color: #21332C;'>{aproximado}"
+            f"{format_currency_brl(valor_total)}</h1>",
             unsafe_allow_html=True,
         )
-        st.markdown("Valor das causas")
-        st.markdown(f"{format_currency_brl(valor_ativo)} como autor")
+        st.markdown(f"Valor das causas{faixa('valor_total', format_currency_brl)}")
+        st.markdown(
+            f"{aproximado}{format_currency_brl(valor_ativo)} como autor"
+            f"{faixa('valor_ativo', format_currency_brl)}"
+        )
         st.progress(valor_ativo / valor_total)
-        st.markdown(f"{format_currency_brl(valor_passivo)} como réu")
+        st.markdown(
+            f"{aproximado}{format_currency_brl(valor_passivo)} como réu"
+            f"{faixa('valor_passivo', format_currency_brl)}"
+        )
         st.progress(valor_passivo / valor_total)
 
 # Card for Valor das Execuções
-with col3:
+with col3, perfil.secao("card_execucoes"):
     with st.container(border=1):
         st.markdown(
-            f"<h1 style='color: #21332C;'>{format_currency_brl(valor_execucao)}</h1>",
+            f"<h1 style='color: #21332C;'>{aproximado}"
+            f"{format_currency_brl(valor_execucao)}</h1>",
             unsafe_allow_html=True,
         )
-        st.markdown("Valor das execuções")
-        st.markdown(f"{format_currency_brl(valor_execucao_ativo)} como autor")
+        st.markdown(
+            f"Valor das execuções{faixa('valor_execucao', format_currency_brl)}"
+        )
+        st.markdown(
+            f"{aproximado}{format_currency_brl(valor_execucao_ativo)} como autor"
+            f"{faixa('valor_execucao_ativo', format_currency_brl)}"
+        )
         percentage = valor_execucao_ativo / valor_execucao
         st.progress(percentage if percentage > 0 else 0)
-        st.markdown(f"{format_currency_brl(valor_execucao_passivo)} como réu")
+        st.markdown(
+            f"{aproximado}{format_currency_brl(valor_execucao_passivo)} como réu"
+            f"{faixa('valor_execucao_passivo', format_currency_brl)}"
+        )
         percentage = valor_execucao_passivo / valor_execucao
         st.progress(percentage if percentage > 0 else 0)
 
-with col1:
-    with st.container(border=1, height=500):
-        st.subheader("Distribuição por Status do Processo")
-        grafico_barras_horizontais = px.bar(
-            distribuicao_status_processos,
-            x="Total",
-            y="Categoria",
-            text="Total",
-            orientation="h",
-            color_discrete_sequence=["#45A874"],
-            labels={"Categoria": "", "Total": ""},
-        )
-        st.plotly_chart(grafico_barras_horizontais, use_container_width=True)
-
-# Card de Processos por Ramo do Direito
-with col2:
-    with st.container(border=1, height=500):
-        st.subheader("Distribuição por Ramo do Direito")
-        grafico_barras_verticais = px.bar(
-            distribuicao_ramo_direito,
-            x="Categoria",
-            y="Total",
-            text="Total",
-            color_discrete_sequence=["#45A874"],
-            labels={"Categoria": "", "Total": ""},
-        )
-        st.plotly_chart(grafico_barras_verticais, use_container_width=True)
-
-with col3:
-    with st.container(border=1, height=500):
-        st.subheader("Distribuição por Tribunal")
-        grafico_barras_verticais = px.bar(
-            distribuicao_tribunal,
-            x="Tribunal",
-            y="Total",
-            text="Total",
-            color_discrete_sequence=["#45A874"],
-            labels={"Tribunal": "", "Total": ""},
-        )
-        st.plotly_chart(grafico_barras_verticais, use_container_width=True)
-
-# Mapa de processos por UF
-df_estados = (
-    df.groupby("uf")
-    .agg(
-        quantidade=("numeroProcessoUnico", "count"),
-        valor_total=("valorCausa.valor", "sum"),
+# Enquanto o cálculo exato não termina, o fragmento confere o resultado a cada
+# segundo; quando fica pronto, a página é reexecutada já com os valores exatos
+if estimativas is not None:
+
+    @st.fragment(run_every=1)
+    def aguardar_exatos():
+        if futuro_exatos.done():
+            st.rerun()
+        st.caption(
+            f"Valores com ≈ estimados a partir de {estimativas['amostra']:n} de "
+            f"{total_processos:n} processos sorteados; os exatos entram no lugar "
+            "assim que o cálculo completo terminar."
+        )
+
+    aguardar_exatos()
+
+
+def grafico(nome, construir, pronto=True):
+    # Todos os gráficos passam por aqui para o perfil somar o payload enviado.
+    # A especificação gravada no painel pronto substitui a figura quando existe
+    # e corresponde à seleção atual (pronto); senão a figura é montada aqui.
+    figura = figuras_prontas.get(nome) if pronto else None
+    if figura is None:
+        figura = construir()
+    perfil.payload(nome, figura)
+    st.plotly_chart(figura, use_container_width=True)
+
+
+# Fragmento: ordenar ou trocar de página reexecuta só a tabela, e só a página
+# visível (paginacao.LINHAS_POR_PAGINA linhas) vai para o navegador
+@st.fragment
+def tabela_paginada(tabela, chave, height=300, width=750):
+    col_ordem, col_direcao, col_pagina = st.columns([2, 1, 1])
+    coluna = col_ordem.selectbox(
+        "Ordenar por",
+        list(tabela.columns),
+        index=len(tabela.columns) - 1,
+        key=f"{chave}_ordem",
     )
-    .reset_index()
-)
-df_estados["percentual"] = (
-    df_estados["quantidade"] / df_estados["quantidade"].sum()
-) * 100
-estados_brasil = [
-    "AC",
-    "AL",
-    "AM",
-    "AP",
-    "BA",
-    "CE",
-    "DF",
-    "ES",
-    "GO",
-    "MA",
-    "MT",
-    "MS",
-    "MG",
-    "PA",
-    "PB",
-    "PR",
-    "PE",
-    "PI",
-    "RJ",
-    "RN",
-    "RS",
-    "RO",
-    "RR",
-    "SC",
-    "SP",
-    "SE",
-    "TO",
-]
-geojson_url = "https://raw.githubusercontent.com/codeforamerica/click_that_hood/master/public/data/brazil-states.geojson"
-response = requests.get(geojson_url)
-geojson_brasil = response.json()
-df_estado_completo = pd.DataFrame(estados_brasil, columns=["uf"])
-df_estado_completo = df_estado_completo.merge(df_estados, on="uf", how="left").fillna(
-    {"quantidade": 0, "percentual": 0, "valor_total": 0}
-)
-df_estado_completo["Label"] = df_estado_completo.apply(
-    lambda row: f"{row['uf']}: {row['quantidade']} processos ({row['percentual']:.2f}%)",
-    axis=1,
-)
+    crescente = col_direcao.toggle("Crescente", key=f"{chave}_crescente")
+    paginas = total_paginas(len(tabela))
+    pagina = col_pagina.number_input(
+        "Página", min_value=1, max_value=paginas, key=f"{chave}_pagina"
+    )
+    fatia = pagina_ordenada(tabela, pagina, coluna=coluna, crescente=crescente)
+    perfil.payload(chave, fatia)
+    st.dataframe(fatia, height=height, width=width, hide_index=True)
+    st.caption(f"{len(tabela):n} linhas · página {pagina} de {paginas}")
+
+
+def tabela_top_5(tabela, chave, tipo, coluna):
+    # Com o índice de busca, uma linha selecionada abre os processos da parte ou
+    # do advogado na seção de busca
+    perfil.payload(chave, tabela)
+    limites = erros_top_5.get(chave)
+    if limites is not None:
+        # Top 5 aproximado (frequentes.py): o total real de cada linha fica
+        # entre o exibido e o exibido + erro
+        st.caption(
+            f"Aproximado: cada total pode estar até {limites['erro']:n} abaixo "
+            f"do real ({limites['contadores']:n} contadores para "
+            f"{limites['total']:n} ocorrências)"
+        )
+    if indice_busca is None:
+        st.dataframe(tabela, height=300, width=750)
+        return
+    evento = st.dataframe(
+        tabela,
+        height=300,
+        width=750,
+        on_select="rerun",
+        selection_mode="single-row",
+        key=chave,
+    )
+    if evento.selection.rows:
+        st.session_state["entidade_detalhe"] = indice_busca.localizar(
+            tipo, tabela.iloc[evento.selection.rows[0]][coluna]
+        )
 
-col1, col2 = st.columns([3, 2])
-
-with col1:
-    with st.container(border=1, height=500):
-        st.subheader("Distribuição por UF")
-        mapa = px.choropleth(
-            df_estado_completo,
-            geojson=geojson_brasil,
-            locations="uf",
-            featureidkey="properties.sigla",
-            color="quantidade",
-            hover_name="Label",
-            color_continuous_scale=[
-                "rgba(69, 168, 116, 0.1)",  # Verde claro para valores baixos
-                "#45A874",  # Verde médio
-                "#2A4C3F",  # Verde escuro
-                "#21332C",  # Verde ainda mais escuro
-            ],
-        )
-        mapa.update_geos(
-            fitbounds="locations",
-            visible=True,
-            showcoastlines=False,
-            showcountries=False,
-        )
-        mapa.update_traces(marker_line_width=0.5, text=df_estado_completo["Label"])
-        st.plotly_chart(mapa, use_container_width=True)
-
-with col2:
-    with st.container(border=1, height=500):
-        st.subheader("Distribuição por Status do Julgamento")
-        grafico_barras_horizontais = px.bar(
-            distribuicao_tipo_julgamento,
-            x="Total",
-            y="Categoria",
-            text="Total",
-            orientation="h",
-            color_discrete_sequence=["#45A874"],
-            labels={"Categoria": "", "Total": ""},
-        )
-        st.plotly_chart(grafico_barras_horizontais, use_container_width=True)
-
-col1, col2 = st.columns(2)
-
-with col1:
-    with st.container(border=1, height=400):
-        st.subheader("Distribuição de Assuntos Principais")
-        st.dataframe(assuntos_principais, height=300, width=750, hide_index=True)
-
-with col2:
-    with st.container(border=1, height=400):
-        st.subheader("Distribuição de Classes Processuais")
-        st.dataframe(classes, height=300, width=750, hide_index=True)
-
-top_5_envolvidos_ativo = (
-    df_partes[df_partes["polo"] == "ATIVO"]["nome"].value_counts().head(5)
-)
-top_5_envolvidos_ativo = top_5_envolvidos_ativo.reset_index()
-top_5_envolvidos_ativo.columns = ["Parte", "Total"]
-top_5_envolvidos_ativo.index = top_5_envolvidos_ativo.index + 1
 
-with col1:
-    with st.container(border=1, height=400):
-        st.subheader("Top 5 Partes - Polo Ativo")
-        st.dataframe(
-            top_5_envolvidos_ativo,
-            height=300,
-            width=750,
+# ========================== Busca de partes e advogados ==========================
+COLUNAS_DETALHE = {
+    "numeroProcessoUnico": "Processo",
+    "tribunal": "Tribunal",
+    "uf": "UF",
+    "classeProcessual.nome": "Classe",
+    "statusPredictus.statusProcesso": "Status",
+    "dataDistribuicao": "Distribuição",
+    "valorCausa.valor": "Valor da causa",
+}
+
+
+# Fragmento: digitar na busca ou escolher um resultado não reexecuta a página
+@st.fragment
+def busca_partes(indice, processos):
+    with perfil.secao("busca"):
+        st.header("Busca de Partes e Advogados")
+        texto = st.text_input(
+            "Nome, CNPJ/CPF ou número da OAB",
+            key="texto_busca",
+            placeholder="Ex.: Silva, 90.400.888/0001-42, 12345/SP",
+        )
+        entidade = st.session_state.get("entidade_detalhe")
+        if texto:
+            resultados = indice.buscar(texto)
+            if resultados.empty:
+                st.info("Nenhuma parte ou advogado encontrado.")
+            perfil.payload("resultados_busca", resultados)
+            evento = st.dataframe(
+                resultados,
+                hide_index=True,
+                on_select="rerun",
+                selection_mode="single-row",
+                key="resultados_busca",
+            )
+            if evento.selection.rows:
+                entidade = int(resultados.index[evento.selection.rows[0]])
+        if entidade is None:
+            st.caption(
+                "Selecione um resultado da busca ou uma linha dos Top 5 para ver "
+                "os processos."
+            )
+            return
+        detalhe = (
+            indice.processos_da_entidade(entidade, processos)
+            .reindex(columns=list(COLUNAS_DETALHE))
+            .rename(columns=COLUNAS_DETALHE)
         )
+        st.subheader(f"Processos de {indice.rotulos[entidade]} ({len(detalhe):n})")
+        perfil.payload("detalhe_busca", detalhe)
+        st.dataframe(detalhe, hide_index=True)
 
-top_5_envolvidos_passivo = (
-    df_partes[df_partes["polo"] == "PASSIVO"]["nome"].value_counts().head(5)
-)
-top_5_envolvidos_passivo = top_5_envolvidos_passivo.reset_index()
-top_5_envolvidos_passivo.columns = ["Parte", "Total"]
-top_5_envolvidos_passivo.index = top_5_envolvidos_passivo.index + 1
 
-with col2:
-    with st.container(border=1, height=400):
-        st.subheader("Top 5 Partes - Polo Passivo")
-        st.dataframe(
-            top_5_envolvidos_passivo,
-            height=300,
-            width=750,
+# Seleção com que os gráficos da Análise por Período abrem; é a que os painéis
+# prontos gravam
+SELECAO_INICIAL = ("Todos os anos", "Todos os meses")
+
+
+def filtro_periodo(ano, mes):
+    return (
+        None if ano == "Todos os anos" else ano,
+        None if mes == "Todos os meses" else mes,
+    )
+
+
+# Cada gráfico é um fragmento: mudar o ano ou o mês reexecuta só a função do
+# próprio gráfico, sem recarregar dados nem redesenhar o resto da página
+@st.fragment
+def periodo_assuntos(cubos_periodo, anos_disponiveis, meses_disponiveis):
+    with perfil.secao("periodo_assuntos"):
+        col1, col2 = st.columns(2)
+        ano_selecionado = col1.selectbox(
+            "Selecione o ano para Principais Assuntos",
+            anos_disponiveis,
+            key="ano_assuntos",
+        )
+        meses_disponiveis_assuntos = (
+            ["Todos os meses"] + meses_com_dados(cubos_periodo, ano_selecionado)
+            if ano_selecionado != "Todos os anos"
+            else meses_disponiveis
+        )
+        mes_selecionado = col2.selectbox(
+            "Selecione o mês", meses_disponiveis_assuntos, key="mes_assuntos"
         )
 
-top_5_advogados_ativo = top_5_advogados_ativo.reset_index()
-top_5_advogados_ativo.columns = ["Parte", "Total"]
-top_5_advogados_ativo.index = top_5_advogados_ativo.index + 1
+        df_assuntos_periodo = fatiar_assuntos(
+            cubos_periodo, *filtro_periodo(ano_selecionado, mes_selecionado)
+        )
 
-with col1:
-    with st.container(border=1, height=400):
-        st.subheader("Top 5 Advogados - Polo Ativo")
-        st.dataframe(
-            top_5_advogados_ativo,
-            height=300,
-            width=750,
+        titulo_assuntos = f"Principais Assuntos em {ano_selecionado}" + (
+            f" - Mês {mes_selecionado}" if mes_selecionado != "Todos os meses" else ""
+        )
+        st.subheader(titulo_assuntos)
+        # Maiores assuntos e uma barra "Outros"; a lista completa fica no
+        # expansor abaixo, montada só quando ele é aberto
+        grafico(
+            "periodo_assuntos",
+            lambda: assuntos_periodo(df_assuntos_periodo),
+            pronto=(ano_selecionado, mes_selecionado) == SELECAO_INICIAL,
+        )
+        distribuicao_completa = st.expander(
+            f"Todos os assuntos ({len(df_assuntos_periodo):n})",
+            key="assuntos_periodo_completo",
+            on_change="rerun",
+        )
+        with distribuicao_completa:
+            if distribuicao_completa.open:
+                tabela_paginada(df_assuntos_periodo, "tabela_assuntos_periodo")
+
+
+@st.fragment
+def periodo_distribuidos_arquivados(cubos_periodo, anos_disponiveis, meses_disponiveis):
+    with perfil.secao("periodo_distribuidos_arquivados"):
+        col1, col2, col3 = st.columns(3)
+        ano_selecionado_dist_arq = col1.selectbox(
+            "Selecione o ano para Distribuídos x Arquivados",
+            anos_disponiveis,
+            key="ano_dist_arq",
+        )
+        meses_disponiveis_dist_arq = (
+            ["Todos os meses"]
+            + meses_com_dados(cubos_periodo, ano_selecionado_dist_arq)
+            if ano_selecionado_dist_arq != "Todos os anos"
+            else meses_disponiveis
+        )
+        mes_selecionado_dist_arq = col2.selectbox(
+            "Selecione o mês", meses_disponiveis_dist_arq, key="mes_dist_arq"
         )
 
-top_5_advogados_passivo = top_5_advogados_passivo.reset_index()
-top_5_advogados_passivo.columns = ["Parte", "Total"]
-top_5_advogados_passivo.index = top_5_advogados_passivo.index + 1
+        # Meses, trimestres ou anos: o mesmo recorte dos cubos, somado em
+        # vetores de tamanho fixo
+        granularidade_dist_arq = col3.selectbox(
+            "Agrupar por",
+            list(ROTULOS_GRANULARIDADE),
+            format_func=ROTULOS_GRANULARIDADE.get,
+            key="granularidade_dist_arq",
+        )
 
-with col2:
-    with st.container(border=1, height=400):
-        st.subheader("Top 5 Advogados - Polo Passivo")
-        st.dataframe(
-            top_5_advogados_passivo,
-            height=300,
-            width=750,
+        df_dist_arq = fatiar_movimentacao(
+            cubos_periodo,
+            *filtro_periodo(ano_selecionado_dist_arq, mes_selecionado_dist_arq),
+            granularidade=granularidade_dist_arq,
         )
 
-# Acesso e conversão das datas, incluindo dataArquivamento dentro de statusPredictus
-df["dataDistribuicao"] = pd.to_datetime(df["dataDistribuicao"], errors="coerce")
-df["dataArquivamento"] = (
-    pd.to_datetime(df["statusPredictus.dataArquivamento"], errors="coerce")
-    if "statusPredictus.dataArquivamento" in df.columns
-    else None
-)
+        titulo_dist_arq = (
+            f"Processos Distribuídos x Arquivados em {ano_selecionado_dist_arq}"
+            + (
+                f" - Mês {mes_selecionado_dist_arq}"
+                if mes_selecionado_dist_arq != "Todos os meses"
+                else ""
+            )
+        )
+        st.subheader(titulo_dist_arq)
+        grafico(
+            "periodo_distribuidos_arquivados",
+            lambda: distribuidos_arquivados(df_dist_arq, granularidade_dist_arq),
+            pronto=(
+                (ano_selecionado_dist_arq, mes_selecionado_dist_arq) == SELECAO_INICIAL
+                and granularidade_dist_arq == "mes"
+            ),
+        )
 
-# Verificação de dados válidos em `dataDistribuicao` e `dataArquivamento`
-if df["dataDistribuicao"].isnull().all():
-    st.error("Erro: Todas as datas de distribuição estão ausentes ou são inválidas.")
-else:
-    df["anoDistribuicao"] = df["dataDistribuicao"].dt.year.astype("Int64")
-    df["mesDistribuicao"] = df["dataDistribuicao"].dt.month.astype("Int64")
 
-# Só extrair anos e meses de arquivamento se houver dados válidos
-if "dataArquivamento" in df.columns and not df["dataArquivamento"].isnull().all():
-    df["anoArquivamento"] = df["dataArquivamento"].dt.year.astype("Int64")
-    df["mesArquivamento"] = df["dataArquivamento"].dt.month.astype("Int64")
-else:
-    st.warning(
-        "Dados de arquivamento ausentes ou inválidos. Gráficos podem não refletir informações completas."
-    )
+# ========================== Seções ==========================
+# Só a aba aberta executa: a primeira vez que uma aba é aberta calcula a sua
+# seção do painel (memorizada), e as demais não pesam na primeira pintura
+aba_distribuicoes, aba_mapa, aba_rankings, aba_periodo = st.tabs(
+    ["Distribuições", "Mapa por UF", "Rankings", "Análise por Período"],
+    key="aba_painel",
+    on_change="rerun",
+)
 
-# ========================== Gráfico 1: Principais Assuntos por Período ==========================
-st.header("Análise por Período")
+# ========================== Distribuições ==========================
+with aba_distribuicoes:
+    if aba_distribuicoes.open:
+        distribuicoes = secao_painel("distribuicoes")
+        distribuicao_tipo_julgamento = distribuicoes["distribuicao_tipo_julgamento"]
+        distribuicao_ramo_direito = distribuicoes["distribuicao_ramo_direito"]
+        distribuicao_status_processos = distribuicoes["distribuicao_status_processos"]
+        distribuicao_tribunal = distribuicoes["distribuicao_tribunal"]
+
+        # Grade 2 x 2: status e ramo na primeira coluna, tribunal e
+        # julgamentos na segunda
+        col1, col2 = st.columns(2)
+
+        with col1, perfil.secao("grafico_status"):
+            with st.container(border=1, height=500):
+                st.subheader("Distribuição por Status do Processo")
+                grafico(
+                    "grafico_status",
+                    lambda: barras_horizontais(distribuicao_status_processos),
+                )
+
+        # Card de Processos por Ramo do Direito
+        with col1, perfil.secao("grafico_ramo"):
+            with st.container(border=1, height=500):
+                st.subheader("Distribuição por Ramo do Direito")
+                grafico(
+                    "grafico_ramo", lambda: barras_verticais(distribuicao_ramo_direito)
+                )
+
+        with col2, perfil.secao("grafico_tribunal"):
+            with st.container(border=1, height=500):
+                st.subheader("Distribuição por Tribunal")
+                grafico(
+                    "grafico_tribunal",
+                    lambda: barras_verticais(distribuicao_tribunal, "Tribunal"),
+                )
+
+        with col2, perfil.secao("grafico_julgamentos"):
+            with st.container(border=1, height=500):
+                st.subheader("Distribuição por Status do Julgamento")
+                grafico(
+                    "grafico_julgamentos",
+                    lambda: barras_horizontais(distribuicao_tipo_julgamento),
+                )
 
-anos_disponiveis = ["Todos os anos"] + sorted(df["anoDistribuicao"].dropna().unique())
-meses_disponiveis = ["Todos os meses"] + sorted(df["mesDistribuicao"].dropna().unique())
+# ========================== Dados para Mapa ==========================
+with aba_mapa:
+    if aba_mapa.open:
+        df_estado_completo = secao_painel("mapa")["estados"]
+
+        # Mapa de processos por UF
+        # Geometria simplificada empacotada com o app, lida uma única vez por
+        # processo; o mapa do painel pronto já traz a geometria
+        with perfil.secao("geojson"):
+            geojson_brasil = (
+                None
+                if "grafico_mapa" in figuras_prontas
+                else carregar_geojson_estados()
+            )
 
-col_grafico1, col_grafico2 = st.columns(2)
+        with perfil.secao("grafico_mapa"):
+            with st.container(border=1, height=500):
+                st.subheader("Distribuição por UF")
+                if geojson_brasil is None and "grafico_mapa" not in figuras_prontas:
+                    st.info("Mapa indisponível: geometria dos estados não encontrada.")
+                else:
+                    grafico(
+                        "grafico_mapa",
+                        lambda: mapa_estados(df_estado_completo, geojson_brasil),
+                    )
 
-# Configuração da primeira coluna para o gráfico de "Principais Assuntos"
-with col_grafico1:
-    col1, col2 = st.columns(2)
-    ano_selecionado = col1.selectbox(
-        "Selecione o ano para Principais Assuntos", anos_disponiveis, key="ano_assuntos"
-    )
-    meses_disponiveis_assuntos = (
-        ["Todos os meses"]
-        + sorted(
-            df[df["anoDistribuicao"] == ano_selecionado]["mesDistribuicao"]
-            .dropna()
-            .unique()
-        )
-        if ano_selecionado != "Todos os anos"
-        else meses_disponiveis
-    )
-    mes_selecionado = col2.selectbox(
-        "Selecione o mês", meses_disponiveis_assuntos, key="mes_assuntos"
-    )
+# ========================== Rankings ==========================
+indice_busca = None
+with aba_rankings:
+    if aba_rankings.open:
+        rankings = secao_painel("rankings")
+        assuntos_principais = rankings["assuntos_principais"]
+        classes = rankings["classes"]
+        top_5_envolvidos_ativo = rankings["top_5_envolvidos_ativo"]
+        top_5_envolvidos_passivo = rankings["top_5_envolvidos_passivo"]
+        top_5_advogados_ativo = rankings["top_5_advogados_ativo"]
+        top_5_advogados_passivo = rankings["top_5_advogados_passivo"]
+        erros_top_5 = rankings.get("erros_top_5", {})
+        if tabelas is not None:
+            # Índice de busca montado só quando os rankings são abertos
+            with perfil.secao("indice_busca"):
+                indice_busca = indice_busca_da_versao(chave_dados, tabelas)
+
+        col1, col2 = st.columns(2)
+
+        with col1, perfil.secao("tabela_assuntos"):
+            with st.container(border=1, height=500):
+                st.subheader("Distribuição de Assuntos Principais")
+                tabela_paginada(assuntos_principais, "tabela_assuntos")
+
+        with col2, perfil.secao("tabela_classes"):
+            with st.container(border=1, height=500):
+                st.subheader("Distribuição de Classes Processuais")
+                tabela_paginada(classes, "tabela_classes")
+
+        with col1, perfil.secao("top_5_partes_ativo"):
+            with st.container(border=1, height=400):
+                st.subheader("Top 5 Partes - Polo Ativo")
+                tabela_top_5(
+                    top_5_envolvidos_ativo, "top_5_envolvidos_ativo", "parte", "Parte"
+                )
+
+        with col2, perfil.secao("top_5_partes_passivo"):
+            with st.container(border=1, height=400):
+                st.subheader("Top 5 Partes - Polo Passivo")
+                tabela_top_5(
+                    top_5_envolvidos_passivo,
+                    "top_5_envolvidos_passivo",
+                    "parte",
+                    "Parte",
+                )
+
+        with col1, perfil.secao("top_5_advogados_ativo"):
+            with st.container(border=1, height=400):
+                st.subheader("Top 5 Advogados - Polo Ativo")
+                tabela_top_5(
+                    top_5_advogados_ativo, "top_5_advogados_ativo", "advogado", "OAB"
+                )
+
+        with col2, perfil.secao("top_5_advogados_passivo"):
+            with st.container(border=1, height=400):
+                st.subheader("Top 5 Advogados - Polo Passivo")
+                tabela_top_5(
+                    top_5_advogados_passivo,
+                    "top_5_advogados_passivo",
+                    "advogado",
+                    "OAB",
+                )
+
+        if indice_busca is not None:
+            busca_partes(indice_busca, tabelas["processos"])
+
+# ========================== Análise por Período ==========================
+with aba_periodo:
+    if aba_periodo.open:
+        secao_periodos = secao_painel("periodos")
+
+        # Verificação de dados válidos em `dataDistribuicao` e `dataArquivamento`
+        if secao_periodos["avisos"]["distribuicao_invalida"]:
+            st.error(
+                "Erro: Todas as datas de distribuição estão ausentes ou são inválidas."
+            )
 
-    if ano_selecionado == "Todos os anos":
-        df_assuntos_periodo = (
-            df
-            if mes_selecionado == "Todos os meses"
-            else df[df["mesDistribuicao"] == mes_selecionado]
-        )
-    else:
-        df_assuntos_periodo = (
-            df[
-                (df["anoDistribuicao"] == ano_selecionado)
-                & (df["mesDistribuicao"] == mes_selecionado)
-            ]
-            if mes_selecionado != "Todos os meses"
-            else df[df["anoDistribuicao"] == ano_selecionado]
-        )
-
-    df_assuntos_periodo = (
-        df_assuntos_periodo["assuntosCNJ"]
-        .explode()
-        .dropna()
-        .apply(
-            lambda x: (
-                x["titulo"]
-                if isinstance(x, dict) and x.get("ePrincipal", False)
-                else None
+        if secao_periodos["avisos"]["arquivamento_ausente"]:
+            st.warning(
+                "Dados de arquivamento ausentes ou inválidos. Gráficos podem não refletir informações completas."
             )
-        )
-        .dropna()
-        .value_counts()
-        .reset_index()
-    )
-    df_assuntos_periodo.columns = ["Assunto", "Total"]
 
-    titulo_assuntos = f"Principais Assuntos em {ano_selecionado}" + (
-        f" - Mês {mes_selecionado}" if mes_selecionado != "Todos os meses" else ""
-    )
-    st.subheader(titulo_assuntos)
-    grafico_assuntos = px.bar(
-        df_assuntos_periodo,
-        x="Assunto",
-        y="Total",
-        labels={"Assunto": "Assunto", "Total": "Total"},
-        text="Total",
-        color_discrete_sequence=["#45A874"],
-    )
-    st.plotly_chart(grafico_assuntos, use_container_width=True)
-
-# Configuração da segunda coluna para o gráfico de "Distribuídos x Arquivados"
-with col_grafico2:
-    col1, col2 = st.columns(2)
-    ano_selecionado_dist_arq = col1.selectbox(
-        "Selecione o ano para Distribuídos x Arquivados",
-        anos_disponiveis,
-        key="ano_dist_arq",
-    )
-    meses_disponiveis_dist_arq = (
-        ["Todos os meses"]
-        + sorted(
-            df[df["anoDistribuicao"] == ano_selecionado_dist_arq]["mesDistribuicao"]
-            .dropna()
-            .unique()
-        )
-        if ano_selecionado_dist_arq != "Todos os anos"
-        else meses_disponiveis
-    )
-    mes_selecionado_dist_arq = col2.selectbox(
-        "Selecione o mês", meses_disponiveis_dist_arq, key="mes_dist_arq"
-    )
+        # Datas preenchidas que não bateram com nenhum formato conhecido na
+        # carga (esquema.FORMATOS_DATA) ficam fora dos gráficos
+        falhas_datas = {
+            "distribuição": secao_periodos["avisos"]["falhas_distribuicao"],
+            "arquivamento": secao_periodos["avisos"]["falhas_arquivamento"],
+        }
+        if any(falhas_datas.values()):
+            st.warning(
+                "Datas em formato não reconhecido, ignoradas nos gráficos: "
+                + ", ".join(
+                    f"{quantidade:n} de {tipo}"
+                    for tipo, quantidade in falhas_datas.items()
+                    if quantidade
+                )
+                + "."
+            )
 
-    if ano_selecionado_dist_arq == "Todos os anos":
-        df_distribuido_periodo = (
-            df
-            if mes_selecionado_dist_arq == "Todos os meses"
-            else df[df["mesDistribuicao"] == mes_selecionado_dist_arq]
-        )
-        df_arquivado_periodo = (
-            df
-            if mes_selecionado_dist_arq == "Todos os meses"
-            else df[df["mesArquivamento"] == mes_selecionado_dist_arq]
-        )
-    else:
-        df_distribuido_periodo = (
-            df[
-                (df["anoDistribuicao"] == ano_selecionado_dist_arq)
-                & (df["mesDistribuicao"] == mes_selecionado_dist_arq)
-            ]
-            if mes_selecionado_dist_arq != "Todos os meses"
-            else df[df["anoDistribuicao"] == ano_selecionado_dist_arq]
-        )
-        df_arquivado_periodo = (
-            df[
-                (df["anoArquivamento"] == ano_selecionado_dist_arq)
-                & (df["mesArquivamento"] == mes_selecionado_dist_arq)
-            ]
-            if mes_selecionado_dist_arq != "Todos os meses"
-            else df[df["anoArquivamento"] == ano_selecionado_dist_arq]
-        )
-
-    df_distribuido_agrupado = (
-        df_distribuido_periodo.groupby("mesDistribuicao")
-        .size()
-        .reset_index(name="Distribuídos")
-    )
-    df_arquivado_agrupado = (
-        df_arquivado_periodo.groupby("mesArquivamento")
-        .size()
-        .reset_index(name="Arquivados")
-    )
-    df_dist_arq = pd.merge(
-        df_distribuido_agrupado,
-        df_arquivado_agrupado,
-        left_on="mesDistribuicao",
-        right_on="mesArquivamento",
-        how="outer",
-    )
-    df_dist_arq["Mes"] = (
-        df_dist_arq["mesDistribuicao"]
-        .fillna(df_dist_arq["mesArquivamento"])
-        .astype(int)
-    )
-    df_dist_arq = df_dist_arq.sort_values("Mes")
+        # Cubos por período montados uma vez com a seção; os seletores só
+        # recortam essas tabelas pequenas
+        cubos_periodo = secao_periodos["cubos_periodo"]
+
+        anos_disponiveis = ["Todos os anos"] + anos_com_dados(cubos_periodo)
+        meses_disponiveis = ["Todos os meses"] + meses_com_dados(cubos_periodo)
 
-    titulo_dist_arq = (
-        f"Processos Distribuídos x Arquivados em {ano_selecionado_dist_arq}"
-        + (
-            f" - Mês {mes_selecionado_dist_arq}"
-            if mes_selecionado_dist_arq != "Todos os meses"
-            else ""
+        col_grafico1, col_grafico2 = st.columns(2)
+
+        # Configuração da primeira coluna para o gráfico de "Principais Assuntos"
+        with col_grafico1:
+            periodo_assuntos(cubos_periodo, anos_disponiveis, meses_disponiveis)
+
+        # Configuração da segunda coluna para o gráfico de "Distribuídos x Arquivados"
+        with col_grafico2:
+            periodo_distribuidos_arquivados(
+                cubos_periodo, anos_disponiveis, meses_disponiveis
+            )
+
+# ========================== Perfil de execução ==========================
+if perfil.ativo:
+    with st.sidebar.expander("Perfil de execução", expanded=False):
+        registros = pd.DataFrame(perfil.registros)
+        st.caption(f"Execução {perfil.execucao}")
+        st.dataframe(
+            registros[["secao", "parede_s", "cpu_s", "memoria_delta_bytes"]].rename(
+                columns={
+                    "secao": "Seção",
+                    "parede_s": "Parede (s)",
+                    "cpu_s": "CPU (s)",
+                    "memoria_delta_bytes": "Δ memória (bytes)",
+                }
+            ),
+            hide_index=True,
         )
-    )
-    st.subheader(titulo_dist_arq)
-    grafico_dist_arq = px.bar(
-        df_dist_arq,
-        x="Mes",
-        y=["Distribuídos", "Arquivados"],
-        barmode="group",
-        labels={"Mes": "Mês", "value": "Total de Processos", "variable": "Status"},
-        color_discrete_sequence=["#45A874", "#2A4C3F"],
-    )
-    st.plotly_chart(grafico_dist_arq, use_container_width=True)
+        if perfil.payloads:
+            payloads = pd.DataFrame(perfil.payloads)
+            st.caption(
+                f"Payload enviado nesta execução: "
+                f"{payloads['bytes'].sum() / 1024:,.1f} KiB"
+            )
+            st.dataframe(
+                payloads[["elemento", "bytes"]].rename(
+                    columns={"elemento": "Elemento", "bytes": "Bytes"}
+                ),
+                hide_index=True,
+            )
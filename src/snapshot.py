@@ -0,0 +1,117 @@
+import argparse
+import os
+import shutil
+import time
+
+import pyarrow as pa
+
+from cache_processos import carregar_com_cache, chave_cache, chave_fonte
+from instrumentacao import memoria_proporcional, memoria_residente
+
+# Snapshot somente leitura das tabelas normalizadas em Arrow IPC sem compressão.
+# Os arquivos são abertos com memory map: textos e números viram DataFrames que
+# apontam para as páginas do arquivo, compartilhadas pelo sistema operacional
+# entre todos os processos que abrem a mesma versão (servidores Streamlit,
+# workers, scripts). Cada versão é uma pasta imutável "<fonte>-<versao>",
+# publicada com os.replace; uma versão nova nunca altera arquivos já mapeados.
+DIRETORIO_SNAPSHOT = os.environ.get("PROTOTIPO_SNAPSHOT_DIR", ".cache/snapshot")
+
+
+def _gravar_snapshot(pasta, tabelas):
+    temporaria = f"{pasta}.tmp-{os.getpid()}"
+    os.makedirs(temporaria, exist_ok=True)
+    try:
+        for nome, tabela in tabelas.items():
+            tabela_arrow = pa.Table.from_pandas(tabela, preserve_index=False)
+            with pa.OSFile(os.path.join(temporaria, f"{nome}.arrow"), "wb") as arquivo:
+                with pa.ipc.new_file(arquivo, tabela_arrow.schema) as escritor:
+                    escritor.write_table(tabela_arrow)
+        os.replace(temporaria, pasta)
+    except OSError:
+        # Outro processo publicou a mesma versão primeiro
+        shutil.rmtree(temporaria, ignore_errors=True)
+        if not os.path.isdir(pasta):
+            raise
+
+
+def _abrir_snapshot(pasta):
+    tabelas = {}
+    for arquivo in sorted(os.listdir(pasta)):
+        if arquivo.endswith(".arrow"):
+            # split_blocks evita consolidar as colunas numéricas num bloco
+            # novo (as sem nulos continuam apontando para o arquivo) e
+            # self_destruct solta cada coluna Arrow assim que é convertida
+            mapa = pa.memory_map(os.path.join(pasta, arquivo), "r")
+            tabelas[arquivo[: -len(".arrow")]] = (
+                pa.ipc.open_file(mapa)
+                .read_all()
+                .to_pandas(split_blocks=True, self_destruct=True)
+            )
+    return tabelas
+
+
+def _remover_versoes_antigas(caminho, atual, diretorio):
+    # No Linux/macOS quem ainda mapeia a versão antiga continua lendo normalmente;
+    # no Windows a remoção falha em silêncio e fica para a próxima publicação
+    prefixo = f"{chave_fonte(caminho)}-"
+    for entrada in os.scandir(diretorio):
+        if (
+            entrada.is_dir()
+            and entrada.name.startswith(prefixo)
+            and entrada.name != atual
+            and ".tmp-" not in entrada.name
+        ):
+            shutil.rmtree(entrada.path, ignore_errors=True)
+
+
+def abrir_snapshot(caminho, diretorio=DIRETORIO_SNAPSHOT):
+    # Mesmo retorno de carregar_com_cache; origem "snapshot" quando a versão
+    # atual já estava publicada
+    inicio = time.perf_counter()
+    chave = chave_cache(caminho)
+    pasta = os.path.join(diretorio, chave)
+    origem = "snapshot"
+    if not os.path.isdir(pasta):
+        tabelas, info = carregar_com_cache(caminho)
+        os.makedirs(diretorio, exist_ok=True)
+        _gravar_snapshot(pasta, tabelas)
+        _remover_versoes_antigas(caminho, chave, diretorio)
+        origem = info["origem"]
+    tabelas = _abrir_snapshot(pasta)
+    return tabelas, {
+        "origem": origem,
+        "segundos": time.perf_counter() - inicio,
+        "chave": chave,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Publica o snapshot Arrow das tabelas e mede a abertura"
+    )
+    parser.add_argument("caminho", help="arquivo dados_empresa.json")
+    parser.add_argument("--diretorio", default=DIRETORIO_SNAPSHOT)
+    args = parser.parse_args(argv)
+
+    publicacao = abrir_snapshot(args.caminho, args.diretorio)[1]
+    residente, proporcional = memoria_residente(), memoria_proporcional()
+    tabelas, abertura = abrir_snapshot(args.caminho, args.diretorio)
+    residente = memoria_residente() - residente
+    mapeado = sum(
+        entrada.stat().st_size
+        for entrada in os.scandir(os.path.join(args.diretorio, abertura["chave"]))
+    )
+    print(f"Publicação ({publicacao['origem']}): {publicacao['segundos']:.3f}s")
+    print(f"Abertura (memory map):   {abertura['segundos']:.3f}s")
+    print(f"Arquivos mapeados:       {mapeado / 2**20:.1f} MiB")
+    # O RSS conta as páginas do arquivo inteiras em cada processo; o PSS as
+    # divide entre os processos que abrem a mesma versão
+    print(f"RSS da abertura:         {residente / 2**20:+.1f} MiB")
+    if proporcional is not None:
+        proporcional = memoria_proporcional() - proporcional
+        print(f"PSS da abertura:         {proporcional / 2**20:+.1f} MiB")
+    print({nome: len(tabela) for nome, tabela in tabelas.items()})
+
+
+if __name__ == "__main__":
+    main()